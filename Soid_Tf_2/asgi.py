@@ -3,6 +3,15 @@ ASGI config for Soid_Tf_2 project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Arranque (requiere un servidor ASGI, p. ej. uvicorn):
+    uvicorn Soid_Tf_2.asgi:application
+    gunicorn Soid_Tf_2.asgi:application -k uvicorn.workers.UvicornWorker
+
+El tenant, el usuario actual y el cache por request viven en ContextVars
+(tenants.threadlocal, miembros_app.signals, core.request_cache) y sus
+middlewares son sync+async: cada request corre en su propio contexto, así
+que las vistas async no ven el tenant de otro request.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -80,6 +80,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise ANTES de otros
+    'core.query_budget.QueryBudgetMiddleware',  # Solo activo si SOID_QUERY_BUDGET["ENABLED"]
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,6 +89,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'miembros_app.signals.CurrentUserMiddleware',
       "tenants.middleware.TenantMiddleware",
+    'core.request_cache.RequestCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'Soid_Tf_2.urls'
@@ -110,6 +112,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Soid_Tf_2.wsgi.application'
+ASGI_APPLICATION = 'Soid_Tf_2.asgi.application'
 
 # =============================================================================
 # BASE DE DATOS
@@ -163,6 +166,60 @@ USE_THOUSAND_SEPARATOR = True
 
 EDAD_MINIMA_MIEMBRO_OFICIAL = 14
 
+# Cache host -> tenant del TenantMiddleware (segundos). Es por proceso: un
+# cambio de Tenant hecho en otro worker (o desde shell) se ve al leer
+# VersionTenants, como mucho cada TENANT_CACHE_VERSION_CHECK segundos.
+TENANT_CACHE_TTL = 300
+TENANT_CACHE_NEGATIVE_TTL = 30
+TENANT_CACHE_VERSION_CHECK = 5
+# Cada worker escribe sus aciertos/fallos en el logger "soid.tenants" (0 = no)
+TENANT_CACHE_STATS_INTERVAL = 300
+
+# Cache de ConfiguracionSistema por proceso (segundos). La versión vive en la
+# BD (VersionConfiguracion): un cambio se ve en todos los workers en el
+# siguiente request; el TTL solo acota ediciones por SQL directo.
+SOID_CONFIG_CACHE_TTL = 60
+
+# Registro de módulos activos por proceso (segundos). La versión vive en la
+# BD (VersionModulos): activar/desactivar un módulo se ve en todos los
+# workers en el siguiente request; el TTL solo acota ediciones por SQL.
+SOID_MODULE_REGISTRY_TTL = 300
+
+# Datos de reportes de Finanzas en cache (segundos; se invalidan por la
+# versión del libro, el TTL solo limpia versiones viejas)
+SOID_REPORTES_CACHE_TTL = 3600
+
+# =============================================================================
+# PRESUPUESTO DE CONSULTAS POR REQUEST (core/query_budget.py)
+# =============================================================================
+# En producción: SOID_QUERY_BUDGET=1 y un SAMPLE_RATE bajo (ej. 0.05)
+
+SOID_QUERY_BUDGET = {
+    "ENABLED": os.environ.get("SOID_QUERY_BUDGET", "") == "1",
+    "SAMPLE_RATE": float(os.environ.get("SOID_QUERY_BUDGET_SAMPLE_RATE", "1.0")),
+    "DEFAULT_BUDGET": 50,
+    "VIEW_BUDGETS": {
+        "finanzas_app:dashboard": 30,
+        "finanzas_app:dashboard_api": 20,
+        "finanzas_app:reporte_comparativo_anual": 20,
+        "miembros_app:lista": 25,
+    },
+    "DUPLICATE_THRESHOLD": 5,
+    "SERVER_TIMING": True,
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "soid.queries": {"handlers": ["console"], "level": "INFO", "propagate": False},
+        "soid.tenants": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 # =============================================================================
 # ARCHIVOS ESTÁTICOS (CSS, JavaScript, Imágenes)
 # =============================================================================
@@ -236,6 +293,18 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 # AUTENTICACIÓN
 # =============================================================================
 
+# Permisos leídos desde el snapshot cacheado por usuario (core/permisos_cache.py)
+# ModelBackend se mantiene para las sesiones ya abiertas; comparte el
+# _perm_cache del usuario, así que no vuelve a consultar permisos.
+AUTHENTICATION_BACKENDS = [
+    'core.permisos_cache.SnapshotModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Segundos que vive el snapshot de rol/permisos. Los cambios por ORM/admin suben
+# la versión del usuario en BD y se ven al instante en todos los workers.
+SOID_USER_SNAPSHOT_TTL = 600
+
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
@@ -8,6 +8,7 @@ from django.db.models import Q
 from django.core.paginator import Paginator
 import re
 
+from miembros_app import busqueda
 from miembros_app.models import Miembro, ESTADO_MIEMBRO_CHOICES
 from .models import (
     AccesoActualizacionDatos,
@@ -149,11 +150,7 @@ def api_buscar_miembros(request):
         limit = 15
     limit = max(1, min(limit, 25))
 
-    qs = Miembro.objects.filter(
-        Q(nombres__icontains=q) |
-        Q(apellidos__icontains=q) |
-        Q(cedula__icontains=q)
-    )
+    qs = busqueda.filtrar(Miembro.objects.all(), q)
     
     # Filtrar por tenant si existe
     if tenant:
@@ -3,8 +3,8 @@
 
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q
 from django.contrib.auth.decorators import login_required
+from miembros_app import busqueda
 from miembros_app.models import Miembro
 
 
@@ -38,13 +38,7 @@ def buscar_miembros(request):
     
     # === BÚSQUEDA POR TÉRMINO ===
     if q:
-        miembros = miembros.filter(
-            Q(nombres__icontains=q) |
-            Q(apellidos__icontains=q) |
-            Q(apodo__icontains=q) |
-            Q(codigo_miembro__icontains=q) |
-            Q(cedula__icontains=q)
-        )
+        miembros = busqueda.filtrar(miembros, q)
     # === ORDENAR Y LIMITAR ===
     miembros = miembros.order_by("nombres", "apellidos")[:limit]
     
@@ -0,0 +1,101 @@
+# core/config_cache.py
+# Cache versionado de ConfiguracionSistema por tenant.
+#
+# Niveles:
+#   1) Request: una sola instancia por tenant durante todo el request.
+#   2) Proceso: instancia cargada + versión con la que se cargó.
+#   3) Versión en la BD (VersionConfiguracion, se incrementa al guardar en la
+#      misma transacción). Se lee una vez por request (una consulta por PK):
+#      un cambio hecho en cualquier worker se ve en todos en el siguiente
+#      request, aunque el cache de Django sea LocMem.
+
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .request_cache import request_memo, request_forget
+
+_PROCESS_TTL = getattr(settings, "SOID_CONFIG_CACHE_TTL", 60)
+
+_process = {}  # tenant_id -> (version, expira_en, config)
+_lock = threading.Lock()
+
+
+def _tenant_id(tenant):
+    return getattr(tenant, "pk", tenant)
+
+
+def _request_key(tenant_id):
+    return f"cfg:{tenant_id}"
+
+
+def get_version(tenant_id):
+    from .models import VersionConfiguracion
+
+    return (
+        VersionConfiguracion.objects.filter(tenant_id=tenant_id)
+        .values_list("version", flat=True)
+        .first()
+    ) or 0
+
+
+def _load_from_db(tenant):
+    from .models import ConfiguracionSistema
+
+    tenant_id = _tenant_id(tenant)
+    cfg = ConfiguracionSistema.objects.filter(tenant_id=tenant_id).first()
+    if cfg is None:
+        if not hasattr(tenant, "pk"):
+            from tenants.models import Tenant
+            tenant = Tenant.objects.get(pk=tenant_id)
+        cfg = ConfiguracionSistema.load(tenant)
+    return cfg
+
+
+def _load(tenant):
+    tenant_id = _tenant_id(tenant)
+    version = get_version(tenant_id)
+    ahora = time.monotonic()
+
+    with _lock:
+        entrada = _process.get(tenant_id)
+    if entrada is not None and entrada[0] == version and entrada[1] > ahora:
+        # Copia: cada request trabaja sobre su propia instancia
+        return copy.copy(entrada[2])
+
+    cfg = _load_from_db(tenant)
+    with _lock:
+        _process[tenant_id] = (version, ahora + _PROCESS_TTL, cfg)
+    return copy.copy(cfg)
+
+
+def get_config_cached(tenant):
+    """
+    Configuración del tenant para LECTURA (tenant puede ser instancia o id).
+    Las vistas que editan la configuración deben seguir usando
+    ConfiguracionSistema.load(tenant).
+    """
+    if not tenant:
+        return None
+    tenant_id = _tenant_id(tenant)
+    return request_memo(_request_key(tenant_id), lambda: _load(tenant))
+
+
+def invalidar_config(tenant_id):
+    """Sube la versión del tenant (transacción actual) y descarta las copias locales."""
+    from .models import VersionConfiguracion
+
+    if not VersionConfiguracion.objects.filter(tenant_id=tenant_id).update(version=F("version") + 1):
+        # Sin fila la versión leída era 0: nacer en 1 ya la cambia
+        try:
+            with transaction.atomic():
+                VersionConfiguracion.objects.create(tenant_id=tenant_id, version=1)
+        except IntegrityError:
+            VersionConfiguracion.objects.filter(tenant_id=tenant_id).update(version=F("version") + 1)
+    with _lock:
+        _process.pop(tenant_id, None)
+    request_forget(_request_key(tenant_id))
@@ -1,10 +1,21 @@
 # context_processors.py
 # Actualizado con sistema de mensajes inteligentes de bienvenida
 # ✅ CON SOPORTE MULTI-TENANT
+# ✅ PEREZOSO: cada clave solo consulta la BD si la plantilla la usa
+#    (las vistas de impresión / kiosko no pagan por lo que no muestran)
 
 from django.conf import settings
 from django.apps import apps
-from .models import ConfiguracionSistema, Module
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from .models import ConfiguracionSistema
+from .module_registry import module_registry
+from .permisos_cache import get_user_snapshot
+from .request_cache import request_memo
+
+# Segundos que se reutilizan los contadores de pendientes por tenant
+PENDIENTES_CACHE_TTL = getattr(settings, "SOID_PENDIENTES_CACHE_TTL", 60)
 
 
 def _has_field(model, field_name: str) -> bool:
@@ -15,105 +26,172 @@ def _has_field(model, field_name: str) -> bool:
         return False
 
 
+def _lazy(key, factory):
+    """Valor perezoso y memorizado por request (varios render() = 1 consulta)."""
+    return SimpleLazyObject(lambda: request_memo(key, factory))
+
+
+class _LazyDict(dict):
+    """
+    dict cuyos valores `_Diferido` se calculan al primer acceso.
+    Se comporta como el dict original en plantillas, incluido {{ X|safe }}.
+    """
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, _Diferido):
+            value = value.fn()
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def _resolver(self):
+        return {k: self[k] for k in self.keys()}
+
+    def items(self):
+        return self._resolver().items()
+
+    def values(self):
+        return self._resolver().values()
+
+    def __repr__(self):
+        return repr(self._resolver())
+
+    __str__ = __repr__
+
+
+class _Diferido:
+    __slots__ = ("fn",)
+
+    def __init__(self, fn):
+        self.fn = fn
+
+
+# ===============================
+# Cálculos (solo se ejecutan si se usan)
+# ===============================
+
+def _rol_usuario(u):
+    snap = get_user_snapshot(u)
+    return snap.rol if snap else "usuario"
+
+
+def _tiene_miembro(u):
+    try:
+        return bool(getattr(u, "miembro", None))
+    except Exception:
+        return False
+
+
+def _calcular_pendientes(tenant):
+    pendientes = {
+        "pendiente_envio_nuevo_creyente": 0,
+        "sin_padre_espiritual": 0,
+    }
+
+    try:
+        Miembro = apps.get_model("miembros_app", "Miembro")
+    except Exception:
+        return pendientes
+
+    # ✅ FILTRAR POR TENANT
+    base_qs = Miembro.objects.filter(tenant=tenant)
+
+    # Miembros sin padre espiritual
+    for f in ["padre_espiritual", "padre_espiritual_miembro", "padre_espiritual_fk"]:
+        if _has_field(Miembro, f):
+            pendientes["sin_padre_espiritual"] = base_qs.filter(**{f"{f}__isnull": True}).count()
+            break
+
+    # Pendientes de envío a Nuevo Creyente
+    for f in [
+        "pendiente_envio_nuevo_creyente",
+        "pendiente_envio_nc",
+        "pendiente_envio",
+        "nuevo_creyente_pendiente_envio",
+        "pendiente_a_nuevo_creyente",
+    ]:
+        if _has_field(Miembro, f):
+            pendientes["pendiente_envio_nuevo_creyente"] = base_qs.filter(**{f: True}).count()
+            break
+
+    return pendientes
+
+
+def _pendientes_cacheados(tenant):
+    """Contadores de pendientes por tenant, con TTL corto en el cache de Django."""
+    key = f"soid:pendientes:{tenant.pk}"
+    pendientes = cache.get(key)
+    if pendientes is None:
+        pendientes = _calcular_pendientes(tenant)
+        cache.set(key, pendientes, PENDIENTES_CACHE_TTL)
+    return pendientes
+
+
 def configuracion_global(request):
     """
     Envía la configuración del sistema, módulos activos
     y contexto inteligente de SOID a TODAS las plantillas.
+    Todas las claves se resuelven de forma perezosa.
     """
     # ✅ OBTENER TENANT (puede ser None en admin/login)
     tenant = getattr(request, 'tenant', None)
-    
-    # ✅ CARGAR CONFIG SOLO SI HAY TENANT
-    if tenant:
-        config = ConfiguracionSistema.load(tenant)
-    else:
-        config = None
+
+    # ✅ CARGAR CONFIG SOLO SI HAY TENANT (y solo si la plantilla la usa)
+    config = SimpleLazyObject(lambda: ConfiguracionSistema.cached(tenant)) if tenant else None
+
+    # Módulos activos: registro por proceso (ya trae mapa por código y split del nav)
+    modulos = _lazy("ctx:modulos", module_registry.get)
 
     # Todos los módulos activos ordenados
-    todos_los_modulos = list(Module.objects.filter(is_enabled=True).order_by('order', 'name'))
-    
+    todos_los_modulos = SimpleLazyObject(lambda: list(modulos.modules))
+
     # Diccionario para acceso rápido por código
-    modulos_activos = {m.code: m for m in todos_los_modulos}
-    
+    modulos_activos = SimpleLazyObject(lambda: modulos.by_code)
+
     # Para el bottom nav: primeros 3 son principales, el resto va en "Más"
-    modulos_principales = todos_los_modulos[:3]
-    modulos_extras = todos_los_modulos[3:]
+    modulos_principales = SimpleLazyObject(lambda: list(modulos.principales))
+    modulos_extras = SimpleLazyObject(lambda: list(modulos.extras))
 
     # ===============================
     # 🧠 CONTEXTO INTELIGENTE DE SOID
     # ===============================
-    soid_ctx = {
+    soid_ctx = _LazyDict({
         "tiene_miembro": False,
         "rol": "usuario",
         "pendientes": {
             "pendiente_envio_nuevo_creyente": 0,
             "sin_padre_espiritual": 0,
         },
-    }
+    })
 
     u = getattr(request, "user", None)
 
     if u and getattr(u, "is_authenticated", False):
-
         # 1) ¿Tiene miembro vinculado?
-        try:
-            soid_ctx["tiene_miembro"] = bool(getattr(u, "miembro", None))
-        except Exception:
-            soid_ctx["tiene_miembro"] = False
+        soid_ctx["tiene_miembro"] = _Diferido(lambda: request_memo("ctx:tiene_miembro", lambda: _tiene_miembro(u)))
 
         # 2) Rol del usuario
-        if getattr(u, "is_superuser", False):
-            soid_ctx["rol"] = "admin"
-        else:
-            try:
-                groups = [g.name.lower() for g in u.groups.all()]
-            except Exception:
-                groups = []
-
-            if any("admin" in g or "geren" in g for g in groups):
-                soid_ctx["rol"] = "admin"
-            elif any("secre" in g for g in groups):
-                soid_ctx["rol"] = "secretaria"
-            elif any("lider" in g or "pastor" in g for g in groups):
-                soid_ctx["rol"] = "lider"
-            else:
-                soid_ctx["rol"] = "usuario"
+        soid_ctx["rol"] = _Diferido(lambda: request_memo("ctx:rol", lambda: _rol_usuario(u)))
 
         # 3) Pendientes del sistema (Miembros) - SOLO SI HAY TENANT
         if tenant:
-            try:
-                Miembro = apps.get_model("miembros_app", "Miembro")
-            except Exception:
-                Miembro = None
-
-            if Miembro:
-                # ✅ FILTRAR POR TENANT
-                base_qs = Miembro.objects.filter(tenant=tenant)
-                
-                # Miembros sin padre espiritual
-                for f in ["padre_espiritual", "padre_espiritual_miembro", "padre_espiritual_fk"]:
-                    if _has_field(Miembro, f):
-                        soid_ctx["pendientes"]["sin_padre_espiritual"] = base_qs.filter(**{f"{f}__isnull": True}).count()
-                        break
-
-                # Pendientes de envío a Nuevo Creyente
-                for f in [
-                    "pendiente_envio_nuevo_creyente",
-                    "pendiente_envio_nc",
-                    "pendiente_envio",
-                    "nuevo_creyente_pendiente_envio",
-                    "pendiente_a_nuevo_creyente",
-                ]:
-                    if _has_field(Miembro, f):
-                        soid_ctx["pendientes"]["pendiente_envio_nuevo_creyente"] = base_qs.filter(**{f: True}).count()
-                        break
+            soid_ctx["pendientes"] = _Diferido(
+                lambda: request_memo("ctx:pendientes", lambda: _pendientes_cacheados(tenant))
+            )
 
     # ===============================
     # 💬 MENSAJE DE BIENVENIDA
     # ===============================
-    welcome_message = None
-    if hasattr(request, 'session'):
-        welcome_message = request.session.pop('welcome_message', None)
+    # Se consume de la sesión solo cuando una plantilla lo muestra
+    def _welcome_message():
+        if hasattr(request, 'session'):
+            return request.session.pop('welcome_message', None)
+        return None
+
+    welcome_message = _lazy("ctx:welcome_message", _welcome_message)
 
     return {
         "CFG": config,
@@ -125,7 +203,7 @@ def configuracion_global(request):
 
         # 🧠 SOID INTELIGENTE
         "SOID_CTX": soid_ctx,
-        
+
         # 💬 MENSAJE DE BIENVENIDA
         "WELCOME_MESSAGE": welcome_message,
-    }
\ No newline at end of file
+    }
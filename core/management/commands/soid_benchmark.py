@@ -0,0 +1,395 @@
+import json
+import random
+import statistics
+import subprocess
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+
+BENCH_SLUG = "bench-{n}"
+BENCH_DOMINIO = "bench-{n}.soidtf.com"
+BATCH = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de las vistas principales sobre tenants sintéticos. "
+        "Corre en una base de datos de pruebas (nunca toca la real) y guarda "
+        "tiempos y nº de consultas en un JSON comparable entre commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenants", type=int, default=1, help="Cantidad de tenants sintéticos.")
+        parser.add_argument("--miembros", type=int, default=5000, help="Miembros por tenant.")
+        parser.add_argument("--movimientos", type=int, default=20000, help="Movimientos financieros por tenant.")
+        parser.add_argument("--anios", type=int, default=3, help="Años de historia financiera.")
+        parser.add_argument("--familias", type=int, default=60, help="Miembros extra con familias (vía seed_miembros).")
+        parser.add_argument("--repeticiones", type=int, default=5, help="Corridas en caliente por vista.")
+        parser.add_argument("--vistas", default="", help="Lista separada por comas (por defecto todas).")
+        parser.add_argument("--output", default="bench_results.json", help="Archivo JSON de resultados.")
+        parser.add_argument("--compare", default="", help="JSON anterior para mostrar la diferencia.")
+        parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria (datos reproducibles).")
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Reutiliza la BD de pruebas (y los datos ya sembrados) entre corridas.",
+        )
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, keepdb=options["keepdb"])
+        old_config = runner.setup_databases()
+
+        try:
+            with override_settings(ALLOWED_HOSTS=["*"], SECURE_SSL_REDIRECT=False):
+                escenarios = [self._preparar_tenant(n, options) for n in range(1, options["tenants"] + 1)]
+                resultados = self._medir(escenarios, options)
+        finally:
+            runner.teardown_databases(old_config)
+
+        data = {
+            "meta": {
+                "fecha": timezone.now().isoformat(),
+                "commit": self._git_commit(),
+                "db": connection.vendor,
+                "escala": {
+                    "tenants": options["tenants"],
+                    "miembros": options["miembros"],
+                    "movimientos": options["movimientos"],
+                    "anios": options["anios"],
+                },
+                "repeticiones": options["repeticiones"],
+            },
+            "resultados": resultados,
+        }
+
+        with open(options["output"], "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2, ensure_ascii=False)
+
+        self._imprimir(resultados)
+        self.stdout.write(self.style.SUCCESS(f"\n✅ Resultados guardados en {options['output']}"))
+
+        if options["compare"]:
+            self._comparar(options["compare"], resultados)
+
+    # =========================================================================
+    # SEMILLA
+    # =========================================================================
+
+    def _preparar_tenant(self, n, options):
+        from tenants.models import Tenant
+        from tenants.threadlocal import set_current_tenant
+        from miembros_app.models import Miembro
+
+        slug = BENCH_SLUG.format(n=n)
+        tenant, creado = Tenant.objects.get_or_create(
+            slug=slug,
+            defaults={"nombre": f"Iglesia Benchmark {n}", "dominio": BENCH_DOMINIO.format(n=n)},
+        )
+        set_current_tenant(tenant)
+
+        ya_sembrado = not creado and Miembro.objects.filter(tenant=tenant).count() >= options["miembros"]
+        if ya_sembrado:
+            self.stdout.write(f"♻️  {slug}: reutilizando datos sembrados")
+        else:
+            self.stdout.write(self.style.HTTP_INFO(f"🌱 Sembrando {slug}..."))
+            inicio = time.perf_counter()
+            silencio = StringIO()
+            call_command("soid_init", tenant=slug, stdout=silencio)
+            call_command("seed_finanzas", tenant=tenant.pk, stdout=silencio)
+            # seed_documentos está vacío por ahora: no hay nada que sembrar de documentos
+            self._sembrar_miembros(tenant, options["miembros"])
+            call_command("seed_miembros", total=options["familias"], tenant=tenant.pk, stdout=silencio)
+            self._sembrar_movimientos(tenant, options["movimientos"], options["anios"])
+            self._sembrar_estructura(tenant)
+            self._sembrar_votacion(tenant)
+            self.stdout.write(f"   listo en {time.perf_counter() - inicio:.1f}s")
+
+        return self._escenario(tenant)
+
+    @transaction.atomic
+    def _sembrar_miembros(self, tenant, total):
+        from miembros_app import busqueda
+        from miembros_app.models import Miembro
+        from miembros_app.management.commands.seed_miembros import (
+            APELLIDOS, NOMBRES_F, NOMBRES_M, SECTORES, ESTADOS_MIEMBRO, telefono_rd,
+        )
+        from core.models import ConfiguracionSistema
+
+        prefijo = ConfiguracionSistema.load(tenant).codigo_miembro_prefijo or "TF-"
+        hoy = date.today()
+        lote = []
+        numero = 0
+
+        # bulk_create no llama a save(): replicamos los campos que save() calcula
+        for i in range(total):
+            genero = random.choice(["masculino", "femenino"])
+            nombre = random.choice(NOMBRES_M if genero == "masculino" else NOMBRES_F)
+            apellido = random.choice(APELLIDOS)
+            tel = telefono_rd()
+            nuevo = random.random() < 0.10
+
+            m = Miembro(
+                tenant=tenant,
+                nombres=nombre,
+                apellidos=f"{apellido} {random.choice(APELLIDOS)}",
+                genero=genero,
+                fecha_nacimiento=hoy - timedelta(days=random.randint(1, 85 * 365)),
+                telefono=tel,
+                telefono_norm=tel,
+                whatsapp=tel,
+                email=f"{nombre.lower()}.{i}@correo.com",
+                sector=random.choice(SECTORES),
+                estado_miembro=random.choice(ESTADOS_MIEMBRO),
+                activo=random.random() < 0.92,
+                nuevo_creyente=nuevo,
+                bautizado_confirmado=random.random() < 0.6,
+            )
+            m.actualizar_categoria_edad()
+            if nuevo:
+                m.numero_seguimiento = i + 1
+                m.codigo_seguimiento = f"NC-{m.numero_seguimiento:04d}"
+            else:
+                numero += 1
+                m.numero_miembro = numero
+                m.codigo_miembro = f"{prefijo}{numero:04d}"
+            m.texto_busqueda = busqueda.texto_de(m)
+            m.nombre_busqueda = busqueda.texto_de(m, busqueda.CAMPOS_NOMBRE)
+            lote.append(m)
+
+            if len(lote) >= BATCH:
+                Miembro.objects.bulk_create(lote)
+                lote = []
+
+        if lote:
+            Miembro.objects.bulk_create(lote)
+
+    @transaction.atomic
+    def _sembrar_movimientos(self, tenant, total, anios):
+        from finanzas_app import ledger
+        from finanzas_app.models import CategoriaMovimiento, CuentaFinanciera, MovimientoFinanciero
+
+        cuentas = list(CuentaFinanciera.objects.filter(tenant=tenant))
+        categorias = {
+            "ingreso": list(CategoriaMovimiento.objects.filter(tenant=tenant, tipo="ingreso")),
+            "egreso": list(CategoriaMovimiento.objects.filter(tenant=tenant, tipo="egreso")),
+        }
+        hoy = date.today()
+        dias = anios * 365
+        formas = [c[0] for c in MovimientoFinanciero.FORMA_PAGO_CHOICES]
+        lote = []
+
+        for i in range(total):
+            tipo = "ingreso" if random.random() < 0.65 else "egreso"
+            anulado = random.random() < 0.02
+            lote.append(MovimientoFinanciero(
+                tenant=tenant,
+                fecha=hoy - timedelta(days=random.randint(0, dias)),
+                tipo=tipo,
+                cuenta=random.choice(cuentas),
+                categoria=random.choice(categorias[tipo]),
+                monto=Decimal(random.randint(100, 500000)) / 100,
+                descripcion=f"Movimiento sintético {i}",
+                referencia=f"B{i:07d}",
+                forma_pago=random.choice(formas),
+                estado="anulado" if anulado else "confirmado",
+                motivo_anulacion="Benchmark" if anulado else "",
+            ))
+            if len(lote) >= BATCH:
+                MovimientoFinanciero.objects.bulk_create(lote)
+                lote = []
+
+        if lote:
+            MovimientoFinanciero.objects.bulk_create(lote)
+
+        # bulk_create no dispara signals: resumen mensual y saldos se recalculan aparte
+        ledger.reconstruir(tenant)
+        ledger.reconstruir_saldos(tenant)
+
+    @transaction.atomic
+    def _sembrar_estructura(self, tenant):
+        from estructura_app.models import CategoriaUnidad, RolUnidad, TipoUnidad, Unidad, UnidadMembresia
+        from miembros_app.models import Miembro
+
+        categoria, _ = CategoriaUnidad.objects.get_or_create(tenant=tenant, codigo="bench", defaults={"nombre": "Benchmark"})
+        tipo, _ = TipoUnidad.objects.get_or_create(tenant=tenant, nombre="Ministerio")
+        rol, _ = RolUnidad.objects.get_or_create(tenant=tenant, nombre="Miembro")
+        unidad, _ = Unidad.objects.get_or_create(
+            tenant=tenant, nombre="Unidad Benchmark", tipo=tipo, padre=None,
+            defaults={"categoria": categoria},
+        )
+
+        ids = list(Miembro.objects.filter(tenant=tenant, activo=True).values_list("pk", flat=True))
+        muestra = random.sample(ids, k=max(1, len(ids) // 10))
+        UnidadMembresia.objects.bulk_create(
+            [
+                UnidadMembresia(tenant=tenant, miembo_fk_id=pk, unidad=unidad, rol=rol, fecha_ingreso=date.today())
+                for pk in muestra
+            ],
+            batch_size=BATCH,
+            ignore_conflicts=True,
+        )
+
+    @transaction.atomic
+    def _sembrar_votacion(self, tenant):
+        from miembros_app.models import Miembro
+        from votacion_app.models import Candidato, Ronda, Votacion, Voto
+
+        votacion = Votacion.objects.create(nombre=f"Votación benchmark {tenant.slug}", estado="ABIERTA")
+        ronda = Ronda.objects.create(votacion=votacion, numero=1, estado="ABIERTA")
+
+        miembros = list(Miembro.objects.filter(tenant=tenant, activo=True).values_list("pk", flat=True))
+        candidatos = [
+            Candidato.objects.create(votacion=votacion, miembro_id=pk, nombre=f"Candidato {i + 1}", orden=i)
+            for i, pk in enumerate(miembros[:8])
+        ]
+        Voto.objects.bulk_create(
+            [
+                Voto(votacion=votacion, ronda=ronda, miembro_id=pk, candidato=random.choice(candidatos))
+                for pk in miembros[: len(miembros) // 2]
+            ],
+            batch_size=BATCH,
+        )
+
+    def _escenario(self, tenant):
+        """Usuarios y objetos concretos que necesitan las vistas a medir."""
+        from estructura_app.models import Unidad
+        from miembros_app.models import Miembro
+        from votacion_app.models import Votacion
+
+        User = get_user_model()
+        admin, _ = User.objects.get_or_create(
+            username="bench_admin", defaults={"is_superuser": True, "is_staff": True}
+        )
+
+        portal_user, _ = User.objects.get_or_create(username=f"bench_portal_{tenant.slug}")
+        miembro_portal = Miembro.objects.filter(tenant=tenant, activo=True, nuevo_creyente=False).order_by("pk").first()
+        if miembro_portal.usuario_id != portal_user.pk:
+            Miembro.objects.filter(pk=miembro_portal.pk).update(usuario=portal_user)
+
+        return {
+            "tenant": tenant,
+            "admin": admin,
+            "portal_user": portal_user,
+            "miembro_pk": Miembro.objects.filter(tenant=tenant).order_by("-pk").values_list("pk", flat=True).first(),
+            "unidad_pk": Unidad.objects.filter(tenant=tenant).values_list("pk", flat=True).first(),
+            "votacion_pk": Votacion.objects.filter(nombre=f"Votación benchmark {tenant.slug}").values_list("pk", flat=True).first(),
+        }
+
+    # =========================================================================
+    # MEDICIÓN
+    # =========================================================================
+
+    def _vistas(self, esc):
+        hoy = date.today()
+        return {
+            "miembros_lista": ("admin", reverse("miembros_app:lista")),
+            "miembro_detalle": ("admin", reverse("miembros_app:detalle", args=[esc["miembro_pk"]])),
+            "finanzas_dashboard": ("admin", reverse("finanzas_app:dashboard")),
+            "finanzas_dashboard_api": ("admin", reverse("finanzas_app:dashboard_api")),
+            "reporte_resumen_mensual": ("admin", reverse("finanzas_app:reporte_resumen_mensual") + f"?year={hoy.year}&month={hoy.month}"),
+            "reporte_comparativo_anual": ("admin", reverse("finanzas_app:reporte_comparativo_anual")),
+            "unidad_detalle": ("admin", reverse("estructura_app:unidad_detalle", args=[esc["unidad_pk"]])),
+            "portal_dashboard": ("portal_user", reverse("portal_miembros:dashboard")),
+            "votacion_pantalla": ("admin", reverse("votacion:pantalla_votacion", args=[esc["votacion_pk"]])),
+        }
+
+    def _medir(self, escenarios, options):
+        filtro = {v.strip() for v in options["vistas"].split(",") if v.strip()}
+        resultados = {}
+
+        for esc in escenarios:
+            tenant = esc["tenant"]
+            clientes = {}
+            for rol in ("admin", "portal_user"):
+                c = Client(HTTP_HOST=tenant.dominio, raise_request_exception=False)
+                c.force_login(esc[rol])
+                clientes[rol] = c
+
+            for nombre, (rol, url) in self._vistas(esc).items():
+                if filtro and nombre not in filtro:
+                    continue
+                clave = f"{tenant.slug}:{nombre}"
+                resultados[clave] = self._medir_vista(clientes[rol], url, options["repeticiones"])
+                self.stdout.write(f"  ⏱  {clave}: {resultados[clave]['median_ms']} ms · {resultados[clave]['queries']} queries")
+
+        return resultados
+
+    def _medir_vista(self, client, url, repeticiones):
+        # Primera corrida en frío (caches vacíos), luego en caliente
+        cache.clear()
+        frio, _, status = self._una_corrida(client, url)
+
+        tiempos = []
+        queries = 0
+        for _ in range(max(1, repeticiones)):
+            ms, queries, status = self._una_corrida(client, url)
+            tiempos.append(ms)
+
+        return {
+            "url": url,
+            "status": status,
+            "cold_ms": round(frio, 1),
+            "median_ms": round(statistics.median(tiempos), 1),
+            "min_ms": round(min(tiempos), 1),
+            "max_ms": round(max(tiempos), 1),
+            "queries": queries,
+        }
+
+    def _una_corrida(self, client, url):
+        with CaptureQueriesContext(connection) as ctx:
+            inicio = time.perf_counter()
+            response = client.get(url)
+            ms = (time.perf_counter() - inicio) * 1000
+        return ms, len(ctx.captured_queries), response.status_code
+
+    # =========================================================================
+    # SALIDA
+    # =========================================================================
+
+    def _git_commit(self):
+        try:
+            return subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, stderr=subprocess.DEVNULL
+            ).decode().strip()
+        except Exception:
+            return ""
+
+    def _imprimir(self, resultados):
+        self.stdout.write(self.style.HTTP_INFO(f"\n{'vista':45} {'status':>6} {'frío':>9} {'mediana':>9} {'queries':>8}"))
+        for clave, r in resultados.items():
+            self.stdout.write(f"{clave:45} {r['status']:>6} {r['cold_ms']:>9} {r['median_ms']:>9} {r['queries']:>8}")
+
+    def _comparar(self, ruta, resultados):
+        with open(ruta, encoding="utf-8") as fh:
+            anterior = json.load(fh).get("resultados", {})
+
+        self.stdout.write(self.style.HTTP_INFO(f"\nComparación con {ruta}"))
+        self.stdout.write(f"{'vista':45} {'Δ mediana ms':>13} {'Δ queries':>10}")
+        for clave, r in resultados.items():
+            prev = anterior.get(clave)
+            if not prev:
+                continue
+            d_ms = r["median_ms"] - prev["median_ms"]
+            d_q = r["queries"] - prev["queries"]
+            linea = f"{clave:45} {d_ms:>+13.1f} {d_q:>+10}"
+            if d_q > 0 or (prev["median_ms"] and d_ms / prev["median_ms"] > 0.2):
+                self.stdout.write(self.style.WARNING(linea))
+            else:
+                self.stdout.write(linea)
@@ -0,0 +1,148 @@
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Reporta índices sin uso, tablas que se leen por seq scan, índices "
+        "redundantes e índices declarados en los modelos que faltan en la BD. "
+        "Las estadísticas de uso solo existen en PostgreSQL (pg_stat_user_indexes)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-scans", type=int, default=0, help="Índice 'sin uso' si idx_scan <= este valor.")
+        parser.add_argument("--min-filas", type=int, default=1000, help="Ignora tablas con menos filas vivas.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.HTTP_INFO(f"🔎 Revisión de índices ({connection.vendor})\n"))
+
+        tablas = self._tablas_soid()
+        self._declarados_faltantes(tablas)
+        self._redundantes(tablas)
+
+        if connection.vendor != "postgresql":
+            self.stdout.write(self.style.WARNING(
+                "\n⚠️  Uso de índices (pg_stat_user_indexes) solo disponible en PostgreSQL."
+            ))
+            return
+
+        self._sin_uso(tablas, options["max_scans"])
+        self._seq_scans(tablas, options["min_filas"])
+
+    # =========================================================================
+    # Modelos vs BD
+    # =========================================================================
+
+    def _tablas_soid(self):
+        """{tabla: modelo} de las apps propias (las de Django y terceros no se revisan)."""
+        base = str(settings.BASE_DIR)
+        return {
+            m._meta.db_table: m
+            for m in apps.get_models()
+            if m._meta.app_config.path.startswith(base) and m._meta.managed and not m._meta.proxy
+        }
+
+    def _constraints(self, tabla):
+        with connection.cursor() as cursor:
+            return connection.introspection.get_constraints(cursor, tabla)
+
+    def _declarados_faltantes(self, tablas):
+        """Índices en Meta.indexes que no existen en la BD (migración sin aplicar)."""
+        existentes = set(connection.introspection.table_names())
+        faltantes = []
+        for tabla, modelo in tablas.items():
+            if tabla not in existentes:
+                continue
+            en_bd = set(self._constraints(tabla))
+            for idx in modelo._meta.indexes:
+                if idx.name and idx.name not in en_bd:
+                    faltantes.append((tabla, idx.name, ", ".join(idx.fields)))
+
+        self._titulo("Índices declarados que faltan en la BD", faltantes)
+        for tabla, nombre, campos in faltantes:
+            self.stdout.write(f"  ❌ {tabla}.{nombre} ({campos}) → ejecutar migrate")
+
+    def _redundantes(self, tablas):
+        """Índices cuyas columnas son prefijo de otro índice de la misma tabla."""
+        existentes = set(connection.introspection.table_names())
+        redundantes = []
+        for tabla, modelo in tablas.items():
+            if tabla not in existentes:
+                continue
+            # Un índice parcial no cubre consultas fuera de su condición
+            parciales = {
+                obj.name for obj in [*modelo._meta.indexes, *modelo._meta.constraints]
+                if getattr(obj, "condition", None) is not None
+            }
+            indices = {
+                nombre: tuple(info["columns"])
+                for nombre, info in self._constraints(tabla).items()
+                if info["index"] and not info["unique"] and not info["primary_key"] and info["columns"]
+            }
+            todos = {
+                nombre: tuple(info["columns"])
+                for nombre, info in self._constraints(tabla).items()
+                if (info["index"] or info["unique"]) and info["columns"] and nombre not in parciales
+            }
+            for nombre, cols in indices.items():
+                for otro, otras in todos.items():
+                    if otro != nombre and len(otras) > len(cols) and otras[: len(cols)] == cols:
+                        redundantes.append((tabla, nombre, cols, otro))
+                        break
+
+        self._titulo("Índices posiblemente redundantes (prefijo de otro)", redundantes)
+        for tabla, nombre, cols, otro in redundantes:
+            self.stdout.write(f"  ♻️  {tabla}.{nombre} ({', '.join(cols)}) cubierto por {otro}")
+
+    # =========================================================================
+    # Estadísticas de PostgreSQL
+    # =========================================================================
+
+    def _sin_uso(self, tablas, max_scans):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT s.relname, s.indexrelname, s.idx_scan,
+                       pg_size_pretty(pg_relation_size(s.indexrelid)),
+                       pg_relation_size(s.indexrelid)
+                FROM pg_stat_user_indexes s
+                JOIN pg_index i ON i.indexrelid = s.indexrelid
+                WHERE NOT i.indisunique AND NOT i.indisprimary AND s.idx_scan <= %s
+                ORDER BY pg_relation_size(s.indexrelid) DESC
+                """,
+                [max_scans],
+            )
+            filas = [f for f in cursor.fetchall() if f[0] in tablas]
+
+        self._titulo(f"Índices sin uso (idx_scan <= {max_scans})", filas)
+        for tabla, indice, scans, tam, _ in filas:
+            self.stdout.write(f"  💤 {tabla}.{indice}: {scans} scans, {tam}")
+        if filas:
+            self.stdout.write("     (las estadísticas se reinician con pg_stat_reset(); revisar tras un periodo representativo)")
+
+    def _seq_scans(self, tablas, min_filas):
+        """Tablas grandes que se leen más por seq scan que por índice: candidatas a índice faltante."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT relname, seq_scan, seq_tup_read, COALESCE(idx_scan, 0), n_live_tup
+                FROM pg_stat_user_tables
+                WHERE n_live_tup >= %s AND seq_scan > COALESCE(idx_scan, 0)
+                ORDER BY seq_tup_read DESC
+                """,
+                [min_filas],
+            )
+            filas = [f for f in cursor.fetchall() if f[0] in tablas]
+
+        self._titulo("Tablas con más seq scans que index scans (posible índice faltante)", filas)
+        for tabla, seq, leidas, idx, vivas in filas:
+            self.stdout.write(
+                f"  🐢 {tabla}: {seq} seq scans ({leidas} filas leídas) vs {idx} index scans, {vivas} filas"
+            )
+
+    def _titulo(self, texto, filas):
+        estilo = self.style.WARNING if filas else self.style.SUCCESS
+        marca = "" if filas else " ✅ ninguno"
+        self.stdout.write(estilo(f"\n{texto}:{marca}"))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0015_alter_configuracionsistema_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionPermisosUsuario',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versión de permisos de usuario',
+                'verbose_name_plural': 'Versiones de permisos de usuario',
+            },
+        ),
+    ]
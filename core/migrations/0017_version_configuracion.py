@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_version_permisos_usuario'),
+        ('tenants', '0002_version_tenants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionConfiguracion',
+            fields=[
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='tenants.tenant')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versión de configuración',
+                'verbose_name_plural': 'Versiones de configuración',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_version_configuracion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionModulos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Versión de módulos',
+                'verbose_name_plural': 'Versiones de módulos',
+            },
+        ),
+    ]
@@ -530,6 +530,15 @@ class ConfiguracionSistema(TenantAwareModel):
         )
         return obj
 
+    @classmethod
+    def cached(cls, tenant):
+        """
+        Igual que load(), pero servida desde cache (request + proceso).
+        Solo para lectura: tenant puede ser la instancia o su id.
+        """
+        from .config_cache import get_config_cached
+        return get_config_cached(tenant)
+
 
 # ==============================================================================
 # ✅ UserLoginHistory - AHORA CON TENANT
@@ -714,4 +723,75 @@ class DocumentoCompartido(TenantAwareModel):
     def save(self, *args, **kwargs):
         if not self.token:
             self.token = self.generar_token()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+# ==============================================================================
+# VersionPermisosUsuario - GLOBAL (el usuario no pertenece a un tenant)
+# ==============================================================================
+class VersionPermisosUsuario(models.Model):
+    """
+    Versión de rol/grupos/permisos de un usuario. Sube (en la transacción del
+    cambio) desde los signals de core.signals, y el snapshot cacheado de
+    core.permisos_cache se guarda bajo esta versión. Vive en la BD para que
+    todos los workers vean el cambio al instante, sea cual sea el backend de
+    cache.
+    """
+    usuario = models.OneToOneField(
+        'auth.User',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Versión de permisos de usuario"
+        verbose_name_plural = "Versiones de permisos de usuario"
+
+    def __str__(self):
+        return f"{self.usuario_id} · v{self.version}"
+
+
+# ==============================================================================
+# VersionConfiguracion - una fila por tenant
+# ==============================================================================
+class VersionConfiguracion(models.Model):
+    """
+    Versión de la ConfiguracionSistema de un tenant. Sube (en la transacción
+    del cambio) desde los signals de core.signals; core.config_cache la lee
+    en cada request y recarga su copia local si cambió. Vive en la BD para
+    que todos los workers lo vean, sea cual sea el backend de cache.
+    """
+    tenant = models.OneToOneField(
+        'tenants.Tenant',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Versión de configuración"
+        verbose_name_plural = "Versiones de configuración"
+
+    def __str__(self):
+        return f"{self.tenant_id} · v{self.version}"
+
+
+# ==============================================================================
+# VersionModulos - GLOBAL (una sola fila, pk=1)
+# ==============================================================================
+class VersionModulos(models.Model):
+    """
+    Versión del registro de módulos activos. Sube (en la transacción del
+    cambio) desde los signals de Module; core.module_registry la lee una vez
+    por request y reconstruye su snapshot si cambió.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Versión de módulos"
+        verbose_name_plural = "Versiones de módulos"
+
+    def __str__(self):
+        return f"v{self.version}"
@@ -0,0 +1,131 @@
+# core/module_registry.py
+# Registro de módulos activos cargado una vez por proceso.
+#
+# Module es configuración global (no por tenant) y casi nunca cambia, pero se
+# leía en cada página (context processor) y dos veces en el home. Aquí se
+# carga una vez, junto con el mapa code -> módulo, el split del bottom nav y
+# el app_label de Django de cada módulo. Se reconstruye cuando cambia la
+# versión (VersionModulos en la BD, la suben los signals de Module) o al
+# vencer el TTL. La versión se lee una vez por request, así que activar o
+# desactivar un módulo se ve en todos los workers en el siguiente request.
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .request_cache import request_memo, request_forget
+
+_REQUEST_KEY = "modules:version"
+_PROCESS_TTL = getattr(settings, "SOID_MODULE_REGISTRY_TTL", 300)
+
+# Módulos del bottom nav que van fijos (el resto va en "Más")
+MODULOS_PRINCIPALES_N = 3
+
+# Mapa para convertir Module.code -> app_label real de Django
+APP_LABEL_MAP = {
+    "miembros": "miembros_app",
+    "nuevo_creyente": "nuevo_creyente_app",
+    "finanzas": "finanzas_app",
+    "estructura": "estructura_app",
+    "votacion": "votacion_app",
+    "notificaciones": "notificaciones_app",
+    "actualizacion_datos_miembros": "actualizacion_datos_miembros",
+    "actualizacion_datos": "actualizacion_datos_miembros",
+    "actualizacion": "actualizacion_datos_miembros",
+    "configuracion": "core",
+    "core": "core",
+}
+
+
+def _normalize(code: str) -> str:
+    return (code or "").strip().lower().replace("-", "_").replace(" ", "_")
+
+
+def resolve_app_label(module_code: str, installed_labels) -> str:
+    code = _normalize(module_code)
+
+    if code in APP_LABEL_MAP:
+        return APP_LABEL_MAP[code]
+
+    if code in installed_labels:
+        return code
+
+    candidate = f"{code}_app"
+    if candidate in installed_labels:
+        return candidate
+
+    for lb in installed_labels:
+        if code and (code in lb or lb in code):
+            return lb
+
+    return code
+
+
+class ModuleSnapshot:
+    """Vista inmutable de los módulos activos en un momento dado."""
+
+    def __init__(self, modules, version):
+        installed_labels = set(app.split(".")[-1] for app in settings.INSTALLED_APPS)
+
+        self.version = version
+        self.modules = tuple(modules)
+        self.by_code = {m.code: m for m in self.modules}
+        self.principales = self.modules[:MODULOS_PRINCIPALES_N]
+        self.extras = self.modules[MODULOS_PRINCIPALES_N:]
+        self.app_labels = {m.code: resolve_app_label(m.code, installed_labels) for m in self.modules}
+
+    def visibles_para(self, allowed_app_labels):
+        """Módulos cuyo app_label está entre los permitidos."""
+        return [m for m in self.modules if self.app_labels[m.code] in allowed_app_labels]
+
+
+class ModuleRegistry:
+    def __init__(self):
+        self._snapshot = None
+        self._expira_en = 0
+        self._lock = threading.Lock()
+
+    def _version(self):
+        from .models import VersionModulos
+
+        return request_memo(
+            _REQUEST_KEY,
+            lambda: VersionModulos.objects.filter(pk=1).values_list("version", flat=True).first() or 0,
+        )
+
+    def get(self):
+        version = self._version()
+        snap = self._snapshot
+        if snap is not None and snap.version == version and self._expira_en > time.monotonic():
+            return snap
+
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and snap.version == version and self._expira_en > time.monotonic():
+                return snap
+
+            from .models import Module
+            modules = Module.objects.filter(is_enabled=True).order_by("order", "name")
+            snap = ModuleSnapshot(modules, version)
+            self._snapshot = snap
+            self._expira_en = time.monotonic() + _PROCESS_TTL
+            return snap
+
+    def invalidate(self):
+        """Sube la versión (transacción actual) y descarta el snapshot local."""
+        from .models import VersionModulos
+
+        if not VersionModulos.objects.filter(pk=1).update(version=F("version") + 1):
+            try:
+                with transaction.atomic():
+                    VersionModulos.objects.create(pk=1, version=1)
+            except IntegrityError:
+                VersionModulos.objects.filter(pk=1).update(version=F("version") + 1)
+        request_forget(_REQUEST_KEY)
+        self._snapshot = None
+
+
+module_registry = ModuleRegistry()
@@ -0,0 +1,180 @@
+# core/permisos_cache.py
+# Snapshot cacheado por usuario: rol, grupos y permisos efectivos.
+#
+# Antes el rol se calculaba recorriendo u.groups.all() en cada página y en el
+# login, y el home volvía a consultar Permission. Ahora todo sale de un solo
+# snapshot que se guarda en el cache de Django.
+#
+# La clave lleva la versión del usuario (VersionPermisosUsuario, en la BD):
+# los signals (m2m_changed de grupos/permisos, cambios en User y Group) la
+# suben en la misma transacción del cambio. Así un permiso revocado deja de
+# valer en TODOS los workers en el siguiente request, aunque el cache sea
+# local a cada proceso (LocMem). Costo: una lectura por PK por request.
+# Ediciones por SQL directo no pasan por los signals: ahí rige el TTL.
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import VersionPermisosUsuario
+from .request_cache import request_memo
+
+SNAPSHOT_TTL = getattr(settings, "SOID_USER_SNAPSHOT_TTL", 600)
+
+
+def calcular_rol(nombres_grupos, is_superuser=False):
+    """
+    Rol SOID a partir de los nombres de grupo (en minúsculas), con el orden
+    del menú y del mensaje de login: admin/gerente > secretaría > líder.
+    """
+    if is_superuser:
+        return "admin"
+    if any("admin" in g or "geren" in g for g in nombres_grupos):
+        return "admin"
+    elif any("secre" in g for g in nombres_grupos):
+        return "secretaria"
+    elif any("lider" in g or "pastor" in g for g in nombres_grupos):
+        return "lider"
+    return "usuario"
+
+
+def calcular_rol_home(nombres_grupos, is_superuser=False):
+    """
+    Rol para el mensaje de bienvenida del home, con el orden que el home
+    siempre usó: admin > líder/pastor > secretaría ("gerente" no cuenta).
+    """
+    if is_superuser:
+        return "admin"
+    if any("admin" in g for g in nombres_grupos):
+        return "admin"
+    elif any("lider" in g or "pastor" in g for g in nombres_grupos):
+        return "lider"
+    elif any("secretar" in g for g in nombres_grupos):
+        return "secretaria"
+    return "usuario"
+
+
+class UserSnapshot:
+    """Lo que necesitamos saber del usuario en cada request."""
+
+    def __init__(self, rol, rol_home, grupos, permisos_usuario, permisos_grupo):
+        self.rol = rol
+        self.rol_home = rol_home
+        self.grupos = grupos                      # nombres tal como están en BD
+        self.permisos_usuario = permisos_usuario  # {"app_label.codename", ...}
+        self.permisos_grupo = permisos_grupo
+
+    @property
+    def permisos(self):
+        return self.permisos_usuario | self.permisos_grupo
+
+    @property
+    def app_labels_visibles(self):
+        """App labels donde el usuario tiene al menos un permiso view_*."""
+        return {
+            p.split(".", 1)[0] for p in self.permisos
+            if p.split(".", 1)[1].startswith("view_")
+        }
+
+
+def _key(user_id, version):
+    # "s2": formato del snapshot (con rol_home); los de antes no se leen
+    return f"soid:user_snapshot:s2:{user_id}:v{version}"
+
+
+def _version(user_id):
+    return (
+        VersionPermisosUsuario.objects.filter(usuario_id=user_id)
+        .values_list("version", flat=True)
+        .first()
+    ) or 0
+
+
+def _permisos(qs):
+    return {
+        f"{app_label}.{codename}"
+        for app_label, codename in qs.values_list("content_type__app_label", "codename")
+    }
+
+
+def _construir_snapshot(user):
+    grupos = list(user.groups.values_list("name", flat=True))
+    nombres = [g.lower() for g in grupos]
+    is_superuser = getattr(user, "is_superuser", False)
+    return UserSnapshot(
+        rol=calcular_rol(nombres, is_superuser),
+        rol_home=calcular_rol_home(nombres, is_superuser),
+        grupos=grupos,
+        permisos_usuario=_permisos(Permission.objects.filter(user=user)),
+        permisos_grupo=_permisos(Permission.objects.filter(group__user=user)),
+    )
+
+
+def get_user_snapshot(user):
+    """
+    Snapshot del usuario (request -> cache de Django -> BD).
+    Devuelve None para anónimos.
+    """
+    if not user or not getattr(user, "is_authenticated", False):
+        return None
+
+    def _cargar():
+        key = _key(user.pk, _version(user.pk))
+        snap = cache.get(key)
+        if snap is None:
+            snap = _construir_snapshot(user)
+            cache.set(key, snap, SNAPSHOT_TTL)
+        return snap
+
+    return request_memo(f"user_snapshot:{user.pk}", _cargar)
+
+
+def invalidar_usuarios(user_ids, crear=True):
+    """
+    Sube la versión de estos usuarios (en la transacción actual): los
+    snapshots anteriores dejan de leerse en todos los procesos y expiran por
+    TTL. crear=False para usuarios que se están borrando.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    VersionPermisosUsuario.objects.filter(usuario_id__in=user_ids).update(version=F("version") + 1)
+    if crear:
+        # Sin fila la versión leída era 0: nacer en 1 ya cambia la clave
+        VersionPermisosUsuario.objects.bulk_create(
+            [VersionPermisosUsuario(usuario_id=uid, version=1) for uid in user_ids],
+            ignore_conflicts=True,
+        )
+
+
+def invalidar_grupos(group_ids):
+    """Invalida a todos los usuarios que pertenecen a estos grupos."""
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    user_ids = list(User.objects.filter(groups__in=group_ids).values_list("pk", flat=True).distinct())
+    if user_ids:
+        invalidar_usuarios(user_ids)
+
+
+class SnapshotModelBackend(ModelBackend):
+    """
+    ModelBackend que lee los permisos del snapshot cacheado.
+    Así las cadenas de has_perm() no consultan la BD en cada request.
+    """
+
+    def get_user_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if user_obj.is_superuser:
+            return super().get_user_permissions(user_obj, obj)
+        return set(get_user_snapshot(user_obj).permisos_usuario)
+
+    def get_group_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if user_obj.is_superuser:
+            return super().get_group_permissions(user_obj, obj)
+        return set(get_user_snapshot(user_obj).permisos_grupo)
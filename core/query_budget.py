@@ -0,0 +1,169 @@
+# core/query_budget.py
+# Middleware opcional para medir SQL por request y detectar N+1.
+#
+# Por cada request muestreado registra: vista resuelta, nº de consultas,
+# tiempo total de SQL y SQL repetido (por huella normalizada). Emite una
+# línea de log JSON, añade la cabecera Server-Timing y avisa si la vista
+# supera su presupuesto de consultas.
+#
+# Se activa en settings.SOID_QUERY_BUDGET["ENABLED"]; si está apagado el
+# middleware se retira solo (MiddlewareNotUsed) y no cuesta nada.
+
+import hashlib
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger("soid.queries")
+
+DEFAULTS = {
+    "ENABLED": False,
+    "SAMPLE_RATE": 1.0,          # 0.0 - 1.0
+    "DEFAULT_BUDGET": 50,        # consultas por request
+    "VIEW_BUDGETS": {},          # {"finanzas_app:dashboard": 30, ...}
+    "DUPLICATE_THRESHOLD": 5,    # repeticiones de la misma huella = posible N+1
+    "SERVER_TIMING": True,
+}
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_RE_SPACES = re.compile(r"\s+")
+
+
+def get_config():
+    cfg = dict(DEFAULTS)
+    cfg.update(getattr(settings, "SOID_QUERY_BUDGET", {}) or {})
+    return cfg
+
+
+def fingerprint(sql):
+    """SQL normalizado: sin literales ni listas IN variables."""
+    sql = _RE_STRING.sub("?", sql)
+    sql = _RE_NUMBER.sub("?", sql)
+    sql = _RE_IN_LIST.sub("IN (...)", sql)
+    return _RE_SPACES.sub(" ", sql).strip()
+
+
+class _QueryRecorder:
+    """execute_wrapper que acumula conteo, tiempo y huellas."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - inicio
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+
+class QueryBudgetMiddleware:
+    """
+    Agregar a MIDDLEWARE en settings.py (lo más arriba posible para medir
+    también el resto de middlewares):
+        'core.query_budget.QueryBudgetMiddleware',
+    Funciona en WSGI y ASGI (no fuerza la cadena a sync_to_async).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = get_config()
+        if not self.config["ENABLED"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _instalar(self, recorder):
+        """Engancha el recorder a las conexiones del hilo actual."""
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(recorder))
+        return stack
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if random.random() >= self.config["SAMPLE_RATE"]:
+            return self.get_response(request)
+
+        recorder = _QueryRecorder()
+        inicio = time.perf_counter()
+        with self._instalar(recorder):
+            response = self.get_response(request)
+        total = time.perf_counter() - inicio
+
+        self._report(request, response, recorder, total)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.config["SAMPLE_RATE"]:
+            return await self.get_response(request)
+
+        recorder = _QueryRecorder()
+        inicio = time.perf_counter()
+        # Las conexiones son por hilo: el recorder se instala (y se retira)
+        # en el hilo donde corren el ORM y las vistas síncronas del request
+        stack = await sync_to_async(self._instalar)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        total = time.perf_counter() - inicio
+
+        self._report(request, response, recorder, total)
+        return response
+
+    def _report(self, request, response, recorder, total):
+        match = getattr(request, "resolver_match", None)
+        view_name = (match.view_name if match else None) or request.path
+
+        budget = self.config["VIEW_BUDGETS"].get(view_name, self.config["DEFAULT_BUDGET"])
+        umbral = self.config["DUPLICATE_THRESHOLD"]
+        duplicados = [
+            {"id": hashlib.md5(fp.encode(), usedforsecurity=False).hexdigest()[:8], "count": n, "sql": fp[:200]}
+            for fp, n in recorder.fingerprints.most_common()
+            if n >= umbral
+        ]
+        sobre_presupuesto = recorder.count > budget
+
+        if self.config["SERVER_TIMING"]:
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+                f"app;dur={(total - recorder.duration) * 1000:.1f}",
+            ])
+
+        data = {
+            "event": "request_queries",
+            "view": view_name,
+            "method": request.method,
+            "status": response.status_code,
+            "tenant": getattr(getattr(request, "tenant", None), "pk", None),
+            "queries": recorder.count,
+            "sql_ms": round(recorder.duration * 1000, 1),
+            "total_ms": round(total * 1000, 1),
+            "budget": budget,
+            "over_budget": sobre_presupuesto,
+            "duplicates": duplicados,
+        }
+        if sobre_presupuesto or duplicados:
+            logger.warning(json.dumps(data, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(data, ensure_ascii=False))
@@ -0,0 +1,68 @@
+# core/request_cache.py
+# Memoria local al request: se crea al entrar y se descarta al salir.
+# Fuera de un request (cron, comandos) no hay store y los helpers
+# simplemente no memorizan. El store vive en un ContextVar, así que cada
+# request tiene el suyo también bajo ASGI.
+
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+_store = contextvars.ContextVar("soid_request_store", default=None)
+
+
+def get_request_store():
+    """Devuelve el dict del request actual, o None si no hay request activo."""
+    return _store.get()
+
+
+def request_memo(key, factory):
+    """
+    Devuelve store[key]; si no existe lo calcula con factory() y lo guarda.
+    Sin request activo, solo llama a factory().
+    """
+    store = get_request_store()
+    if store is None:
+        return factory()
+    if key not in store:
+        store[key] = factory()
+    return store[key]
+
+
+def request_forget(key):
+    store = get_request_store()
+    if store is not None:
+        store.pop(key, None)
+
+
+class RequestCacheMiddleware:
+    """
+    Abre un store vacío por request.
+
+    Agregar a MIDDLEWARE en settings.py:
+        'core.request_cache.RequestCacheMiddleware',
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = _store.set({})
+        try:
+            return self.get_response(request)
+        finally:
+            _store.reset(token)
+
+    async def __acall__(self, request):
+        token = _store.set({})
+        try:
+            return await self.get_response(request)
+        finally:
+            _store.reset(token)
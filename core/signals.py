@@ -0,0 +1,97 @@
+# core/signals.py
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from .config_cache import invalidar_config
+from .models import ConfiguracionSistema, Module
+from .module_registry import module_registry
+from .permisos_cache import invalidar_usuarios, invalidar_grupos
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=ConfiguracionSistema)
+@receiver(post_delete, sender=ConfiguracionSistema)
+def configuracion_cambiada(sender, instance, raw=False, **kwargs):
+    """Cualquier cambio en la configuración invalida su cache."""
+    if not raw:
+        invalidar_config(instance.tenant_id)
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def modulo_cambiado(sender, instance, raw=False, **kwargs):
+    """Reconstruir el registro de módulos en el próximo acceso."""
+    if not raw:
+        module_registry.invalidate()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SNAPSHOT DE ROL / PERMISOS POR USUARIO
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_M2M_ACCIONES = ("post_add", "post_remove", "post_clear", "pre_clear")
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def usuario_grupos_cambiados(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in _M2M_ACCIONES:
+        return
+    if not reverse:
+        # user.groups.add(...)
+        invalidar_usuarios([instance.pk])
+    elif action == "pre_clear":
+        # group.user_set.clear(): después ya no sabremos quiénes eran
+        invalidar_grupos([instance.pk])
+    elif pk_set:
+        # group.user_set.add(...)
+        invalidar_usuarios(pk_set)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def usuario_permisos_cambiados(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in _M2M_ACCIONES:
+        return
+    if not reverse:
+        invalidar_usuarios([instance.pk])
+    elif action == "pre_clear":
+        invalidar_usuarios(instance.user_set.values_list("pk", flat=True))
+    elif pk_set:
+        invalidar_usuarios(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def grupo_permisos_cambiados(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in _M2M_ACCIONES:
+        return
+    if not reverse:
+        invalidar_grupos([instance.pk])
+    elif action == "pre_clear":
+        invalidar_grupos(instance.group_set.values_list("pk", flat=True))
+    elif pk_set:
+        invalidar_grupos(pk_set)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def grupo_cambiado(sender, instance, **kwargs):
+    """Renombrar o borrar un grupo puede cambiar el rol de sus usuarios."""
+    invalidar_grupos([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def usuario_cambiado(sender, instance, raw=False, **kwargs):
+    """is_superuser / is_active cambian rol y permisos."""
+    if raw:
+        return
+    invalidar_usuarios([instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def usuario_borrado(sender, instance, **kwargs):
+    # La fila de versión se borra en cascada; no volver a crearla
+    invalidar_usuarios([instance.pk], crear=False)
+
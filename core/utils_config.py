@@ -7,17 +7,17 @@ from .models import ConfiguracionSistema
 
 def get_config(tenant):
     """
-    Devuelve la instancia de configuración del tenant.
+    Devuelve la instancia de configuración del tenant (cacheada, solo lectura).
     
     Args:
-        tenant: Instancia del modelo Tenant
+        tenant: Instancia del modelo Tenant (o su id)
     
     Returns:
         ConfiguracionSistema del tenant (o None si no hay tenant)
     """
     if not tenant:
         return None
-    return ConfiguracionSistema.load(tenant)
+    return ConfiguracionSistema.cached(tenant)
 
 
 def get_edad_minima_miembro_oficial(tenant=None):
@@ -28,7 +28,7 @@ def get_edad_minima_miembro_oficial(tenant=None):
     2) Si no está definido o no hay tenant, usa el valor por defecto de settings
     
     Args:
-        tenant: Instancia del modelo Tenant (opcional)
+        tenant: Instancia del modelo Tenant o su id (opcional)
     """
     if tenant:
         cfg = get_config(tenant)
@@ -13,6 +13,8 @@ from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth.decorators import login_required
 from miembros_app.models import Miembro
 from .models import Module, ConfiguracionSistema
+from .module_registry import module_registry
+from .permisos_cache import get_user_snapshot
 from .forms import (
     ConfiguracionGeneralForm,
     ConfiguracionContactoForm,
@@ -573,18 +575,8 @@ def home(request):
         # ✅ PASAR TENANT AL REGISTRAR LOGIN
         UserLoginHistory.register_login(tenant, user, request)
         
-        # Determinar rol del usuario
-        rol = 'usuario'
-        if user.is_superuser:
-            rol = 'admin'
-        elif user.groups.filter(name__icontains='admin').exists():
-            rol = 'admin'
-        elif user.groups.filter(name__icontains='lider').exists():
-            rol = 'lider'
-        elif user.groups.filter(name__icontains='pastor').exists():
-            rol = 'lider'
-        elif user.groups.filter(name__icontains='secretar').exists():
-            rol = 'secretaria'
+        # Determinar rol del usuario (snapshot cacheado)
+        rol = get_user_snapshot(user).rol_home
         
         # ✅ Generar mensaje SOLO si es primer acceso del día
         welcome_data = WelcomeMessageService.get_welcome_message(
@@ -599,76 +591,22 @@ def home(request):
     # 📦 MÓDULOS
     # ═══════════════════════════════════════════════════════════════
     
+    # Registro de módulos cargado una vez por proceso
+    registro = module_registry.get()
+
     # Superuser ve todo
     if user.is_superuser:
-        modules = Module.objects.filter(is_enabled=True).order_by("order", "name")
         context = {
-            "modules": modules,
+            "modules": list(registro.modules),
         }
         return render(request, "core/home.html", context)
 
-    # Apps instalados (labels)
-    installed_labels = set(app.split(".")[-1] for app in settings.INSTALLED_APPS)
-
-    # Mapa para convertir Module.code -> app_label real de Django
-    APP_LABEL_MAP = {
-        "miembros": "miembros_app",
-        "nuevo_creyente": "nuevo_creyente_app",
-        "finanzas": "finanzas_app",
-        "estructura": "estructura_app",
-        "votacion": "votacion_app",
-        "notificaciones": "notificaciones_app",
-        "actualizacion_datos_miembros": "actualizacion_datos_miembros",
-        "actualizacion_datos": "actualizacion_datos_miembros",
-        "actualizacion": "actualizacion_datos_miembros",
-        "configuracion": "core",
-        "core": "core",
-    }
-
-    def normalize(code: str) -> str:
-        return (code or "").strip().lower().replace("-", "_").replace(" ", "_")
-
-    def resolve_app_label(module_code: str) -> str:
-        code = normalize(module_code)
-
-        if code in APP_LABEL_MAP:
-            return APP_LABEL_MAP[code]
-
-        if code in installed_labels:
-            return code
-
-        candidate = f"{code}_app"
-        if candidate in installed_labels:
-            return candidate
-
-        for lb in installed_labels:
-            if code and (code in lb or lb in code):
-                return lb
-
-        return code
-
-    # Módulos activos
-    active_modules = Module.objects.filter(is_enabled=True).order_by("order", "name")
-
-    # Permisos del usuario (directos + por grupos/roles)
-    user_perm_ids = set(user.user_permissions.values_list("id", flat=True))
-    group_perm_ids = set(Permission.objects.filter(group__user=user).values_list("id", flat=True))
-    all_perm_ids = user_perm_ids | group_perm_ids
-
     # App_labels donde el usuario tiene al menos un permiso de "ver"
-    allowed_app_labels = set(
-        Permission.objects.filter(
-            id__in=all_perm_ids,
-            codename__startswith="view_",
-        ).values_list("content_type__app_label", flat=True)
-    )
+    # (directos + por grupos/roles, desde el snapshot cacheado)
+    allowed_app_labels = get_user_snapshot(user).app_labels_visibles
 
     # Mostrar solo módulos permitidos
-    visible_modules = []
-    for m in active_modules:
-        app_label = resolve_app_label(m.code)
-        if app_label in allowed_app_labels:
-            visible_modules.append(m)
+    visible_modules = registro.visibles_para(allowed_app_labels)
 
     context = {
         "modules": visible_modules,
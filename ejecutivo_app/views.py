@@ -5,7 +5,7 @@ from django.contrib.auth.decorators import login_required
 from django.db.models import Q, Count, Sum
 from django.shortcuts import render
 from django.utils import timezone
-from miembros_app.views.utils import calcular_edad, porcentaje
+from miembros_app.views.utils import porcentaje
 from core.utils_config import get_edad_minima_miembro_oficial
 
 from miembros_app.models import Miembro
@@ -16,13 +16,6 @@ from finanzas_app.models import (
 )
 
 
-def _cutoff_nacimiento_por_edad(edad_minima: int, hoy: date) -> date:
-    try:
-        return hoy.replace(year=hoy.year - edad_minima)
-    except ValueError:
-        return hoy.replace(month=2, day=28, year=hoy.year - edad_minima)
-
-
 def _diagnostico_membresia(activos, pasivos, observacion, disciplina, catecumenos, descarriados, total):
     """
     Diagnóstico pastoral basado en la condición real de la membresía.
@@ -412,33 +405,30 @@ def inicio(request):
     # ============================================================
     # 1) CONTEO DE MEMBRESÍA OFICIAL
     # ============================================================
-    activos = pasivos = observacion = disciplina = catecumenos = 0
-
-    for m in miembros:
-        edad = calcular_edad(m.fecha_nacimiento)
-        if edad is None or edad < edad_minima:
-            continue
-        if m.nuevo_creyente:
-            continue
-        if not m.bautizado_confirmado:
-            catecumenos += 1
-            continue
-
-        if m.estado_miembro == "activo":
-            activos += 1
-        elif m.estado_miembro == "pasivo":
-            pasivos += 1
-        elif m.estado_miembro == "observacion":
-            observacion += 1
-        elif m.estado_miembro == "disciplina":
-            disciplina += 1
-
-    miembros_descarriados = Miembro.objects.filter(activo=False, razon_salida__isnull=False)
-    descarriados = sum(
-        1 for m in miembros_descarriados
-        if calcular_edad(m.fecha_nacimiento) is not None
-        and calcular_edad(m.fecha_nacimiento) >= edad_minima
-        and "descarri" in str(m.razon_salida).lower()
+    # Una sola consulta agregada: edad mínima como límite de fecha_nacimiento
+    bautizado = Q(bautizado_confirmado=True)
+    conteo = (
+        miembros.age_between(edad_minima, hoy=hoy)
+        .filter(nuevo_creyente=False)
+        .aggregate(
+            catecumenos=Count("id", filter=~bautizado),
+            activos=Count("id", filter=bautizado & Q(estado_miembro="activo")),
+            pasivos=Count("id", filter=bautizado & Q(estado_miembro="pasivo")),
+            observacion=Count("id", filter=bautizado & Q(estado_miembro="observacion")),
+            disciplina=Count("id", filter=bautizado & Q(estado_miembro="disciplina")),
+        )
+    )
+    activos = conteo["activos"]
+    pasivos = conteo["pasivos"]
+    observacion = conteo["observacion"]
+    disciplina = conteo["disciplina"]
+    catecumenos = conteo["catecumenos"]
+
+    descarriados = (
+        Miembro.objects
+        .filter(activo=False, razon_salida__nombre__icontains="descarri")
+        .age_between(edad_minima, hoy=hoy)
+        .count()
     )
 
     total_oficiales = activos + pasivos + observacion + disciplina + catecumenos
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estructura_app', '0019_remove_reporteunidadcierre_uniq_reporte_unidad_cierre_and_more'),
+        ('miembros_app', '0041_miembro_apodo'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unidadmembresia',
+            index=models.Index(fields=['tenant', 'unidad', 'activo'], name='membresia_tenant_unidad'),
+        ),
+    ]
@@ -449,6 +449,8 @@ class UnidadMembresia(models.Model):
         ]
         indexes = [
             models.Index(fields=["tenant"]),
+            # Miembros activos de una unidad
+            models.Index(fields=["tenant", "unidad", "activo"], name="membresia_tenant_unidad"),
         ]
 
     def __str__(self):
@@ -121,10 +121,13 @@ def _sincronizar_membresias_automaticas(unidad, tenant):
 
     hoy = timezone.localdate()
 
-    candidatos = Miembro.objects.filter(
-        tenant=tenant,
-        activo=True
-    ).order_by("nombres", "apellidos")
+    # El rango de edad se descarta en BD (edad desconocida no descalifica)
+    candidatos = (
+        Miembro.objects
+        .filter(tenant=tenant, activo=True)
+        .age_between(unidad.edad_min, unidad.edad_max, hoy=hoy, sin_fecha=True)
+        .order_by("nombres", "apellidos")
+    )
 
     ids_elegibles = set()
     for miembro in candidatos:
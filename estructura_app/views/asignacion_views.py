@@ -14,9 +14,9 @@ from estructura_app.view_helpers.common import _require_tenant
 from estructura_app.view_helpers.jerarquia import get_unidades_con_nivel
 from estructura_app.view_helpers.unidad_helpers import (
     _cumple_rango_edad,
-    _cumple_rango_edad_liderazgo,
     _get_edad_value,
     _genero_label,
+    _to_int_or_none,
 )
 
 
@@ -135,18 +135,21 @@ def asignacion_unidad_contexto(request):
         q &= ~Q(estado_miembro__iexact="descarriado")
         qs = qs.filter(q)
 
+    # Rango de edad en BD; edad desconocida no descalifica (igual que las reglas)
+    if rol_es_liderazgo:
+        qs = qs.age_between(
+            _to_int_or_none(reglas.get("lider_edad_min")),
+            _to_int_or_none(reglas.get("lider_edad_max")),
+            sin_fecha=True,
+        )
+    else:
+        qs = qs.age_between(unidad.edad_min, unidad.edad_max, sin_fecha=True)
+
     qs = qs.order_by("nombres", "apellidos")
 
     personas = []
 
     for p in qs:
-        if rol_es_liderazgo:
-            if not _cumple_rango_edad_liderazgo(p, reglas):
-                continue
-        else:
-            if not _cumple_rango_edad(p, unidad):
-                continue
-
         estado_raw = (p.estado_miembro or "").strip()
         es_nuevo = bool(getattr(p, "nuevo_creyente", False))
 
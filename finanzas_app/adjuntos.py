@@ -0,0 +1,290 @@
+# finanzas_app/adjuntos.py
+# Almacenamiento y procesamiento de AdjuntoMovimiento.
+#
+# Los comprobantes suelen ser fotos de celular (3-10 MB, con EXIF y a veces
+# GPS) que se guardaban tal cual y se mostraban a tamaño completo en los
+# listados. Ahora:
+#   1. En el request solo se calcula el SHA-256 del archivo (lectura por
+#      chunks) y se guarda en una ruta derivada del hash. Si el tenant ya
+#      tiene ese mismo archivo, el adjunto nuevo apunta al existente: no se
+#      vuelve a escribir en el storage y el usuario ve que es un duplicado.
+#   2. Después del commit, un hilo de fondo genera con Pillow la versión
+#      optimizada (WebP, o JPEG si Pillow no trae WebP) y la miniatura, ambas
+#      sin EXIF y con la orientación ya aplicada. El upload responde sin
+#      esperar a la recompresión.
+#   3. Los archivos se borran del storage solo cuando ningún adjunto los usa.
+# Si el proceso muere con trabajos en cola, `manage.py procesar_adjuntos`
+# retoma los que quedaron pendientes.
+
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+from .models import AdjuntoMovimiento
+
+logger = logging.getLogger(__name__)
+
+FORMATO_DERIVADOS = getattr(settings, "SOID_FINANZAS_ADJUNTOS_FORMATO", "WEBP")
+LADO_OPTIMIZADO = getattr(settings, "SOID_FINANZAS_ADJUNTOS_LADO_MAX", 1600)
+LADO_MINIATURA = getattr(settings, "SOID_FINANZAS_ADJUNTOS_LADO_MINIATURA", 320)
+CALIDAD_OPTIMIZADO = getattr(settings, "SOID_FINANZAS_ADJUNTOS_CALIDAD", 80)
+CALIDAD_MINIATURA = 70
+HILOS = getattr(settings, "SOID_FINANZAS_ADJUNTOS_HILOS", 2)
+# True = procesar en el mismo hilo (tests, scripts)
+SINCRONO = getattr(settings, "SOID_FINANZAS_ADJUNTOS_SINCRONO", False)
+
+EXTENSIONES_IMAGEN = ("jpg", "jpeg", "png", "gif", "webp")
+# GIF: solo miniatura (recomprimirlo perdería la animación)
+EXTENSIONES_OPTIMIZABLES = ("jpg", "jpeg", "png", "webp")
+
+CHUNK = 64 * 1024
+
+
+def extension_de(nombre):
+    return (nombre or "").rsplit(".", 1)[-1].lower() if "." in (nombre or "") else ""
+
+
+def hash_archivo(archivo):
+    """SHA-256 del archivo leído por chunks. Deja el puntero al inicio."""
+    h = hashlib.sha256()
+    archivo.seek(0)
+    for chunk in archivo.chunks(CHUNK) if hasattr(archivo, "chunks") else iter(lambda: archivo.read(CHUNK), b""):
+        h.update(chunk)
+    archivo.seek(0)
+    return h.hexdigest()
+
+
+def ruta_base(tenant_id, hash_contenido):
+    """finanzas/adjuntos/<tenant>/<ab>/<hash>: misma entrada, misma ruta."""
+    return f"finanzas/adjuntos/{tenant_id}/{hash_contenido[:2]}/{hash_contenido}"
+
+
+# =============================================================================
+# SUBIDA (hilo del request)
+# =============================================================================
+
+def guardar_adjunto(movimiento, archivo, usuario=None, tipo_mime=None):
+    """
+    Crea el AdjuntoMovimiento de `archivo` (UploadedFile ya validado).
+    Devuelve (adjunto, original) donde `original` es el adjunto existente
+    del tenant con el mismo contenido, o None si el archivo es nuevo.
+    """
+    hash_contenido = hash_archivo(archivo)
+    original = (
+        AdjuntoMovimiento.objects
+        .filter(movimiento__tenant_id=movimiento.tenant_id, hash_contenido=hash_contenido)
+        .order_by("pk")
+        .first()
+    )
+
+    adjunto = AdjuntoMovimiento(
+        movimiento=movimiento,
+        nombre_original=archivo.name,
+        tamaño=archivo.size,
+        tipo_mime=tipo_mime or getattr(archivo, "content_type", "") or "",
+        subido_por=usuario,
+        hash_contenido=hash_contenido,
+    )
+
+    if original is not None:
+        # ✅ Duplicado: se reutilizan el archivo y sus derivados
+        adjunto.archivo.name = original.archivo.name
+        adjunto.archivo_optimizado.name = original.archivo_optimizado.name
+        adjunto.miniatura.name = original.miniatura.name
+        adjunto.estado_proceso = original.estado_proceso
+    else:
+        storage = adjunto.archivo.storage
+        ext = extension_de(archivo.name)
+        nombre = ruta_base(movimiento.tenant_id, hash_contenido) + (f".{ext}" if ext else "")
+        if not storage.exists(nombre):
+            nombre = storage.save(nombre, archivo)
+        adjunto.archivo.name = nombre
+        if ext not in EXTENSIONES_IMAGEN:
+            adjunto.estado_proceso = AdjuntoMovimiento.PROCESO_NO_APLICA
+
+    adjunto.save()
+
+    if adjunto.estado_proceso in (AdjuntoMovimiento.PROCESO_PENDIENTE, AdjuntoMovimiento.PROCESO_ERROR):
+        programar(adjunto.pk)
+    return adjunto, original
+
+
+def eliminar_adjunto(adjunto):
+    """
+    Borra el adjunto y, de sus archivos, solo los que ningún otro adjunto
+    comparte (la deduplicación hace que varios apunten al mismo).
+    """
+    nombres = {
+        campo.name
+        for campo in (adjunto.archivo, adjunto.archivo_optimizado, adjunto.miniatura)
+        if campo
+    }
+    storage = adjunto.archivo.storage
+    with transaction.atomic():
+        adjunto.delete()
+        en_uso = set()
+        for campo in ("archivo", "archivo_optimizado", "miniatura"):
+            en_uso.update(
+                AdjuntoMovimiento.objects
+                .filter(**{f"{campo}__in": nombres})
+                .values_list(campo, flat=True)
+            )
+    for nombre in nombres - en_uso:
+        try:
+            storage.delete(nombre)
+        except Exception:
+            logger.warning("No se pudo borrar %s del storage", nombre, exc_info=True)
+
+
+# =============================================================================
+# PROCESAMIENTO EN SEGUNDO PLANO
+# =============================================================================
+
+_ejecutor = None
+_ejecutor_lock = threading.Lock()
+
+
+def _get_ejecutor():
+    global _ejecutor
+    if _ejecutor is None:
+        with _ejecutor_lock:
+            if _ejecutor is None:
+                _ejecutor = ThreadPoolExecutor(max_workers=HILOS, thread_name_prefix="soid-adjuntos")
+    return _ejecutor
+
+
+def programar(adjunto_id):
+    """Encola el procesamiento del adjunto para después del commit."""
+    if SINCRONO:
+        transaction.on_commit(lambda: procesar(adjunto_id))
+    else:
+        transaction.on_commit(lambda: _get_ejecutor().submit(_procesar_en_hilo, adjunto_id))
+
+
+def _procesar_en_hilo(adjunto_id):
+    close_old_connections()
+    try:
+        procesar(adjunto_id)
+    except Exception:
+        logger.exception("Error procesando adjunto %s", adjunto_id)
+    finally:
+        close_old_connections()
+
+
+def _preparar(img):
+    """Aplica la orientación EXIF y deja un modo que WebP/JPEG acepten."""
+    from PIL import ImageOps
+
+    img = ImageOps.exif_transpose(img)
+    transparente = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    if FORMATO_DERIVADOS == "WEBP" and transparente:
+        return img.convert("RGBA")
+    return img.convert("RGB")
+
+
+def _codificar(img, lado, calidad):
+    """Reduce a `lado` px (lado mayor) y codifica SIN metadatos."""
+    img = img.copy()
+    img.thumbnail((lado, lado))
+    buffer = io.BytesIO()
+    if FORMATO_DERIVADOS == "WEBP":
+        opciones = {"method": 4}
+    else:
+        opciones = {"optimize": True, "progressive": True}
+    # No se pasa exif= ni icc_profile=: Pillow no copia los metadatos del original
+    img.save(buffer, format=FORMATO_DERIVADOS, quality=calidad, **opciones)
+    return buffer.getvalue()
+
+
+def _guardar_derivado(storage, nombre, generar):
+    """Guarda el derivado si no existe ya (mismo hash = mismo derivado)."""
+    if storage.exists(nombre):
+        return nombre
+    return storage.save(nombre, ContentFile(generar()))
+
+
+def procesar(adjunto_id):
+    """
+    Genera versión optimizada y miniatura de un adjunto de imagen y las
+    asigna a TODOS los adjuntos del tenant con el mismo contenido.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    adjunto = (
+        AdjuntoMovimiento.objects
+        .select_related("movimiento")
+        .filter(pk=adjunto_id)
+        .first()
+    )
+    if adjunto is None or adjunto.estado_proceso in (
+        AdjuntoMovimiento.PROCESO_LISTO, AdjuntoMovimiento.PROCESO_NO_APLICA
+    ):
+        return adjunto
+
+    tenant_id = adjunto.movimiento.tenant_id
+    storage = adjunto.archivo.storage
+    ext = extension_de(adjunto.nombre_original)
+
+    if not adjunto.hash_contenido:
+        # Adjuntos anteriores a la deduplicación
+        with adjunto.archivo.open("rb") as f:
+            adjunto.hash_contenido = hash_archivo(f)
+        adjunto.save(update_fields=["hash_contenido"])
+
+    mismos = AdjuntoMovimiento.objects.filter(
+        movimiento__tenant_id=tenant_id, hash_contenido=adjunto.hash_contenido
+    )
+
+    if ext not in EXTENSIONES_IMAGEN:
+        mismos.update(estado_proceso=AdjuntoMovimiento.PROCESO_NO_APLICA)
+        adjunto.estado_proceso = AdjuntoMovimiento.PROCESO_NO_APLICA
+        return adjunto
+
+    sufijo = "jpg" if FORMATO_DERIVADOS == "JPEG" else FORMATO_DERIVADOS.lower()
+    base = ruta_base(tenant_id, adjunto.hash_contenido)
+
+    try:
+        with adjunto.archivo.open("rb") as f:
+            img = Image.open(f)
+            # JPEG: decodificar ya reducido (mucho más rápido en fotos grandes)
+            img.draft("RGB", (LADO_OPTIMIZADO, LADO_OPTIMIZADO))
+            img = _preparar(img)
+
+        optimizado = ""
+        if ext in EXTENSIONES_OPTIMIZABLES:
+            optimizado = _guardar_derivado(
+                storage, f"{base}.opt.{sufijo}",
+                lambda: _codificar(img, LADO_OPTIMIZADO, CALIDAD_OPTIMIZADO),
+            )
+        miniatura = _guardar_derivado(
+            storage, f"{base}.min.{sufijo}",
+            lambda: _codificar(img, LADO_MINIATURA, CALIDAD_MINIATURA),
+        )
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        logger.warning("Adjunto %s no es una imagen procesable", adjunto_id, exc_info=True)
+        mismos.update(estado_proceso=AdjuntoMovimiento.PROCESO_ERROR)
+        adjunto.estado_proceso = AdjuntoMovimiento.PROCESO_ERROR
+        return adjunto
+
+    mismos.update(
+        archivo_optimizado=optimizado,
+        miniatura=miniatura,
+        estado_proceso=AdjuntoMovimiento.PROCESO_LISTO,
+    )
+    adjunto.archivo_optimizado.name = optimizado
+    adjunto.miniatura.name = miniatura
+    adjunto.estado_proceso = AdjuntoMovimiento.PROCESO_LISTO
+    return adjunto
+
+
+def pendientes():
+    """Adjuntos cuyo procesamiento no terminó (para el comando de reintento)."""
+    return AdjuntoMovimiento.objects.filter(
+        estado_proceso=AdjuntoMovimiento.PROCESO_PENDIENTE
+    ).order_by("pk")
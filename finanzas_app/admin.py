@@ -35,11 +35,14 @@ class MovimientoFinancieroAdmin(admin.ModelAdmin):
 
 @admin.register(AdjuntoMovimiento)
 class AdjuntoMovimientoAdmin(admin.ModelAdmin):
-    list_display = ("nombre_original", "movimiento", "tamaño_formateado", "subido_por", "subido_en")
-    list_filter = ("subido_en", "tipo_mime")
-    search_fields = ("nombre_original", "movimiento__descripcion")
+    list_display = ("nombre_original", "movimiento", "tamaño_formateado", "estado_proceso", "subido_por", "subido_en")
+    list_filter = ("subido_en", "tipo_mime", "estado_proceso")
+    search_fields = ("nombre_original", "movimiento__descripcion", "hash_contenido")
     date_hierarchy = "subido_en"
-    readonly_fields = ("tamaño", "tipo_mime", "subido_por", "subido_en")
+    readonly_fields = (
+        "tamaño", "tipo_mime", "subido_por", "subido_en",
+        "hash_contenido", "archivo_optimizado", "miniatura", "estado_proceso",
+    )
 
 @admin.register(CasillaF001)
 class CasillaF001Admin(admin.ModelAdmin):
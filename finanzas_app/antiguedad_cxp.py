@@ -0,0 +1,150 @@
+# finanzas_app/antiguedad_cxp.py
+# Antigüedad de saldos de Cuentas por Pagar calculada en la BD.
+#
+# Los reportes de aging/vencidas traían todas las CxP abiertas y las
+# clasificaban en Python (dos pasadas, una consulta de proveedor por fila).
+# Aquí el tramo se anota con Case/When comparando la fecha de referencia
+# (vencimiento, o emisión si no tiene) contra fechas de corte calculadas a
+# partir de hoy, y los saldos (monto_total - monto_pagado) se suman con
+# GROUP BY proveedor, tramo: una consulta, sin importar cuántas CxP tenga
+# cada proveedor. El detalle de un tramo se consulta solo cuando se pide.
+
+import datetime
+from decimal import Decimal
+
+from django.db.models import (
+    Case,
+    CharField,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+
+from .models import CuentaPorPagar
+
+CERO = Decimal("0")
+
+# (clave, etiqueta, días máximos de atraso). None = sin tope.
+TRAMOS = [
+    ("corriente", "Corriente (no vencido)", 0),
+    ("0_30", "1-30 días", 30),
+    ("31_60", "31-60 días", 60),
+    ("61_90", "61-90 días", 90),
+    ("mas_90", "Más de 90 días", None),
+]
+CLAVES_TRAMOS = [clave for clave, _, _ in TRAMOS]
+
+ESTADOS_CERRADOS = ("pagada", "cancelada")
+
+_PENDIENTE = ExpressionWrapper(
+    F("monto_total") - F("monto_pagado"),
+    output_field=DecimalField(max_digits=14, decimal_places=2),
+)
+
+
+def cxp_abiertas(tenant):
+    """CxP del tenant que no están pagadas ni canceladas."""
+    return CuentaPorPagar.objects.filter(tenant=tenant).exclude(estado__in=ESTADOS_CERRADOS)
+
+
+def anotar(qs, hoy):
+    """
+    Anota `fecha_ref`, `pendiente` y `tramo` (clave de TRAMOS).
+    Atraso <= N días  <=>  fecha_ref >= hoy - N, así que no hace falta
+    aritmética de fechas propia de cada motor.
+    """
+    cortes = [
+        When(fecha_ref__gte=hoy - datetime.timedelta(days=maximo), then=Value(clave))
+        for clave, _, maximo in TRAMOS
+        if maximo is not None
+    ]
+    return qs.annotate(
+        fecha_ref=Coalesce("fecha_vencimiento", "fecha_emision"),
+        pendiente=_PENDIENTE,
+    ).annotate(
+        tramo=Case(*cortes, default=Value("mas_90"), output_field=CharField()),
+    )
+
+
+def aging(qs, hoy):
+    """
+    (rangos, proveedores, total_general) con los saldos pendientes > 0 de `qs`:
+      - rangos: {clave: {"label", "total", "cantidad", "porcentaje"}}
+      - proveedores: [{"proveedor_id", "nombre", <clave>: total, "total"}]
+        de mayor a menor saldo.
+    """
+    filas = (
+        anotar(qs, hoy)
+        .filter(pendiente__gt=0)
+        .values("proveedor_id", "proveedor__nombre", "tramo")
+        .annotate(suma=Sum("pendiente"), num_cxp=Count("id"))
+        .order_by()
+    )
+
+    rangos = {
+        clave: {"label": etiqueta, "total": CERO, "cantidad": 0, "porcentaje": CERO}
+        for clave, etiqueta, _ in TRAMOS
+    }
+    proveedores = {}
+    for f in filas:
+        suma = f["suma"] or CERO
+        rangos[f["tramo"]]["total"] += suma
+        rangos[f["tramo"]]["cantidad"] += f["num_cxp"]
+
+        fila = proveedores.get(f["proveedor_id"])
+        if fila is None:
+            fila = proveedores[f["proveedor_id"]] = {
+                "proveedor_id": f["proveedor_id"],
+                "nombre": f["proveedor__nombre"] or "Sin proveedor",
+                "total": CERO,
+                **{clave: CERO for clave in CLAVES_TRAMOS},
+            }
+        fila[f["tramo"]] += suma
+        fila["total"] += suma
+
+    total_general = sum((r["total"] for r in rangos.values()), CERO)
+    if total_general > 0:
+        for r in rangos.values():
+            r["porcentaje"] = r["total"] / total_general * 100
+
+    return rangos, sorted(proveedores.values(), key=lambda p: p["total"], reverse=True), total_general
+
+
+def detalle_tramo(qs, hoy, tramo):
+    """CxP con saldo de un tramo, con `dias` de atraso. Se evalúa solo al pedirla."""
+    items = (
+        anotar(qs, hoy)
+        .filter(pendiente__gt=0, tramo=tramo)
+        .select_related("proveedor", "categoria")
+        .order_by("fecha_ref", "pk")
+    )
+    for item in items:
+        item.dias = (hoy - item.fecha_ref).days
+        yield item
+
+
+def totales(qs, **grupos):
+    """
+    Conteo y sumas (monto_total y pendiente) de varios subconjuntos de `qs`
+    en UNA consulta. grupos = {nombre: Q()}.
+    Devuelve {nombre: {"cantidad", "monto", "pendiente"}}.
+    """
+    agregados = {}
+    for nombre, filtro in grupos.items():
+        agregados[f"{nombre}_num"] = Count("id", filter=filtro)
+        agregados[f"{nombre}_monto"] = Sum("monto_total", filter=filtro)
+        agregados[f"{nombre}_pendiente"] = Sum(_PENDIENTE, filter=filtro)
+    fila = qs.aggregate(**agregados)
+    return {
+        nombre: {
+            "cantidad": fila[f"{nombre}_num"],
+            "monto": fila[f"{nombre}_monto"] or CERO,
+            "pendiente": fila[f"{nombre}_pendiente"] or CERO,
+        }
+        for nombre in grupos
+    }
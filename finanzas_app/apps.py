@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FinanzasAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'finanzas_app'
+
+    def ready(self):
+        import finanzas_app.signals  # noqa: F401
@@ -0,0 +1,117 @@
+# finanzas_app/cache_reportes.py
+# Cache de resultados de los reportes de Finanzas.
+#
+# La tesorería reabre el mismo mes/año muchas veces y los datos cambian
+# poco. Cada reporte guarda en el cache de Django SOLO sus datos calculados
+# (totales, filas), no el HTML: el HTML lleva usuario, CSRF y mensajes.
+#
+# Clave: (tenant, reporte, GET normalizado, versión del libro, fecha de hoy)
+#   - La versión del libro (VersionLibroFinanzas) sube en la misma
+#     transacción que cualquier escritura de movimientos/CxP/catálogos, así
+#     que un reporte nunca se sirve con datos anteriores al último commit.
+#   - La fecha entra porque varios reportes usan "hoy" como valor por defecto
+#     (mes actual, vencimientos).
+# Las entradas de versiones viejas no se borran: expiran por TTL.
+#
+# Funciona con cualquier backend (LocMem, archivo, BD, Redis): la versión se
+# lee de la BD, y los datos son tipos simples (dict/list/Decimal/date).
+
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.request_cache import request_forget, request_memo
+
+from .models import VersionLibroFinanzas
+
+REPORTES_CACHE_TTL = getattr(settings, "SOID_REPORTES_CACHE_TTL", 3600)
+
+# Parámetros que no cambian los datos del reporte
+PARAMS_IGNORADOS = {"print"}
+
+
+def _tenant_id(tenant):
+    return getattr(tenant, "pk", tenant)
+
+
+def _memo_key(tenant_id):
+    return f"fin_libro:{tenant_id}"
+
+
+def estado_libro(tenant):
+    """(versión, actualizado_en) del libro del tenant. Una consulta por request."""
+    tenant_id = _tenant_id(tenant)
+
+    def cargar():
+        fila = (
+            VersionLibroFinanzas.objects.filter(tenant_id=tenant_id)
+            .values_list("version", "actualizado_en")
+            .first()
+        )
+        return fila or (0, None)
+
+    return request_memo(_memo_key(tenant_id), cargar)
+
+
+def version_libro(tenant):
+    return estado_libro(tenant)[0]
+
+
+def tocar_libro(tenant):
+    """
+    Sube la versión del libro. Llamar dentro de la transacción que escribe:
+    la versión nueva se confirma junto con los datos.
+    """
+    tenant_id = _tenant_id(tenant)
+    ahora = timezone.now()
+    cambios = {"version": F("version") + 1, "actualizado_en": ahora}
+
+    if not VersionLibroFinanzas.objects.filter(tenant_id=tenant_id).update(**cambios):
+        try:
+            with transaction.atomic():
+                VersionLibroFinanzas.objects.create(tenant_id=tenant_id, version=1, actualizado_en=ahora)
+        except IntegrityError:
+            # Otra transacción creó la fila entre el update y el create
+            VersionLibroFinanzas.objects.filter(tenant_id=tenant_id).update(**cambios)
+    request_forget(_memo_key(tenant_id))
+
+
+def normalizar_params(params):
+    """QueryDict -> querystring ordenado, sin vacíos ni parámetros ignorados."""
+    pares = sorted(
+        (k, v.strip())
+        for k in params
+        if k not in PARAMS_IGNORADOS
+        for v in params.getlist(k)
+        if v and v.strip()
+    )
+    return urlencode(pares)
+
+
+def _clave(tenant_id, reporte, params, version):
+    firma = hashlib.md5(
+        f"{normalizar_params(params)}|{timezone.localdate().isoformat()}".encode(),
+        usedforsecurity=False,
+    ).hexdigest()
+    return f"soid:fin_reporte:{tenant_id}:{reporte}:v{version}:{firma}"
+
+
+def reporte_cacheado(request, reporte, calcular):
+    """
+    Devuelve los datos del reporte desde el cache, o los calcula con
+    calcular() (sin argumentos; debe devolver datos serializables con pickle)
+    y los guarda.
+    """
+    tenant_id = _tenant_id(request.tenant)
+    clave = _clave(tenant_id, reporte, request.GET, version_libro(tenant_id))
+
+    datos = cache.get(clave)
+    if datos is None:
+        datos = calcular()
+        cache.set(clave, datos, REPORTES_CACHE_TTL)
+    return datos
@@ -0,0 +1,252 @@
+# finanzas_app/f001.py
+# Informe F.001 (Concilio) precalculado por tenant y mes.
+#
+# El reporte recalculaba todas las casillas desde los movimientos cada vez
+# que se abría o imprimía, incluso para meses ya entregados. Ahora los
+# valores viven en InformeF001Periodo:
+#   - Se calculan la primera vez que se piden, desde el resumen mensual
+#     (ResumenMensualMovimiento, una consulta agrupada por casilla).
+#   - finanzas_app.ledger marca el periodo `desactualizado` cuando cambia un
+#     movimiento de ese mes; solo entonces se recalcula al volver a pedirlo.
+#   - Al cerrar el mes el periodo queda congelado: se imprime con los
+#     valores del cierre aunque después se toque el libro (el reporte avisa).
+# Los montos se guardan como texto en un JSONField para no perder decimales.
+
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import InformeF001Periodo, ResumenMensualMovimiento
+
+CERO = Decimal("0.00")
+
+MESES = [
+    "", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+]
+
+# Sección del informe -> {clave del template: código de CasillaF001}
+CASILLAS = {
+    "ingresos": {
+        "diezmos": "ING_DIEZMOS",
+        "ofrendas_voluntarias": "ING_OFRENDA_VOL",
+        "ofrendas_especiales": "ING_OFRENDA_ESP",
+        "otras_ofrendas": "ING_OTRAS_OFR",
+        "otros_ingresos": "ING_OTROS",
+        "ayudas_concilio": "ING_AYUDA_CONCILIO",
+        "ofrendas_exterior": "ING_EXTERIOR",
+    },
+    "ministerios": {
+        "femenil": "MIN_FEMENIL",
+        "hombres_honor": "MIN_HOMBRES",
+        "embajadores": "MIN_EMBAJADORES",
+        "escuela_biblica": "MIN_ESC_BIBLICA",
+        "misioneritas": "MIN_MISIONERITAS",
+        "exploradores": "MIN_EXPLORADORES",
+        "mda": "MIN_MDA",
+        "misiones": "MIN_MISIONES",
+        "otros": "MIN_OTROS",
+    },
+    "egresos": {
+        "asignacion_pastoral": "EGR_ASIG_PASTORAL",
+        "alquileres": "EGR_ALQUILER",
+        "evangelismo_misiones": "EGR_EVANGELISMO",
+        "servicios_basicos": "EGR_SERVICIOS",
+        "ayuda_capillas": "EGR_CAPILLAS",
+        "ayuda_necesitados": "EGR_NECESITADOS",
+        "mantenimientos": "EGR_MANTENIMIENTO",
+        "apoyo_ministerios": "EGR_APOYO_MIN",
+        "otras_salidas": "EGR_OTRAS",
+    },
+    # Ministerios Locales a Nacionales (códigos: ENV_MIN_*)
+    "envios_min": {
+        "femenil": "ENV_MIN_FEMENIL",
+        "hombres_honor": "ENV_MIN_HOMBRES",
+        "embajadores": "ENV_MIN_EMBAJADORES",
+        "escuela_biblica": "ENV_MIN_ESC_BIBLICA",
+        "misioneritas": "ENV_MIN_MISIONERITAS",
+        "misioneros": "ENV_MIN_MISIONEROS",
+        "exploradores": "ENV_MIN_EXPLORADORES",
+        "mda": "ENV_MIN_MDA",
+        "misiones": "ENV_MIN_MISIONES",
+        "otros": "ENV_MIN_OTROS",
+    },
+    # Aportes Especiales (códigos: A_*)
+    "aportes": {
+        "evangelismo": "A_EVANGELISMO",
+        "desead": "A_DESEAD",
+        "plantacion": "A_PLANTACION",
+        "misioneros": "A_MISIONEROS",
+        "huerfanos": "A_HUERFANOS",
+        "envejecientes": "A_ENVEJECIENTES",
+        "grupos_vulnerables": "A_VULNERABLES",
+        "sordos": "A_SORDOS",
+        "desarrollo_concilio": "A_DESARROLLO",
+    },
+}
+
+SECCIONES = ("ingresos", "ministerios", "egresos", "envios", "envios_min", "aportes", "totales")
+
+
+# =============================================================================
+# CÁLCULO
+# =============================================================================
+
+def totales_por_casilla(tenant, anio, mes):
+    """{codigo_casilla: total} del mes, sin anulados ni transferencias."""
+    filas = (
+        ResumenMensualMovimiento.objects
+        .filter(
+            tenant=tenant,
+            anio=anio,
+            mes=mes,
+            es_transferencia=False,
+            categoria__casilla_f001__isnull=False,
+        )
+        .values("categoria__casilla_f001__codigo")
+        .annotate(suma=Sum("total"))
+        .order_by()
+    )
+    return {f["categoria__casilla_f001__codigo"]: f["suma"] or CERO for f in filas}
+
+
+def calcular(tenant, anio, mes):
+    """Todas las secciones del F.001 del mes: {seccion: {clave: Decimal}}."""
+    por_casilla = totales_por_casilla(tenant, anio, mes)
+
+    def v(codigo):
+        return por_casilla.get(codigo, CERO)
+
+    datos = {
+        seccion: {clave: v(codigo) for clave, codigo in casillas.items()}
+        for seccion, casillas in CASILLAS.items()
+    }
+    ingresos, ministerios, egresos = datos["ingresos"], datos["ministerios"], datos["egresos"]
+
+    total_ing_iglesia = sum(ingresos.values(), CERO)
+    total_ing_min = sum(ministerios.values(), CERO)
+    total_egresos = sum(egresos.values(), CERO)
+    total_ingresos = total_ing_iglesia + total_ing_min
+    asig_past = egresos["asignacion_pastoral"]
+
+    # SECCIÓN C: envíos de la Iglesia a la Oficina Nacional (CALCULADOS)
+    base_diezmo_iglesia = max(total_ingresos - asig_past, CERO)
+    datos["envios"] = {
+        "diezmo_iglesia": base_diezmo_iglesia * Decimal("0.10"),
+        "instituto_biblico": total_ingresos * Decimal("0.03"),
+        "educacion_cristiana": total_ingresos * Decimal("0.01"),
+        "pension_jubilacion": total_ingresos * Decimal("0.01"),
+        "diezmo_asignacion": asig_past * Decimal("0.10"),
+        "diezmo_pastor_otro": CERO,
+        "diezmo_conyuge": CERO,
+        "cotizacion_pastor": asig_past * Decimal("0.05"),
+    }
+
+    subtotal_envios_iglesia = sum(datos["envios"].values(), CERO)
+    subtotal_envios_ministerios = sum(datos["envios_min"].values(), CERO)
+    subtotal_aportes = sum(datos["aportes"].values(), CERO)
+
+    datos["totales"] = {
+        "total_ingresos_iglesia": total_ing_iglesia,
+        "total_ingresos_ministerios": total_ing_min,
+        "total_egresos": total_egresos,
+        "subtotal_envios_iglesia": subtotal_envios_iglesia,
+        "subtotal_envios_ministerios": subtotal_envios_ministerios,
+        "subtotal_aportes": subtotal_aportes,
+        # TOTAL ENVÍO (solo sección C por ahora)
+        "total_envio_cyd": subtotal_envios_iglesia + subtotal_envios_ministerios + subtotal_aportes,
+    }
+    return datos
+
+
+def _a_texto(datos):
+    return {seccion: {k: str(v) for k, v in valores.items()} for seccion, valores in datos.items()}
+
+
+def valores(informe):
+    """Secciones del informe guardado, con los montos de vuelta a Decimal."""
+    return {
+        seccion: {k: Decimal(v) for k, v in informe.valores.get(seccion, {}).items()}
+        for seccion in SECCIONES
+    }
+
+
+# =============================================================================
+# PERIODOS
+# =============================================================================
+
+def _recalcular(informe):
+    informe.valores = _a_texto(calcular(informe.tenant_id, informe.anio, informe.mes))
+    informe.desactualizado = False
+    informe.save(update_fields=["valores", "desactualizado", "calculado_en"])
+    return informe
+
+
+def obtener(tenant, anio, mes):
+    """
+    Informe del periodo, calculándolo solo si no existe o quedó
+    desactualizado (y no está cerrado).
+    """
+    tenant_id = getattr(tenant, "pk", tenant)
+    informe = InformeF001Periodo.objects.filter(tenant_id=tenant_id, anio=anio, mes=mes).first()
+    if informe is not None and (informe.cerrado or not informe.desactualizado):
+        return informe
+
+    with transaction.atomic():
+        if informe is None:
+            try:
+                with transaction.atomic():
+                    informe = InformeF001Periodo.objects.create(
+                        tenant_id=tenant_id, anio=anio, mes=mes, desactualizado=True
+                    )
+            except IntegrityError:
+                # Otro request lo creó al mismo tiempo
+                pass
+        # El bloqueo ordena el recálculo con los movimientos que marcan el periodo
+        informe = InformeF001Periodo.objects.select_for_update().get(
+            tenant_id=tenant_id, anio=anio, mes=mes
+        )
+        if informe.cerrado or not informe.desactualizado:
+            return informe
+        return _recalcular(informe)
+
+
+@transaction.atomic
+def cerrar(tenant, anio, mes, usuario=None):
+    """
+    Recalcula el periodo con el libro actual y lo congela. Si ya estaba
+    cerrado se devuelve intacto: cambiar un cierre exige reabrir() antes.
+    """
+    tenant_id = getattr(tenant, "pk", tenant)
+    informe, _ = InformeF001Periodo.objects.select_for_update().get_or_create(
+        tenant_id=tenant_id, anio=anio, mes=mes
+    )
+    if informe.cerrado:
+        return informe
+    _recalcular(informe)
+    informe.cerrado = True
+    informe.cerrado_en = timezone.now()
+    informe.cerrado_por = usuario
+    informe.save(update_fields=["cerrado", "cerrado_en", "cerrado_por"])
+    return informe
+
+
+def reabrir(tenant, anio, mes):
+    """Descongela el periodo; se recalcula la próxima vez que se pida."""
+    tenant_id = getattr(tenant, "pk", tenant)
+    return InformeF001Periodo.objects.filter(tenant_id=tenant_id, anio=anio, mes=mes).update(
+        cerrado=False, cerrado_en=None, cerrado_por=None, desactualizado=True
+    )
+
+
+def invalidar_abiertos(tenant_id=None):
+    """
+    Marca desactualizados los periodos abiertos (todos o de un tenant).
+    Para cambios que no son de un mes concreto: casillas de las categorías.
+    """
+    qs = InformeF001Periodo.objects.filter(cerrado=False, desactualizado=False)
+    if tenant_id is not None:
+        qs = qs.filter(tenant_id=tenant_id)
+    return qs.update(desactualizado=True)
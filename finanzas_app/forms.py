@@ -1,4 +1,5 @@
 from django import forms
+from django.conf import settings
 from decimal import Decimal, InvalidOperation
 
 from miembros_app.models import Miembro  # 👈 IMPORTAMOS MIEMBRO
@@ -11,6 +12,7 @@ from .models import (
     ProveedorFinanciero,
     CuentaPorPagar,
 )
+from .importacion import formato_de
 import re
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -676,21 +678,9 @@ class TransferenciaForm(forms.Form):
 
         # Validar saldo disponible en cuenta origen
         if cuenta_origen and monto:
-            from django.db.models import Sum, Q
-            from .models import MovimientoFinanciero
-            
-            # Calcular saldo de la cuenta - FILTRAR POR TENANT
-            qs_movs = MovimientoFinanciero.objects.filter(cuenta=cuenta_origen)
-            if self.tenant:
-                qs_movs = qs_movs.filter(tenant=self.tenant)
-            
-            movs = qs_movs.exclude(estado="anulado").aggregate(
-                ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-                egresos=Sum("monto", filter=Q(tipo="egreso")),
-            )
-            ingresos = movs.get("ingresos") or Decimal("0")
-            egresos = movs.get("egresos") or Decimal("0")
-            saldo = cuenta_origen.saldo_inicial + ingresos - egresos
+            # Saldo materializado (finanzas_app.ledger). La validación
+            # definitiva se repite con la cuenta bloqueada en TransferenciaService
+            saldo = cuenta_origen.saldo_actual
 
             if monto > saldo:
                 raise forms.ValidationError(
@@ -700,6 +690,96 @@ class TransferenciaForm(forms.Form):
         
         return cleaned_data
     
+# ==========================================================
+# IMPORTACIÓN DE EXTRACTOS BANCARIOS
+# ==========================================================
+
+class ImportarExtractoForm(forms.Form):
+    """
+    Archivo CSV/XLSX de un extracto bancario + cuenta destino, categorías por
+    defecto y mapeo opcional de columnas (vacío = detectar por el encabezado).
+    """
+    archivo = forms.FileField(
+        label="Archivo del extracto",
+        help_text="CSV o Excel (.xlsx) con una fila de encabezados.",
+        widget=forms.ClearableFileInput(attrs={"accept": ".csv,.xlsx"}),
+    )
+    cuenta = forms.ModelChoiceField(
+        queryset=CuentaFinanciera.objects.none(),  # 👈 Se filtra en __init__
+        label="Cuenta",
+        help_text="Cuenta bancaria a la que pertenece el extracto",
+    )
+    categoria_ingreso = forms.ModelChoiceField(
+        queryset=CategoriaMovimiento.objects.none(),
+        required=False,
+        label="Categoría para créditos",
+        help_text="Se usa cuando el archivo no trae columna de categoría",
+    )
+    categoria_egreso = forms.ModelChoiceField(
+        queryset=CategoriaMovimiento.objects.none(),
+        required=False,
+        label="Categoría para débitos",
+        help_text="Se usa cuando el archivo no trae columna de categoría",
+    )
+
+    # Mapeo de columnas (nombre del encabezado en el archivo)
+    columna_fecha = forms.CharField(max_length=100, required=False, label="Columna fecha")
+    columna_monto = forms.CharField(
+        max_length=100, required=False, label="Columna monto",
+        help_text="Positivo = crédito, negativo = débito",
+    )
+    columna_debito = forms.CharField(max_length=100, required=False, label="Columna débito")
+    columna_credito = forms.CharField(max_length=100, required=False, label="Columna crédito")
+    columna_referencia = forms.CharField(max_length=100, required=False, label="Columna referencia")
+    columna_descripcion = forms.CharField(max_length=100, required=False, label="Columna descripción")
+    columna_categoria = forms.CharField(
+        max_length=100, required=False, label="Columna categoría",
+        help_text="Código o nombre de la categoría",
+    )
+
+    simulacion = forms.BooleanField(
+        required=False,
+        initial=True,
+        label="Solo vista previa",
+        help_text="Revisa el resultado sin guardar nada",
+    )
+
+    CAMPOS_MAPEO = ("fecha", "monto", "debito", "credito", "referencia", "descripcion", "categoria")
+
+    def __init__(self, *args, **kwargs):
+        self.tenant = kwargs.pop("tenant", None)
+        super().__init__(*args, **kwargs)
+
+        # 👈 FILTRAR POR TENANT
+        qs_cuentas = CuentaFinanciera.objects.filter(esta_activa=True)
+        qs_categorias = CategoriaMovimiento.objects.filter(activo=True)
+        if self.tenant:
+            qs_cuentas = qs_cuentas.filter(tenant=self.tenant)
+            qs_categorias = qs_categorias.filter(tenant=self.tenant)
+
+        self.fields["cuenta"].queryset = qs_cuentas.order_by("nombre")
+        self.fields["categoria_ingreso"].queryset = qs_categorias.filter(tipo="ingreso").order_by("nombre")
+        self.fields["categoria_egreso"].queryset = qs_categorias.filter(tipo="egreso").order_by("nombre")
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data["archivo"]
+        if not formato_de(archivo.name):
+            raise ValidationError("Formato no soportado. Usa un archivo .csv o .xlsx.")
+
+        limite_mb = getattr(settings, "SOID_FINANZAS_IMPORT_MAX_MB", 20)
+        if archivo.size > limite_mb * 1024 * 1024:
+            raise ValidationError(f"El archivo supera el máximo de {limite_mb} MB.")
+        return archivo
+
+    def mapeo(self):
+        """{campo: nombre de columna} con los campos que el usuario indicó."""
+        return {
+            campo: self.cleaned_data[f"columna_{campo}"].strip()
+            for campo in self.CAMPOS_MAPEO
+            if self.cleaned_data.get(f"columna_{campo}", "").strip()
+        }
+
+
 # ==========================================================
 # CUENTAS POR PAGAR (CxP) – FORMS
 # ==========================================================
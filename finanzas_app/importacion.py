@@ -0,0 +1,434 @@
+# finanzas_app/importacion.py
+# Importación de extractos bancarios (CSV / XLSX) a MovimientoFinanciero.
+#
+# El archivo se lee fila a fila (csv.reader sobre el stream subido, openpyxl
+# en modo read_only), nunca completo en memoria, y se procesa por lotes de
+# IMPORTACION_LOTE filas:
+#   1. Validar y convertir cada fila en un movimiento (sin guardar).
+#   2. Descartar duplicados por huella (fecha, tipo, monto, referencia),
+#      contando ocurrencias: si la cuenta ya tenía N movimientos con esa
+#      huella, se omiten las N primeras filas del archivo que la repiten y el
+#      resto se importa (dos depósitos iguales el mismo día sin referencia son
+#      dos movimientos). Una consulta por lote sobre mov_tenant_cuenta_huella.
+#   3. En UNA transacción por lote: bulk_create, resumen mensual y saldo de
+#      la cuenta (ledger.registrar_lote) y versión del libro.
+# En modo simulación (vista previa) se hacen 1 y 2 y no se escribe nada.
+
+import csv
+import datetime
+import io
+import re
+import unicodedata
+import zipfile
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count
+
+from . import cache_reportes, ledger
+from .models import CategoriaMovimiento, CuentaFinanciera, MovimientoFinanciero
+
+IMPORTACION_LOTE = getattr(settings, "SOID_FINANZAS_IMPORT_LOTE", 500)
+
+# Filas que se muestran en la vista previa y errores que se detallan
+LIMITE_VISTA_PREVIA = 50
+LIMITE_ERRORES = 100
+
+FORMATOS = ("csv", "xlsx")
+
+# Nombres de columna que se reconocen sin mapeo manual (ya normalizados)
+ALIAS_COLUMNAS = {
+    "fecha": ["fecha", "fecha operacion", "fecha transaccion", "fecha valor", "date"],
+    "monto": ["monto", "importe", "valor", "amount"],
+    "debito": ["debito", "debitos", "cargo", "cargos", "retiro", "retiros", "debe"],
+    "credito": ["credito", "creditos", "abono", "abonos", "deposito", "depositos", "haber"],
+    "referencia": ["referencia", "ref", "no referencia", "documento", "no documento", "numero", "serial"],
+    "descripcion": ["descripcion", "concepto", "detalle", "description"],
+    "categoria": ["categoria", "codigo categoria"],
+}
+
+FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y", "%Y/%m/%d")
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni signos: 'Nº Referencia' -> 'no referencia'."""
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).lower()
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", texto).split())
+
+
+# =============================================================================
+# LECTURA DEL ARCHIVO
+# =============================================================================
+
+def formato_de(nombre):
+    extension = (nombre or "").rsplit(".", 1)[-1].lower()
+    return extension if extension in FORMATOS else None
+
+
+def _texto_csv(archivo):
+    """Envuelve el archivo subido como texto: UTF-8 (con o sin BOM) o Windows-1252."""
+    archivo.seek(0)
+    muestra = archivo.read(64 * 1024)
+    archivo.seek(0)
+    try:
+        muestra.decode("utf-8-sig")
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError:
+        encoding = "cp1252"
+    texto = io.TextIOWrapper(archivo, encoding=encoding, newline="")
+    try:
+        dialecto = csv.Sniffer().sniff(muestra.decode(encoding, errors="ignore"), delimiters=",;\t|")
+        delimitador = dialecto.delimiter
+    except csv.Error:
+        delimitador = ","
+    return texto, delimitador
+
+
+def leer_filas(archivo, formato):
+    """
+    Generador de (nº de fila en el archivo, tupla de valores), sin filas
+    vacías. La primera fila devuelta es la de encabezados.
+    """
+    if formato == "csv":
+        texto, delimitador = _texto_csv(archivo)
+        try:
+            lector = csv.reader(texto, delimiter=delimitador)
+            for fila in lector:
+                if any((valor or "").strip() for valor in fila):
+                    yield lector.line_num, tuple(fila)
+        finally:
+            # El wrapper no debe cerrar el archivo subido
+            texto.detach()
+        return
+
+    from openpyxl import load_workbook
+
+    archivo.seek(0)
+    wb = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        for numero, fila in enumerate(wb.active.iter_rows(values_only=True), start=1):
+            if any(valor is not None and str(valor).strip() for valor in fila):
+                yield numero, tuple(fila)
+    finally:
+        wb.close()
+
+
+def resolver_columnas(encabezados, mapeo=None):
+    """
+    {campo: índice} a partir de los encabezados del archivo.
+    `mapeo` ({campo: nombre de columna}) tiene prioridad sobre ALIAS_COLUMNAS.
+    """
+    indices = {normalizar(e): i for i, e in reversed(list(enumerate(encabezados))) if normalizar(e)}
+    columnas = {}
+    for campo, alias in ALIAS_COLUMNAS.items():
+        elegido = (mapeo or {}).get(campo)
+        if elegido:
+            if normalizar(elegido) not in indices:
+                raise ValidationError(f"La columna '{elegido}' no existe en el archivo.")
+            columnas[campo] = indices[normalizar(elegido)]
+            continue
+        for nombre in alias:
+            if nombre in indices:
+                columnas[campo] = indices[nombre]
+                break
+
+    if "fecha" not in columnas:
+        raise ValidationError("No se encontró la columna de fecha. Indícala en el mapeo de columnas.")
+    if "monto" not in columnas and not ({"debito", "credito"} & set(columnas)):
+        raise ValidationError(
+            "No se encontró la columna de monto (o las de débito/crédito). Indícala en el mapeo de columnas."
+        )
+    return columnas
+
+
+# =============================================================================
+# CONVERSIÓN DE VALORES
+# =============================================================================
+
+def parsear_fecha(valor):
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, datetime.date):
+        return valor
+    texto = str(valor or "").strip().split(" ")[0]
+    for formato in FORMATOS_FECHA:
+        try:
+            return datetime.datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(f"fecha no reconocida: '{valor}'")
+
+
+def parsear_monto(valor):
+    """
+    Decimal con signo. Acepta números de Excel y textos como '1,234.56',
+    '1.234,56', 'RD$ 500', '(250.00)' o '250.00-'.
+    """
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, (int, float, Decimal)):
+        return Decimal(str(valor)).quantize(Decimal("0.01"))
+
+    texto = str(valor).strip()
+    if not texto:
+        return None
+    negativo = (texto.startswith("(") and texto.endswith(")")) or texto.startswith("-") or texto.endswith("-")
+    texto = re.sub(r"[^0-9,.]", "", texto)
+    if not texto:
+        raise ValueError(f"monto no reconocido: '{valor}'")
+
+    if "," in texto and "." in texto:
+        # El último separador es el decimal
+        if texto.rfind(",") > texto.rfind("."):
+            texto = texto.replace(".", "").replace(",", ".")
+        else:
+            texto = texto.replace(",", "")
+    elif "," in texto:
+        # '1,234' / '1,234,567' son miles; '12,50' es decimal
+        texto = texto.replace(",", "") if re.fullmatch(r"\d{1,3}(,\d{3})+", texto) else texto.replace(",", ".")
+
+    try:
+        monto = Decimal(texto).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError(f"monto no reconocido: '{valor}'")
+    return -monto if negativo else monto
+
+
+def _celda(fila, columnas, campo):
+    indice = columnas.get(campo)
+    if indice is None or indice >= len(fila):
+        return None
+    return fila[indice]
+
+
+def _texto(valor, largo):
+    if valor is None:
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # referencias numéricas leídas de Excel
+    return str(valor).strip()[:largo]
+
+
+# =============================================================================
+# IMPORTACIÓN
+# =============================================================================
+
+class ResultadoImportacion:
+    """Conteos, errores y vista previa de una importación (o simulación)."""
+
+    def __init__(self, simulacion):
+        self.simulacion = simulacion
+        self.leidas = 0
+        self.nuevas = 0
+        self.duplicadas = 0
+        self.con_error = 0
+        self.lotes = 0
+        self.total_ingresos = Decimal("0")
+        self.total_egresos = Decimal("0")
+        self.errores = []       # [(nº fila, mensaje)] hasta LIMITE_ERRORES
+        self.vista_previa = []  # [dict] hasta LIMITE_VISTA_PREVIA
+
+    def agregar_error(self, numero, mensaje):
+        self.con_error += 1
+        if len(self.errores) < LIMITE_ERRORES:
+            self.errores.append((numero, mensaje))
+
+    def agregar_vista_previa(self, numero, estado, mov=None, mensaje=""):
+        if len(self.vista_previa) >= LIMITE_VISTA_PREVIA:
+            return
+        fila = {"numero": numero, "estado": estado, "mensaje": mensaje}
+        if mov is not None:
+            fila.update(
+                fecha=mov.fecha,
+                tipo=mov.tipo,
+                monto=mov.monto,
+                referencia=mov.referencia,
+                descripcion=mov.descripcion,
+                categoria=mov.categoria.nombre,
+            )
+        self.vista_previa.append(fila)
+
+
+class _Importador:
+
+    def __init__(self, tenant, cuenta, columnas, categoria_ingreso, categoria_egreso, usuario, resultado):
+        self.tenant = tenant
+        self.cuenta = cuenta
+        self.columnas = columnas
+        self.usuario = usuario
+        self.resultado = resultado
+        self.por_defecto = {"ingreso": categoria_ingreso, "egreso": categoria_egreso}
+        # huella -> movimientos que ya tenía la cuenta antes de importar
+        self.previos = {}
+        # huella -> veces que apareció en el archivo hasta ahora
+        self.ocurrencias = {}
+
+        # Catálogo de categorías por código y por nombre, una sola consulta
+        self.categorias = {}
+        for categoria in CategoriaMovimiento.objects.filter(tenant=tenant, activo=True):
+            for llave in (categoria.codigo, categoria.nombre):
+                if llave:
+                    self.categorias[(categoria.tipo, normalizar(llave))] = categoria
+
+    def convertir(self, fila):
+        """Fila del archivo -> MovimientoFinanciero sin guardar (ValueError si no es válida)."""
+        fecha = parsear_fecha(_celda(fila, self.columnas, "fecha"))
+
+        if "monto" in self.columnas:
+            monto = parsear_monto(_celda(fila, self.columnas, "monto"))
+            if not monto:
+                raise ValueError("monto vacío o en cero")
+            tipo = "ingreso" if monto > 0 else "egreso"
+        else:
+            credito = parsear_monto(_celda(fila, self.columnas, "credito"))
+            debito = parsear_monto(_celda(fila, self.columnas, "debito"))
+            if credito and debito:
+                raise ValueError("la fila tiene débito y crédito a la vez")
+            if not (credito or debito):
+                raise ValueError("monto vacío o en cero")
+            monto, tipo = (credito, "ingreso") if credito else (debito, "egreso")
+        monto = abs(monto)
+
+        categoria = self.por_defecto[tipo]
+        nombre_categoria = _texto(_celda(fila, self.columnas, "categoria"), 100)
+        if nombre_categoria:
+            categoria = self.categorias.get((tipo, normalizar(nombre_categoria)))
+            if categoria is None:
+                raise ValueError(f"no existe la categoría de {tipo} '{nombre_categoria}'")
+        if categoria is None:
+            raise ValueError(f"no se indicó categoría para los movimientos de tipo {tipo}")
+
+        referencia = _texto(_celda(fila, self.columnas, "referencia"), 100)
+        return MovimientoFinanciero(
+            tenant=self.tenant,
+            cuenta=self.cuenta,
+            categoria=categoria,
+            tipo=tipo,
+            fecha=fecha,
+            monto=monto,
+            referencia=referencia,
+            descripcion=_texto(_celda(fila, self.columnas, "descripcion"), 255),
+            estado="confirmado",
+            creado_por=self.usuario,
+            huella=MovimientoFinanciero.calcular_huella(fecha, tipo, monto, referencia),
+        )
+
+    def procesar_lote(self, lote):
+        """`lote` = [(nº fila, fila)]. Valida, descarta duplicados y (si no es simulación) guarda."""
+        resultado = self.resultado
+        candidatos = []
+        for numero, fila in lote:
+            try:
+                mov = self.convertir(fila)
+            except ValueError as e:
+                resultado.agregar_error(numero, str(e))
+                resultado.agregar_vista_previa(numero, "error", mensaje=str(e))
+                continue
+            candidatos.append((numero, mov))
+        if not candidatos:
+            return
+
+        if resultado.simulacion:
+            self._guardar(candidatos, guardar=False)
+        else:
+            with transaction.atomic():
+                # Bloquear la cuenta serializa las importaciones sobre ella:
+                # dos cargas del mismo extracto no pueden pasar el filtro de
+                # duplicados a la vez
+                CuentaFinanciera.objects.select_for_update().filter(pk=self.cuenta.pk).first()
+                self._guardar(candidatos, guardar=True)
+
+    def _guardar(self, candidatos, guardar):
+        resultado = self.resultado
+        # Solo las huellas que no salieron en lotes anteriores: las demás ya
+        # pueden incluir filas de esta misma importación
+        pendientes = {mov.huella for _, mov in candidatos} - self.previos.keys()
+        if pendientes:
+            conteos = dict(
+                MovimientoFinanciero.objects.filter(
+                    tenant=self.tenant,
+                    cuenta=self.cuenta,
+                    huella__in=pendientes,
+                )
+                .values("huella")
+                .annotate(n=Count("pk"))
+                .values_list("huella", "n")
+            )
+            for huella in pendientes:
+                self.previos[huella] = conteos.get(huella, 0)
+
+        nuevos = []
+        for numero, mov in candidatos:
+            vez = self.ocurrencias.get(mov.huella, 0) + 1
+            self.ocurrencias[mov.huella] = vez
+            if vez <= self.previos[mov.huella]:
+                resultado.duplicadas += 1
+                resultado.agregar_vista_previa(numero, "duplicado", mov)
+                continue
+            nuevos.append(mov)
+            resultado.agregar_vista_previa(numero, "nuevo", mov)
+            if mov.tipo == "ingreso":
+                resultado.total_ingresos += mov.monto
+            else:
+                resultado.total_egresos += mov.monto
+
+        resultado.nuevas += len(nuevos)
+        if guardar and nuevos:
+            MovimientoFinanciero.objects.bulk_create(nuevos)
+            ledger.registrar_lote(nuevos)
+            cache_reportes.tocar_libro(self.tenant)
+            resultado.lotes += 1
+
+
+def importar_extracto(
+    tenant,
+    archivo,
+    cuenta,
+    categoria_ingreso=None,
+    categoria_egreso=None,
+    mapeo=None,
+    usuario=None,
+    simulacion=False,
+    formato=None,
+):
+    """
+    Importa (o, con simulacion=True, solo previsualiza) un extracto bancario
+    en `cuenta`. `mapeo` = {campo: nombre de columna} para los campos de
+    ALIAS_COLUMNAS que no se detecten solos.
+    Devuelve un ResultadoImportacion. Las filas con error o duplicadas se
+    omiten; los lotes ya guardados quedan guardados.
+    Lanza ValidationError si el archivo no se puede leer o le faltan columnas.
+    """
+    formato = formato or formato_de(getattr(archivo, "name", ""))
+    if formato not in FORMATOS:
+        raise ValidationError("Formato no soportado. Usa un archivo .csv o .xlsx.")
+
+    resultado = ResultadoImportacion(simulacion)
+    filas = leer_filas(archivo, formato)
+    try:
+        primera = next(filas, None)
+        if primera is None:
+            raise ValidationError("El archivo está vacío.")
+        columnas = resolver_columnas(primera[1], mapeo)
+
+        importador = _Importador(
+            tenant, cuenta, columnas, categoria_ingreso, categoria_egreso, usuario, resultado
+        )
+        lote = []
+        for numero, fila in filas:
+            resultado.leidas += 1
+            lote.append((numero, fila))
+            if len(lote) >= IMPORTACION_LOTE:
+                importador.procesar_lote(lote)
+                lote = []
+        if lote:
+            importador.procesar_lote(lote)
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as e:
+        raise ValidationError(f"No se pudo leer el archivo: {e}")
+    finally:
+        filas.close()
+
+    return resultado
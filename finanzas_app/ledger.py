@@ -0,0 +1,338 @@
+# finanzas_app/ledger.py
+# Resumen mensual incremental de movimientos (ResumenMensualMovimiento).
+#
+# Cada movimiento NO anulado suma su monto en la fila
+# (tenant, cuenta, año, mes, tipo, categoría, es_transferencia).
+# Al crear, editar, anular o borrar un movimiento se resta lo que aportaba
+# antes y se suma lo que aporta ahora (signals en finanzas_app.signals).
+# Los reportes agrupan estas filas: su costo depende de cuentas × categorías
+# × meses, no del número de movimientos.
+#
+# En el mismo paso se mueve CuentaFinanciera.saldo_actual (F() sobre la fila
+# de la cuenta), así el saldo no se recalcula sumando todo el histórico, y se
+# marca desactualizado el Informe F.001 del mes tocado (finanzas_app.f001).
+
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from . import cache_reportes
+from .models import (
+    CuentaFinanciera,
+    InformeF001Periodo,
+    MovimientoFinanciero,
+    ResumenMensualMovimiento,
+)
+
+CERO = Decimal("0")
+
+# Campos del movimiento que determinan su aporte al resumen
+CAMPOS_APORTE = ("tenant_id", "cuenta_id", "fecha", "tipo", "categoria_id", "es_transferencia", "estado", "monto")
+
+
+def aporte(datos):
+    """
+    (clave, monto) con lo que un movimiento suma al resumen, o None si no
+    aporta (anulado). `datos` es un dict con CAMPOS_APORTE.
+    """
+    if not datos or datos["estado"] == "anulado":
+        return None
+    fecha = datos["fecha"]
+    if isinstance(fecha, str):
+        fecha = datetime.date.fromisoformat(fecha)
+    clave = (
+        datos["tenant_id"],
+        datos["cuenta_id"],
+        fecha.year,
+        fecha.month,
+        datos["tipo"],
+        datos["categoria_id"],
+        bool(datos["es_transferencia"]),
+    )
+    return clave, Decimal(str(datos["monto"]))
+
+
+def datos_de(mov):
+    return {campo: getattr(mov, campo) for campo in CAMPOS_APORTE}
+
+
+def _sumar(clave, monto, cantidad):
+    tenant_id, cuenta_id, anio, mes, tipo, categoria_id, es_transferencia = clave
+    filtro = dict(
+        tenant_id=tenant_id,
+        cuenta_id=cuenta_id,
+        anio=anio,
+        mes=mes,
+        tipo=tipo,
+        categoria_id=categoria_id,
+        es_transferencia=es_transferencia,
+    )
+    cambios = {"total": F("total") + monto, "cantidad": F("cantidad") + cantidad}
+
+    if ResumenMensualMovimiento.objects.filter(**filtro).update(**cambios):
+        return
+    try:
+        with transaction.atomic():
+            ResumenMensualMovimiento.objects.create(total=monto, cantidad=cantidad, **filtro)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el update y el create
+        ResumenMensualMovimiento.objects.filter(**filtro).update(**cambios)
+
+
+def _marcar_periodos(periodos):
+    """
+    Marca desactualizado el F.001 de cada (tenant_id, anio, mes) tocado.
+    También los cerrados: no se recalculan, pero el reporte avisa.
+    """
+    for tenant_id, anio, mes in periodos:
+        InformeF001Periodo.objects.filter(
+            tenant_id=tenant_id, anio=anio, mes=mes, desactualizado=False
+        ).update(desactualizado=True)
+
+
+def _periodo(clave):
+    return clave[0], clave[2], clave[3]
+
+
+def _efecto_saldo(aporte_):
+    """(cuenta_id, +monto si ingreso / -monto si egreso)."""
+    clave, monto = aporte_
+    return clave[1], (monto if clave[4] == "ingreso" else -monto)
+
+
+def registrar_cambio(antes, despues):
+    """
+    Aplica al resumen y al saldo de las cuentas el paso de `antes` a
+    `despues` (resultados de aporte(); None = no aportaba / ya no aporta).
+    """
+    if antes == despues:
+        return
+    saldos = defaultdict(lambda: CERO)
+    if antes is not None:
+        _sumar(antes[0], -antes[1], -1)
+        cuenta_id, efecto = _efecto_saldo(antes)
+        saldos[cuenta_id] -= efecto
+    if despues is not None:
+        _sumar(despues[0], despues[1], 1)
+        cuenta_id, efecto = _efecto_saldo(despues)
+        saldos[cuenta_id] += efecto
+
+    for cuenta_id, delta in saldos.items():
+        if delta:
+            CuentaFinanciera.objects.filter(pk=cuenta_id).update(saldo_actual=F("saldo_actual") + delta)
+    _marcar_periodos({_periodo(a[0]) for a in (antes, despues) if a is not None})
+
+
+def registrar_lote(movimientos):
+    """
+    Suma al resumen y a los saldos un lote de movimientos NUEVOS creados con
+    bulk_create (que no dispara signals). Agrupa antes de escribir: un
+    UPDATE por fila del resumen tocada y uno por cuenta, no uno por
+    movimiento. Llamar dentro de la transacción del bulk_create.
+    """
+    sumas = defaultdict(lambda: [CERO, 0])
+    saldos = defaultdict(lambda: CERO)
+    for mov in movimientos:
+        aporte_ = aporte(datos_de(mov))
+        if aporte_ is None:
+            continue
+        clave, monto = aporte_
+        sumas[clave][0] += monto
+        sumas[clave][1] += 1
+        cuenta_id, efecto = _efecto_saldo(aporte_)
+        saldos[cuenta_id] += efecto
+
+    for clave, (monto, cantidad) in sumas.items():
+        _sumar(clave, monto, cantidad)
+    for cuenta_id, delta in saldos.items():
+        if delta:
+            CuentaFinanciera.objects.filter(pk=cuenta_id).update(saldo_actual=F("saldo_actual") + delta)
+    _marcar_periodos({_periodo(clave) for clave in sumas})
+
+
+# =============================================================================
+# RECONSTRUCCIÓN Y VERIFICACIÓN
+# =============================================================================
+
+def _agregado_real(tenant):
+    """{clave: (total, cantidad)} calculado desde MovimientoFinanciero."""
+    filas = (
+        MovimientoFinanciero.objects.filter(tenant=tenant)
+        .exclude(estado="anulado")
+        .annotate(anio=ExtractYear("fecha"), mes=ExtractMonth("fecha"))
+        .values("cuenta_id", "anio", "mes", "tipo", "categoria_id", "es_transferencia")
+        .annotate(total=Sum("monto"), cantidad=Count("id"))
+        .order_by()
+    )
+    return {
+        (tenant.pk, f["cuenta_id"], f["anio"], f["mes"], f["tipo"], f["categoria_id"], f["es_transferencia"]):
+            (f["total"] or CERO, f["cantidad"])
+        for f in filas
+    }
+
+
+def _agregado_resumen(tenant):
+    filas = ResumenMensualMovimiento.objects.filter(tenant=tenant).values_list(
+        "cuenta_id", "anio", "mes", "tipo", "categoria_id", "es_transferencia", "total", "cantidad"
+    )
+    return {
+        (tenant.pk, c, a, m, t, cat, tr): (total, cantidad)
+        for c, a, m, t, cat, tr, total, cantidad in filas
+    }
+
+
+@transaction.atomic
+def reconstruir(tenant):
+    """Borra y recalcula el resumen del tenant. Devuelve cuántas filas creó."""
+    ResumenMensualMovimiento.objects.filter(tenant=tenant).delete()
+    filas = [
+        ResumenMensualMovimiento(
+            tenant_id=tenant.pk,
+            cuenta_id=cuenta_id,
+            anio=anio,
+            mes=mes,
+            tipo=tipo,
+            categoria_id=categoria_id,
+            es_transferencia=es_transferencia,
+            total=total,
+            cantidad=cantidad,
+        )
+        for (_, cuenta_id, anio, mes, tipo, categoria_id, es_transferencia), (total, cantidad)
+        in _agregado_real(tenant).items()
+    ]
+    ResumenMensualMovimiento.objects.bulk_create(filas, batch_size=1000)
+    InformeF001Periodo.objects.filter(tenant=tenant, cerrado=False).update(desactualizado=True)
+    cache_reportes.tocar_libro(tenant)
+    return len(filas)
+
+
+def verificar(tenant):
+    """
+    Compara el resumen con los movimientos reales.
+    Devuelve una lista de diferencias: (clave, (total, cantidad) esperado, (total, cantidad) guardado).
+    """
+    real = _agregado_real(tenant)
+    guardado = {
+        k: v for k, v in _agregado_resumen(tenant).items()
+        if v != (CERO, 0)  # filas que quedaron en cero tras anular: equivalen a no tener fila
+    }
+    diferencias = []
+    for clave in set(real) | set(guardado):
+        esperado = real.get(clave, (CERO, 0))
+        actual = guardado.get(clave, (CERO, 0))
+        if esperado != actual:
+            diferencias.append((clave, esperado, actual))
+    return sorted(diferencias, key=lambda d: d[0][1:5])
+
+
+def _saldos_reales(tenant):
+    """{cuenta_id: saldo} calculado desde saldo_inicial + movimientos."""
+    netos = {
+        f["cuenta_id"]: (f["ingresos"] or CERO) - (f["egresos"] or CERO)
+        for f in MovimientoFinanciero.objects.filter(tenant=tenant)
+        .exclude(estado="anulado")
+        .values("cuenta_id")
+        .annotate(
+            ingresos=Sum("monto", filter=Q(tipo="ingreso")),
+            egresos=Sum("monto", filter=Q(tipo="egreso")),
+        )
+        .order_by()
+    }
+    return {
+        pk: (inicial or CERO) + netos.get(pk, CERO)
+        for pk, inicial in CuentaFinanciera.objects.filter(tenant=tenant).values_list("pk", "saldo_inicial")
+    }
+
+
+def verificar_saldos(tenant):
+    """
+    Compara CuentaFinanciera.saldo_actual con el saldo real.
+    Devuelve una lista de diferencias: (cuenta_id, nombre, esperado, guardado).
+    """
+    reales = _saldos_reales(tenant)
+    diferencias = []
+    for pk, nombre, guardado in CuentaFinanciera.objects.filter(tenant=tenant).values_list(
+        "pk", "nombre", "saldo_actual"
+    ).order_by("nombre"):
+        if reales[pk] != guardado:
+            diferencias.append((pk, nombre, reales[pk], guardado))
+    return diferencias
+
+
+@transaction.atomic
+def reconstruir_saldos(tenant):
+    """Recalcula saldo_actual de las cuentas del tenant. Devuelve cuántas corrigió."""
+    cuentas = list(CuentaFinanciera.objects.select_for_update().filter(tenant=tenant).order_by("pk"))
+    reales = _saldos_reales(tenant)
+    corregidas = 0
+    for cuenta in cuentas:
+        if cuenta.saldo_actual != reales[cuenta.pk]:
+            CuentaFinanciera.objects.filter(pk=cuenta.pk).update(saldo_actual=reales[cuenta.pk])
+            corregidas += 1
+    if corregidas:
+        cache_reportes.tocar_libro(tenant)
+    return corregidas
+
+
+# =============================================================================
+# LECTURA PARA REPORTES
+# =============================================================================
+
+def resumen(tenant, anio=None, mes=None, cuenta_id=None, incluir_transferencias=True):
+    """Queryset del resumen filtrado como lo hacen los reportes."""
+    qs = ResumenMensualMovimiento.objects.filter(tenant=tenant)
+    if anio is not None:
+        qs = qs.filter(anio=anio)
+    if mes is not None:
+        qs = qs.filter(mes=mes)
+    if cuenta_id:
+        qs = qs.filter(cuenta_id=cuenta_id)
+    if not incluir_transferencias:
+        qs = qs.filter(es_transferencia=False)
+    return qs
+
+
+def totales_por_mes(tenant, filtro=None, desde=None):
+    """
+    {(anio, mes): {"ingresos", "egresos"}} en UNA consulta agrupada.
+    - filtro: Q() sobre el resumen (cuenta, transferencias...) que se aplica
+      a las sumas, no a las filas: los meses aparecen aunque sumen 0.
+    - desde: (anio, mes) inicial, inclusive.
+    Cada reporte pivota el dict en memoria.
+    """
+    qs = ResumenMensualMovimiento.objects.filter(tenant=tenant)
+    if desde:
+        anio, mes = desde
+        qs = qs.filter(Q(anio__gt=anio) | Q(anio=anio, mes__gte=mes))
+    filtro = filtro or Q()
+    filas = qs.values("anio", "mes").annotate(
+        ingresos=Sum("total", filter=filtro & Q(tipo="ingreso")),
+        egresos=Sum("total", filter=filtro & Q(tipo="egreso")),
+    ).order_by()
+    return {
+        (f["anio"], f["mes"]): {"ingresos": f["ingresos"] or CERO, "egresos": f["egresos"] or CERO}
+        for f in filas
+    }
+
+
+def totales_por_tipo(qs):
+    """{"ingreso": Decimal, "egreso": Decimal} de un queryset del resumen."""
+    totales = defaultdict(lambda: CERO)
+    for fila in qs.values("tipo").annotate(suma=Sum("total")).order_by():
+        totales[fila["tipo"]] = fila["suma"] or CERO
+    return {"ingreso": totales["ingreso"], "egreso": totales["egreso"]}
+
+
+def por_categoria(qs, limite=None):
+    """
+    Filas {"categoria__nombre", "total"} de mayor a menor (mismo formato que
+    los .values().annotate(total=Sum("monto")) sobre movimientos).
+    """
+    filas = qs.values("categoria__nombre").annotate(suma=Sum("total")).order_by("-suma")
+    if limite:
+        filas = filas[:limite]
+    return [{"categoria__nombre": f["categoria__nombre"], "total": f["suma"] or CERO} for f in filas]
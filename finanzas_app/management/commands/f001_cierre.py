@@ -0,0 +1,60 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tenants.models import Tenant
+from finanzas_app import f001
+from finanzas_app.models import InformeF001Periodo
+
+
+class Command(BaseCommand):
+    help = (
+        "Cierra (congela) el Informe F.001 de un mes para todos los tenants o uno. "
+        "Por defecto el mes anterior: pensado para correr a inicio de mes (cron). "
+        "Con --solo-calcular deja el periodo abierto y solo precalcula sus valores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tenant", type=int, help="ID del tenant específico.")
+        parser.add_argument("--anio", type=int, help="Año del periodo (por defecto, el del mes anterior).")
+        parser.add_argument("--mes", type=int, help="Mes del periodo (por defecto, el mes anterior).")
+        parser.add_argument(
+            "--solo-calcular",
+            action="store_true",
+            help="Precalcula el periodo sin cerrarlo.",
+        )
+
+    def handle(self, *args, **options):
+        anterior = timezone.localdate().replace(day=1) - datetime.timedelta(days=1)
+        anio = options.get("anio") or anterior.year
+        mes = options.get("mes") or anterior.month
+        if not 1 <= mes <= 12:
+            raise CommandError("El mes debe estar entre 1 y 12.")
+
+        tenants = Tenant.objects.all().order_by("id")
+        if options.get("tenant"):
+            tenants = tenants.filter(pk=options["tenant"])
+            if not tenants.exists():
+                raise CommandError(f"No existe el tenant {options['tenant']}.")
+
+        cerrados = set(
+            InformeF001Periodo.objects
+            .filter(anio=anio, mes=mes, cerrado=True)
+            .values_list("tenant_id", flat=True)
+        )
+
+        for tenant in tenants:
+            if tenant.pk in cerrados:
+                # Un cierre no se rehace: hay que reabrirlo desde el reporte
+                self.stdout.write(self.style.WARNING(
+                    f"⏭️  {tenant.slug}: F.001 {anio}-{mes:02d} ya estaba cerrado (sin cambios)"
+                ))
+                continue
+            if options["solo_calcular"]:
+                f001.obtener(tenant, anio, mes)
+                accion = "calculado"
+            else:
+                f001.cerrar(tenant, anio, mes)
+                accion = "cerrado"
+            self.stdout.write(self.style.SUCCESS(f"✅ {tenant.slug}: F.001 {anio}-{mes:02d} {accion}"))
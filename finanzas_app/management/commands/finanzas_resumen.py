@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tenants.models import Tenant
+from finanzas_app import ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Verifica (por defecto) o reconstruye el resumen mensual de movimientos "
+        "(ResumenMensualMovimiento) y el saldo materializado de cada cuenta "
+        "(CuentaFinanciera.saldo_actual). Pensado para correr a diario (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tenant",
+            type=int,
+            help="ID del tenant específico. Si no se indica, se procesan TODOS los tenants.",
+        )
+        parser.add_argument(
+            "--reconstruir",
+            action="store_true",
+            help="Borra y recalcula el resumen y los saldos desde los movimientos.",
+        )
+        parser.add_argument(
+            "--reparar",
+            action="store_true",
+            help="Verifica y reconstruye solo los tenants con diferencias.",
+        )
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all().order_by("id")
+        if options.get("tenant"):
+            tenants = tenants.filter(pk=options["tenant"])
+            if not tenants.exists():
+                raise CommandError(f"No existe el tenant {options['tenant']}.")
+
+        con_diferencias = 0
+        for tenant in tenants:
+            if options["reconstruir"]:
+                filas = ledger.reconstruir(tenant)
+                cuentas = ledger.reconstruir_saldos(tenant)
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {tenant.slug}: resumen reconstruido ({filas} filas), {cuentas} saldo(s) corregido(s)"
+                ))
+                continue
+
+            resumen_ok = self._verificar_resumen(tenant, options["reparar"])
+            saldos_ok = self._verificar_saldos(tenant, options["reparar"])
+            if not (resumen_ok and saldos_ok):
+                con_diferencias += 1
+
+        if con_diferencias and not options["reparar"]:
+            raise CommandError(
+                f"{con_diferencias} tenant(s) con diferencias. Ejecuta con --reparar o --reconstruir."
+            )
+
+    def _verificar_resumen(self, tenant, reparar):
+        diferencias = ledger.verificar(tenant)
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS(f"✅ {tenant.slug}: resumen consistente"))
+            return True
+
+        self.stdout.write(self.style.WARNING(f"⚠️  {tenant.slug}: {len(diferencias)} diferencias en el resumen"))
+        for clave, esperado, actual in diferencias[:20]:
+            _, cuenta_id, anio, mes, tipo, categoria_id, transf = clave
+            self.stdout.write(
+                f"   {anio}-{mes:02d} cuenta={cuenta_id} {tipo} categoria={categoria_id} "
+                f"transferencia={transf}: esperado {esperado[0]} ({esperado[1]}) · "
+                f"guardado {actual[0]} ({actual[1]})"
+            )
+        if len(diferencias) > 20:
+            self.stdout.write(f"   ... y {len(diferencias) - 20} más")
+
+        if reparar:
+            filas = ledger.reconstruir(tenant)
+            self.stdout.write(self.style.SUCCESS(f"   🔧 reconstruido ({filas} filas)"))
+        return False
+
+    def _verificar_saldos(self, tenant, reparar):
+        diferencias = ledger.verificar_saldos(tenant)
+        if not diferencias:
+            self.stdout.write(self.style.SUCCESS(f"✅ {tenant.slug}: saldos de cuentas consistentes"))
+            return True
+
+        self.stdout.write(self.style.WARNING(f"⚠️  {tenant.slug}: {len(diferencias)} cuenta(s) con saldo desviado"))
+        for _, nombre, esperado, guardado in diferencias:
+            self.stdout.write(f"   {nombre}: esperado {esperado} · guardado {guardado} (desvío {guardado - esperado})")
+
+        if reparar:
+            cuentas = ledger.reconstruir_saldos(tenant)
+            self.stdout.write(self.style.SUCCESS(f"   🔧 {cuentas} saldo(s) corregido(s)"))
+        return False
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from finanzas_app import adjuntos
+from finanzas_app.models import AdjuntoMovimiento
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera la versión optimizada y la miniatura de los adjuntos que quedaron "
+        "pendientes (p. ej. si el proceso se reinició con trabajos en cola, o para "
+        "adjuntos subidos antes del pipeline). Se ejecuta en el hilo actual."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reintentar-errores",
+            action="store_true",
+            help="Incluye también los adjuntos marcados con error.",
+        )
+
+    def handle(self, *args, **options):
+        qs = adjuntos.pendientes()
+        if options["reintentar_errores"]:
+            AdjuntoMovimiento.objects.filter(
+                estado_proceso=AdjuntoMovimiento.PROCESO_ERROR
+            ).update(estado_proceso=AdjuntoMovimiento.PROCESO_PENDIENTE)
+
+        resultado = {estado: 0 for estado, _ in AdjuntoMovimiento.PROCESO_CHOICES}
+        for adjunto_id in list(qs.values_list("pk", flat=True)):
+            adjunto = adjuntos.procesar(adjunto_id)
+            if adjunto is not None:
+                resultado[adjunto.estado_proceso] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Adjuntos: {resultado['listo']} procesado(s), "
+            f"{resultado['no_aplica']} sin derivados, {resultado['error']} con error."
+        ))
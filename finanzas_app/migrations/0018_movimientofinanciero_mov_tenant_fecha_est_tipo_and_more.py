@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estructura_app', '0020_unidadmembresia_membresia_tenant_unidad'),
+        ('finanzas_app', '0017_remove_categoriamovimiento_uq_categoria_nombre_tipo_and_more'),
+        ('miembros_app', '0041_miembro_apodo'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['tenant', 'fecha', 'estado', 'tipo'], name='mov_tenant_fecha_est_tipo'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['tenant', 'cuenta', 'fecha'], name='mov_tenant_cuenta_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientofinanciero',
+            index=models.Index(condition=models.Q(('estado', 'anulado'), _negated=True), fields=['tenant', '-fecha', '-creado_en'], name='mov_tenant_vigentes'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientofinanciero',
+            index=models.Index(condition=models.Q(('es_transferencia', True)), fields=['tenant', 'transferencia_id'], name='mov_tenant_transferencia'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def construir_resumen(apps, schema_editor):
+    """Llena el resumen mensual con el histórico existente."""
+    MovimientoFinanciero = apps.get_model("finanzas_app", "MovimientoFinanciero")
+    ResumenMensualMovimiento = apps.get_model("finanzas_app", "ResumenMensualMovimiento")
+
+    filas = (
+        MovimientoFinanciero.objects.exclude(estado="anulado")
+        .annotate(anio=ExtractYear("fecha"), mes=ExtractMonth("fecha"))
+        .values("tenant_id", "cuenta_id", "anio", "mes", "tipo", "categoria_id", "es_transferencia")
+        .annotate(total=Sum("monto"), cantidad=Count("id"))
+        .order_by()
+    )
+    ResumenMensualMovimiento.objects.bulk_create(
+        [ResumenMensualMovimiento(**f) for f in filas],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas_app', '0018_movimientofinanciero_mov_tenant_fecha_est_tipo_and_more'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenMensualMovimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('tipo', models.CharField(choices=[('ingreso', 'Ingreso'), ('egreso', 'Egreso')], max_length=10)),
+                ('es_transferencia', models.BooleanField(default=False)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_mensuales', to='finanzas_app.categoriamovimiento')),
+                ('cuenta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_mensuales', to='finanzas_app.cuentafinanciera')),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Resumen mensual de movimientos',
+                'verbose_name_plural': 'Resúmenes mensuales de movimientos',
+                'indexes': [models.Index(fields=['tenant', 'anio', 'mes'], name='resumen_tenant_periodo')],
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'cuenta', 'anio', 'mes', 'tipo', 'categoria', 'es_transferencia'), name='uq_resumen_mensual_movimiento')],
+            },
+        ),
+        migrations.RunPython(construir_resumen, migrations.RunPython.noop),
+    ]
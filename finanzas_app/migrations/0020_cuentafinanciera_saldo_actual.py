@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:55
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def calcular_saldos(apps, schema_editor):
+    """saldo_actual = saldo_inicial + ingresos - egresos (no anulados)."""
+    CuentaFinanciera = apps.get_model("finanzas_app", "CuentaFinanciera")
+    MovimientoFinanciero = apps.get_model("finanzas_app", "MovimientoFinanciero")
+
+    netos = {
+        f["cuenta_id"]: (f["ingresos"] or Decimal("0")) - (f["egresos"] or Decimal("0"))
+        for f in MovimientoFinanciero.objects.exclude(estado="anulado")
+        .values("cuenta_id")
+        .annotate(
+            ingresos=Sum("monto", filter=Q(tipo="ingreso")),
+            egresos=Sum("monto", filter=Q(tipo="egreso")),
+        )
+        .order_by()
+    }
+    for cuenta in CuentaFinanciera.objects.all():
+        CuentaFinanciera.objects.filter(pk=cuenta.pk).update(
+            saldo_actual=(cuenta.saldo_inicial or Decimal("0")) + netos.get(cuenta.pk, Decimal("0"))
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas_app', '0019_resumenmensualmovimiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cuentafinanciera',
+            name='saldo_actual',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Saldo actual de la cuenta (calculado).', max_digits=14),
+        ),
+        migrations.RunPython(calcular_saldos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas_app', '0020_cuentafinanciera_saldo_actual'),
+        ('tenants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionLibroFinanzas',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('actualizado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Versión del libro de finanzas',
+                'verbose_name_plural': 'Versiones del libro de finanzas',
+                'constraints': [models.UniqueConstraint(fields=('tenant',), name='uq_version_libro_finanzas_tenant')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:04
+
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def calcular_huellas(apps, schema_editor):
+    """Fórmula original, sin tipo (0026 la recalcula con tipo)."""
+    MovimientoFinanciero = apps.get_model("finanzas_app", "MovimientoFinanciero")
+
+    lote = []
+    for mov in MovimientoFinanciero.objects.only("pk", "fecha", "monto", "referencia").iterator(chunk_size=2000):
+        texto = f"{mov.fecha.isoformat()}|{Decimal(mov.monto):.2f}|{(mov.referencia or '').strip().upper()}"
+        mov.huella = hashlib.sha1(texto.encode()).hexdigest()
+        lote.append(mov)
+        if len(lote) >= 2000:
+            MovimientoFinanciero.objects.bulk_update(lote, ["huella"])
+            lote = []
+    if lote:
+        MovimientoFinanciero.objects.bulk_update(lote, ["huella"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('estructura_app', '0020_unidadmembresia_membresia_tenant_unidad'),
+        ('finanzas_app', '0021_versionlibrofinanzas'),
+        ('miembros_app', '0042_miembro_miembro_tenant_listado_and_more'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movimientofinanciero',
+            name='huella',
+            field=models.CharField(blank=True, editable=False, help_text='Hash de (fecha, monto, referencia) para detectar duplicados al importar extractos.', max_length=40),
+        ),
+        migrations.AddIndex(
+            model_name='movimientofinanciero',
+            index=models.Index(fields=['tenant', 'cuenta', 'huella'], name='mov_tenant_cuenta_huella'),
+        ),
+        migrations.RunPython(calcular_huellas, migrations.RunPython.noop),
+    ]
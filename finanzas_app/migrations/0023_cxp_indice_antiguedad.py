@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas_app', '0022_movimiento_huella'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cuentaporpagar',
+            index=models.Index(fields=['tenant', 'estado', 'fecha_vencimiento'], name='cxp_tenant_estado_venc'),
+        ),
+    ]
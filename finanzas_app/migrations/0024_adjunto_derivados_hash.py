@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas_app', '0023_cxp_indice_antiguedad'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adjuntomovimiento',
+            name='archivo_optimizado',
+            field=models.FileField(blank=True, editable=False, help_text='Imagen recomprimida (WebP/JPEG), sin EXIF y con tamaño acotado.', upload_to='finanzas/adjuntos/'),
+        ),
+        migrations.AddField(
+            model_name='adjuntomovimiento',
+            name='estado_proceso',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('listo', 'Listo'), ('no_aplica', 'No aplica'), ('error', 'Error')], default='pendiente', help_text='Estado de la generación de versiones derivadas.', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='adjuntomovimiento',
+            name='hash_contenido',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 del archivo subido; dos adjuntos con el mismo hash comparten almacenamiento.', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='adjuntomovimiento',
+            name='miniatura',
+            field=models.FileField(blank=True, editable=False, help_text='Miniatura para listados.', upload_to='finanzas/adjuntos/'),
+        ),
+        migrations.AddIndex(
+            model_name='adjuntomovimiento',
+            index=models.Index(fields=['hash_contenido'], name='adjunto_hash_contenido'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas_app', '0024_adjunto_derivados_hash'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InformeF001Periodo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('anio', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('valores', models.JSONField(default=dict)),
+                ('calculado_en', models.DateTimeField(auto_now=True)),
+                ('desactualizado', models.BooleanField(default=False, help_text='Hubo cambios en movimientos del mes después del último cálculo.')),
+                ('cerrado', models.BooleanField(default=False)),
+                ('cerrado_en', models.DateTimeField(blank=True, null=True)),
+                ('cerrado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='informes_f001_cerrados', to=settings.AUTH_USER_MODEL)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='%(app_label)s_%(class)s_set', to='tenants.tenant')),
+            ],
+            options={
+                'verbose_name': 'Informe F.001 (periodo)',
+                'verbose_name_plural': 'Informes F.001 (periodos)',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'anio', 'mes'), name='uq_informe_f001_periodo')],
+            },
+        ),
+    ]
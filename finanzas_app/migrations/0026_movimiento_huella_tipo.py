@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:10
+
+import hashlib
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def recalcular_huellas(apps, schema_editor):
+    """Misma fórmula que MovimientoFinanciero.calcular_huella (ahora con tipo)."""
+    MovimientoFinanciero = apps.get_model("finanzas_app", "MovimientoFinanciero")
+
+    lote = []
+    for mov in MovimientoFinanciero.objects.only("pk", "fecha", "tipo", "monto", "referencia").iterator(chunk_size=2000):
+        texto = f"{mov.fecha.isoformat()}|{mov.tipo}|{Decimal(mov.monto):.2f}|{(mov.referencia or '').strip().upper()}"
+        mov.huella = hashlib.sha1(texto.encode()).hexdigest()
+        lote.append(mov)
+        if len(lote) >= 2000:
+            MovimientoFinanciero.objects.bulk_update(lote, ["huella"])
+            lote = []
+    if lote:
+        MovimientoFinanciero.objects.bulk_update(lote, ["huella"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas_app', '0025_informe_f001_periodo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='movimientofinanciero',
+            name='huella',
+            field=models.CharField(blank=True, editable=False, help_text='Hash de (fecha, tipo, monto, referencia) para detectar duplicados al importar extractos.', max_length=40),
+        ),
+        migrations.RunPython(recalcular_huellas, migrations.RunPython.noop),
+    ]
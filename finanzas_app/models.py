@@ -1,6 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from miembros_app.models import Miembro
+import hashlib
 import uuid
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db.models import Q
@@ -52,6 +54,16 @@ class CuentaFinanciera(TenantAwareModel):
         default=True,
         help_text="Indica si la cuenta está activa."
     )
+    # ✅ Saldo materializado: saldo_inicial + ingresos - egresos (no anulados).
+    #    Lo mantiene finanzas_app.ledger con F() en cada alta/edición/anulación
+    #    de movimientos; se concilia con: python manage.py finanzas_resumen
+    saldo_actual = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Saldo actual de la cuenta (calculado)."
+    )
 
     class Meta:
         verbose_name = "Cuenta financiera"
@@ -79,7 +91,23 @@ class CuentaFinanciera(TenantAwareModel):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        if self._state.adding:
+            self.saldo_actual = self.saldo_inicial or Decimal("0")
+            super().save(*args, **kwargs)
+            return
+
+        # Editar la cuenta no debe pisar el saldo que mueven los movimientos:
+        # se bloquea la fila y solo se aplica la diferencia del saldo inicial
+        with transaction.atomic():
+            anterior = (
+                CuentaFinanciera.objects.select_for_update()
+                .filter(pk=self.pk)
+                .values("saldo_inicial", "saldo_actual")
+                .first()
+            )
+            if anterior is not None:
+                self.saldo_actual = anterior["saldo_actual"] + (self.saldo_inicial - anterior["saldo_inicial"])
+            super().save(*args, **kwargs)
 
 class CasillaF001(models.Model):
     """
@@ -310,6 +338,12 @@ class MovimientoFinanciero(TenantAwareModel):
         blank=True,
         help_text="Referencia opcional (nº recibo, nº factura, nº transferencia, etc.)."
     )
+    huella = models.CharField(
+        max_length=40,
+        blank=True,
+        editable=False,
+        help_text="Hash de (fecha, tipo, monto, referencia) para detectar duplicados al importar extractos."
+    )
 
     # --- ORIGEN DEL INGRESO / EGRESO ---
     origen = models.CharField(
@@ -380,6 +414,26 @@ class MovimientoFinanciero(TenantAwareModel):
         permissions = [
             ("ver_dashboard_finanzas", "Puede ver el Dashboard de Finanzas"),
         ]
+        indexes = [
+            # Dashboard / reportes: tenant + rango de fechas + estado + tipo
+            models.Index(fields=["tenant", "fecha", "estado", "tipo"], name="mov_tenant_fecha_est_tipo"),
+            # Saldos y extractos por cuenta
+            models.Index(fields=["tenant", "cuenta", "fecha"], name="mov_tenant_cuenta_fecha"),
+            # Listados (excluyen anulados y ordenan por -fecha, -creado_en)
+            models.Index(
+                fields=["tenant", "-fecha", "-creado_en"],
+                name="mov_tenant_vigentes",
+                condition=~models.Q(estado="anulado"),
+            ),
+            # Par de una transferencia
+            models.Index(
+                fields=["tenant", "transferencia_id"],
+                name="mov_tenant_transferencia",
+                condition=models.Q(es_transferencia=True),
+            ),
+            # Duplicados al importar extractos bancarios
+            models.Index(fields=["tenant", "cuenta", "huella"], name="mov_tenant_cuenta_huella"),
+        ]
 
     def __str__(self):
         signo = "+" if self.tipo == "ingreso" else "-"
@@ -428,6 +482,138 @@ class MovimientoFinanciero(TenantAwareModel):
             transferencia_id=self.transferencia_id
         ).exclude(pk=self.pk).first()
 
+    @staticmethod
+    def calcular_huella(fecha, tipo, monto, referencia):
+        """
+        Huella de (fecha, tipo, monto, referencia) con la que la importación
+        de extractos reconoce un movimiento ya registrado en la misma cuenta.
+        """
+        texto = f"{fecha.isoformat()}|{tipo}|{Decimal(monto):.2f}|{(referencia or '').strip().upper()}"
+        return hashlib.sha1(texto.encode()).hexdigest()
+
+    # Guardar/borrar en una transacción: el resumen mensual
+    # (ResumenMensualMovimiento) se actualiza en los signals y debe quedar
+    # confirmado junto con el movimiento, o no quedar.
+    def save(self, *args, **kwargs):
+        if self.fecha and self.monto is not None:
+            self.huella = self.calcular_huella(self.fecha, self.tipo, self.monto, self.referencia)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "huella" not in update_fields:
+                kwargs["update_fields"] = list(update_fields) + ["huella"]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+
+class ResumenMensualMovimiento(TenantAwareModel):
+    """
+    Acumulado mensual de movimientos NO anulados, por cuenta/tipo/categoría.
+    Lo mantiene finanzas_app.ledger (signals de MovimientoFinanciero) y los
+    reportes leen de aquí en vez de re-agregar todo el histórico.
+    Se reconstruye con: python manage.py finanzas_resumen --reconstruir
+    """
+    cuenta = models.ForeignKey(
+        CuentaFinanciera,
+        on_delete=models.CASCADE,
+        related_name="resumenes_mensuales",
+    )
+    anio = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    tipo = models.CharField(max_length=10, choices=MovimientoFinanciero.TIPO_MOVIMIENTO_CHOICES)
+    categoria = models.ForeignKey(
+        CategoriaMovimiento,
+        on_delete=models.CASCADE,
+        related_name="resumenes_mensuales",
+    )
+    es_transferencia = models.BooleanField(default=False)
+
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad = models.PositiveIntegerField(default=0)
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen mensual de movimientos"
+        verbose_name_plural = "Resúmenes mensuales de movimientos"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "cuenta", "anio", "mes", "tipo", "categoria", "es_transferencia"],
+                name="uq_resumen_mensual_movimiento",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["tenant", "anio", "mes"], name="resumen_tenant_periodo"),
+        ]
+
+    def __str__(self):
+        return f"{self.anio}-{self.mes:02d} · {self.cuenta_id} · {self.tipo} · {self.total}"
+
+
+class VersionLibroFinanzas(TenantAwareModel):
+    """
+    Versión del libro de Finanzas por tenant. Sube en cada escritura de
+    movimientos, CxP o catálogos (finanzas_app.cache_reportes.tocar_libro)
+    en la misma transacción que el cambio. Los reportes en cache se guardan
+    bajo esta versión: al subir, los anteriores dejan de usarse.
+    Vive en la BD (no en el cache) para que todos los workers la vean igual,
+    sea cual sea el backend de cache.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    actualizado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Versión del libro de finanzas"
+        verbose_name_plural = "Versiones del libro de finanzas"
+        constraints = [
+            models.UniqueConstraint(fields=["tenant"], name="uq_version_libro_finanzas_tenant"),
+        ]
+
+    def __str__(self):
+        return f"{self.tenant_id} · v{self.version}"
+
+
+class InformeF001Periodo(TenantAwareModel):
+    """
+    Valores calculados del Informe F.001 de un tenant para un mes.
+    Lo mantiene finanzas_app.f001: se calcula la primera vez que se pide,
+    se marca `desactualizado` cuando cambian movimientos de ese mes (ledger)
+    y solo entonces se recalcula. Un periodo `cerrado` queda congelado:
+    se imprime siempre con los valores del cierre.
+    """
+    anio = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+
+    # {"ingresos": {...}, "egresos": {...}, "totales": {...}, ...} con montos en texto
+    valores = models.JSONField(default=dict)
+    calculado_en = models.DateTimeField(auto_now=True)
+    desactualizado = models.BooleanField(
+        default=False,
+        help_text="Hubo cambios en movimientos del mes después del último cálculo."
+    )
+
+    cerrado = models.BooleanField(default=False)
+    cerrado_en = models.DateTimeField(null=True, blank=True)
+    cerrado_por = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="informes_f001_cerrados",
+    )
+
+    class Meta:
+        verbose_name = "Informe F.001 (periodo)"
+        verbose_name_plural = "Informes F.001 (periodos)"
+        constraints = [
+            models.UniqueConstraint(fields=["tenant", "anio", "mes"], name="uq_informe_f001_periodo"),
+        ]
+
+    def __str__(self):
+        estado = "cerrado" if self.cerrado else "abierto"
+        return f"F.001 {self.anio}-{self.mes:02d} · {self.tenant_id} · {estado}"
+
 
 class AdjuntoMovimiento(models.Model):
     """
@@ -437,6 +623,18 @@ class AdjuntoMovimiento(models.Model):
     
     EXTENSIONES_PERMITIDAS = ['pdf', 'jpg', 'jpeg', 'png', 'gif', 'webp', 'doc', 'docx', 'xls', 'xlsx']
     MAX_TAMAÑO_MB = 10  # 👈 Tamaño máximo en MB
+
+    # Estado de las versiones derivadas (ver finanzas_app/adjuntos.py)
+    PROCESO_PENDIENTE = "pendiente"
+    PROCESO_LISTO = "listo"
+    PROCESO_NO_APLICA = "no_aplica"
+    PROCESO_ERROR = "error"
+    PROCESO_CHOICES = [
+        (PROCESO_PENDIENTE, "Pendiente"),
+        (PROCESO_LISTO, "Listo"),
+        (PROCESO_NO_APLICA, "No aplica"),
+        (PROCESO_ERROR, "Error"),
+    ]
     
     movimiento = models.ForeignKey(
         MovimientoFinanciero,
@@ -449,6 +647,34 @@ class AdjuntoMovimiento(models.Model):
         upload_to="finanzas/adjuntos/%Y/%m/",
         help_text="Archivo adjunto."
     )
+
+    hash_contenido = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="SHA-256 del archivo subido; dos adjuntos con el mismo hash comparten almacenamiento."
+    )
+
+    archivo_optimizado = models.FileField(
+        upload_to="finanzas/adjuntos/",
+        blank=True,
+        editable=False,
+        help_text="Imagen recomprimida (WebP/JPEG), sin EXIF y con tamaño acotado."
+    )
+
+    miniatura = models.FileField(
+        upload_to="finanzas/adjuntos/",
+        blank=True,
+        editable=False,
+        help_text="Miniatura para listados."
+    )
+
+    estado_proceso = models.CharField(
+        max_length=10,
+        choices=PROCESO_CHOICES,
+        default=PROCESO_PENDIENTE,
+        help_text="Estado de la generación de versiones derivadas."
+    )
     
     nombre_original = models.CharField(
         max_length=255,
@@ -483,6 +709,9 @@ class AdjuntoMovimiento(models.Model):
         verbose_name = "Adjunto de movimiento"
         verbose_name_plural = "Adjuntos de movimientos"
         ordering = ["-subido_en"]
+        indexes = [
+            models.Index(fields=["hash_contenido"], name="adjunto_hash_contenido"),
+        ]
     
     def __str__(self):
         return f"{self.nombre_original} - {self.movimiento}"
@@ -537,6 +766,19 @@ class AdjuntoMovimiento(models.Model):
         extension = self.nombre_original.split('.')[-1].lower()
         return extension in ['jpg', 'jpeg', 'png', 'gif', 'webp']
     
+    def url_miniatura(self):
+        """URL de la miniatura, o None si aún no se generó."""
+        return self.miniatura.url if self.miniatura else None
+
+    def url_vista(self):
+        """
+        URL para mostrar la imagen: la versión optimizada si ya existe,
+        si no el original.
+        """
+        if self.archivo_optimizado:
+            return self.archivo_optimizado.url
+        return self.archivo.url if self.archivo else None
+
     def tamaño_formateado(self):
         """
         Retorna el tamaño del archivo en formato legible.
@@ -804,6 +1046,8 @@ class CuentaPorPagar(TenantAwareModel):
         indexes = [
             models.Index(fields=["estado", "fecha_vencimiento"]),
             models.Index(fields=["fecha_emision"]),
+            # Aging / vencidas por tenant (finanzas_app.antiguedad_cxp)
+            models.Index(fields=["tenant", "estado", "fecha_vencimiento"], name="cxp_tenant_estado_venc"),
         ]
 
     def __str__(self):
@@ -1,7 +1,6 @@
 # finanzas_app/services.py
 
 import uuid
-from decimal import Decimal
 from django.db import transaction
 from django.core.exceptions import ValidationError
 
@@ -14,25 +13,30 @@ class TransferenciaService:
     Encapsula toda la lógica de negocio.
     """
     
+    @staticmethod
+    def bloquear_cuentas(*cuentas):
+        """
+        SELECT ... FOR UPDATE de las cuentas (siempre en orden de pk, para que
+        dos operaciones cruzadas A→B y B→A no se bloqueen mutuamente).
+        Debe llamarse dentro de transaction.atomic().
+        Retorna {pk: CuentaFinanciera} con el saldo_actual recién leído.
+        """
+        pks = sorted({c.pk for c in cuentas})
+        return {
+            c.pk: c
+            for c in CuentaFinanciera.objects.select_for_update().filter(pk__in=pks).order_by("pk")
+        }
+    
     @staticmethod
     def validar_saldo_disponible(cuenta, monto):
         """
-        Calcula el saldo actual de una cuenta y verifica si tiene fondos suficientes.
+        Verifica si la cuenta tiene fondos suficientes según su saldo_actual
+        (materializado por finanzas_app.ledger, sin recorrer el histórico).
+        Para que el resultado siga valiendo al crear los movimientos, la
+        cuenta debe venir de bloquear_cuentas() en la misma transacción.
         Retorna (saldo_actual, tiene_fondos, mensaje)
         """
-        from django.db.models import Sum, Q
-        
-        # Calcular saldo actual
-        totales = MovimientoFinanciero.objects.filter(
-            cuenta=cuenta
-        ).exclude(estado="anulado").aggregate(
-            ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-            egresos=Sum("monto", filter=Q(tipo="egreso")),
-        )
-        
-        ingresos = totales.get("ingresos") or Decimal("0")
-        egresos = totales.get("egresos") or Decimal("0")
-        saldo_actual = cuenta.saldo_inicial + ingresos - egresos
+        saldo_actual = cuenta.saldo_actual
         
         tiene_fondos = saldo_actual >= monto
         
@@ -56,7 +60,8 @@ class TransferenciaService:
         usuario,
         descripcion="",
         referencia="",
-        validar_saldo=True
+        validar_saldo=True,
+        tenant=None
     ):
         """
         Crea una transferencia entre dos cuentas.
@@ -70,6 +75,7 @@ class TransferenciaService:
             descripcion: str opcional
             referencia: str opcional
             validar_saldo: bool, si True valida que haya fondos (default True)
+            tenant: Tenant de las cuentas (default: el de cuenta_origen)
         
         Returns:
             tuple (movimiento_envio, movimiento_recepcion)
@@ -91,17 +97,12 @@ class TransferenciaService:
         if monto <= 0:
             raise ValidationError("El monto debe ser mayor a cero.")
         
-        # Validar saldo si está habilitado
-        if validar_saldo:
-            saldo_actual, tiene_fondos, mensaje = TransferenciaService.validar_saldo_disponible(
-                cuenta_origen, monto
-            )
-            if not tiene_fondos:
-                raise ValidationError(mensaje)
+        tenant = tenant or cuenta_origen.tenant
         
         # Obtener categorías especiales
         try:
             categoria_enviada = CategoriaMovimiento.objects.get(
+                tenant=tenant,
                 nombre="Transferencia enviada",
                 tipo="egreso"
             )
@@ -113,6 +114,7 @@ class TransferenciaService:
         
         try:
             categoria_recibida = CategoriaMovimiento.objects.get(
+                tenant=tenant,
                 nombre="Transferencia recibida",
                 tipo="ingreso"
             )
@@ -129,11 +131,24 @@ class TransferenciaService:
         if not descripcion:
             descripcion = f"Transferencia de {cuenta_origen.nombre} a {cuenta_destino.nombre}"
         
-        # Crear ambos movimientos en una transacción atómica
+        # Validar saldo y crear ambos movimientos en una transacción atómica
         try:
             with transaction.atomic():
+                # ✅ Las cuentas quedan bloqueadas hasta el commit: dos
+                #    transferencias simultáneas no pueden pasar ambas la validación
+                cuentas = TransferenciaService.bloquear_cuentas(cuenta_origen, cuenta_destino)
+                
+                # Validar saldo si está habilitado
+                if validar_saldo:
+                    saldo_actual, tiene_fondos, mensaje = TransferenciaService.validar_saldo_disponible(
+                        cuentas[cuenta_origen.pk], monto
+                    )
+                    if not tiene_fondos:
+                        raise ValidationError(mensaje)
+                
                 # Movimiento 1: EGRESO en cuenta origen
                 movimiento_envio = MovimientoFinanciero.objects.create(
+                    tenant=tenant,
                     fecha=fecha,
                     tipo="egreso",
                     cuenta=cuenta_origen,
@@ -149,6 +164,7 @@ class TransferenciaService:
                 
                 # Movimiento 2: INGRESO en cuenta destino
                 movimiento_recepcion = MovimientoFinanciero.objects.create(
+                    tenant=tenant,
                     fecha=fecha,
                     tipo="ingreso",
                     cuenta=cuenta_destino,
@@ -164,6 +180,8 @@ class TransferenciaService:
                 
                 return (movimiento_envio, movimiento_recepcion)
         
+        except ValidationError:
+            raise
         except Exception as e:
             raise ValidationError(f"Error al crear la transferencia: {str(e)}")
     
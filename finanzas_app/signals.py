@@ -0,0 +1,115 @@
+# finanzas_app/signals.py
+# Mantiene el resumen mensual y el saldo de las cuentas (finanzas_app.ledger)
+# al día con cada alta, edición, anulación o borrado de MovimientoFinanciero.
+# MovimientoFinanciero.save()/delete() corren en una transacción, así que
+# el movimiento y su resumen se confirman juntos.
+#
+# OJO: QuerySet.update() y bulk_create() no disparan signals. Quien los use
+# sobre movimientos debe llamar después a ledger.reconstruir(tenant) y
+# ledger.reconstruir_saldos(tenant) (ambas suben la versión del libro), o,
+# para altas con bulk_create, a ledger.registrar_lote(movimientos) +
+# cache_reportes.tocar_libro(tenant) (ver finanzas_app.importacion).
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import cache_reportes, f001, ledger
+from .models import (
+    CasillaF001,
+    CategoriaMovimiento,
+    CuentaFinanciera,
+    CuentaPorPagar,
+    MovimientoFinanciero,
+    ProveedorFinanciero,
+)
+
+
+@receiver(pre_save, sender=MovimientoFinanciero)
+def movimiento_pre_save(sender, instance, raw=False, **kwargs):
+    """Guarda lo que el movimiento aportaba al resumen antes de este save."""
+    instance._aporte_anterior = None
+    if raw or not instance.pk:
+        return
+    datos = (
+        MovimientoFinanciero.objects.filter(pk=instance.pk)
+        .values(*ledger.CAMPOS_APORTE)
+        .first()
+    )
+    instance._aporte_anterior = ledger.aporte(datos)
+
+
+@receiver(post_save, sender=MovimientoFinanciero)
+def movimiento_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ledger.registrar_cambio(
+        getattr(instance, "_aporte_anterior", None),
+        ledger.aporte(ledger.datos_de(instance)),
+    )
+    instance._aporte_anterior = None
+
+
+@receiver(post_delete, sender=MovimientoFinanciero)
+def movimiento_post_delete(sender, instance, **kwargs):
+    ledger.registrar_cambio(ledger.aporte(ledger.datos_de(instance)), None)
+
+
+# =============================================================================
+# VERSIÓN DEL LIBRO (cache de reportes)
+# =============================================================================
+# Cualquier escritura que cambie lo que muestran los reportes sube la versión
+# del libro del tenant (finanzas_app.cache_reportes). Los catálogos entran
+# porque los reportes muestran sus nombres.
+
+MODELOS_DEL_LIBRO = (
+    MovimientoFinanciero,
+    CuentaPorPagar,
+    CuentaFinanciera,
+    CategoriaMovimiento,
+    ProveedorFinanciero,
+)
+
+
+def libro_modificado(sender, instance, raw=False, **kwargs):
+    if raw or not getattr(instance, "tenant_id", None):
+        return
+    cache_reportes.tocar_libro(instance.tenant_id)
+
+
+for _modelo in MODELOS_DEL_LIBRO:
+    post_save.connect(libro_modificado, sender=_modelo, dispatch_uid=f"libro_save_{_modelo.__name__}")
+    post_delete.connect(libro_modificado, sender=_modelo, dispatch_uid=f"libro_delete_{_modelo.__name__}")
+
+
+# =============================================================================
+# INFORME F.001
+# =============================================================================
+# Los cambios de movimientos los marca ledger por mes. Aquí, lo que cambia
+# qué casilla recibe cada categoría afecta a todos los meses abiertos.
+
+@receiver(pre_save, sender=CategoriaMovimiento)
+def categoria_pre_save(sender, instance, raw=False, **kwargs):
+    instance._casilla_anterior = None
+    if raw or not instance.pk:
+        return
+    instance._casilla_anterior = (
+        CategoriaMovimiento.objects.filter(pk=instance.pk)
+        .values_list("casilla_f001_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=CategoriaMovimiento)
+def categoria_post_save(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    if getattr(instance, "_casilla_anterior", None) != instance.casilla_f001_id:
+        f001.invalidar_abiertos(instance.tenant_id)
+
+
+@receiver(post_save, sender=CasillaF001)
+@receiver(post_delete, sender=CasillaF001)
+def casilla_modificada(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    f001.invalidar_abiertos()
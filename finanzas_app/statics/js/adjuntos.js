@@ -92,7 +92,11 @@ class AdjuntosManager {
             
             if (data.success) {
                 this.renderAdjunto(data.adjunto, true);
-                this.mostrarExito(`Archivo "${file.name}" subido correctamente`);
+                if (data.duplicado) {
+                    this.mostrarExito(`"${file.name}" ya estaba adjunto (movimiento #${data.duplicado_de}); se reutilizó el archivo existente`);
+                } else {
+                    this.mostrarExito(`Archivo "${file.name}" subido correctamente`);
+                }
             } else {
                 this.mostrarError(data.error || 'Error al subir archivo');
             }
@@ -142,10 +146,11 @@ class AdjuntosManager {
         
         // Si es imagen, mostrar preview
         let contenido = '';
+        // Miniatura en el listado; al hacer clic, la versión optimizada (sin EXIF)
         if (adjunto.es_imagen && adjunto.url_imagen) {
             contenido = `
-                <a href="${adjunto.url_descarga}" target="_blank" class="attach-image-preview">
-                    <img src="${adjunto.url_imagen}" alt="${adjunto.nombre}" />
+                <a href="${adjunto.url_imagen}" target="_blank" class="attach-image-preview">
+                    <img src="${adjunto.url_miniatura || adjunto.url_imagen}" alt="${adjunto.nombre}" loading="lazy" />
                 </a>
             `;
         } else {
@@ -8,6 +8,7 @@ app_name = "finanzas_app"
 urlpatterns = [
     # Dashboard
     path("", views.dashboard, name="dashboard"),
+    path("api/dashboard/", views.dashboard_api, name="dashboard_api"),
     
     # Cuentas financieras
     path("cuentas/", views.cuentas_listado, name="cuentas_listado"),
@@ -28,6 +29,8 @@ urlpatterns = [
     path("movimientos/<int:pk>/editar/", views.movimiento_editar, name="movimiento_editar"),
     path("movimientos/<int:pk>/anular/", views.movimiento_anular, name="movimiento_anular"),
     path("movimientos/imprimir/", views.movimientos_listado_print, name="movimientos_listado_print"),
+    path("movimientos/exportar/<str:formato>/", views.movimientos_exportar, name="movimientos_exportar"),
+    path("movimientos/importar/", views.movimientos_importar, name="movimientos_importar"),
     
     # Ingresos
     path("ingresos/nuevo/", views.ingreso_crear, name="ingreso_crear"),
@@ -88,4 +91,5 @@ urlpatterns = [
     path("reportes/ingresos-por-unidad/", views.reporte_ingresos_por_unidad, name="reporte_ingresos_por_unidad"),
     path("reportes/movimientos-unidad/", views.reporte_movimientos_unidad, name="reporte_movimientos_unidad"),
     path("reportes/f001/", views.reporte_f001_concilio, name="reporte_f001_concilio"),
+    path("reportes/f001/cerrar/", views.reporte_f001_cerrar, name="reporte_f001_cerrar"),
 ]
\ No newline at end of file
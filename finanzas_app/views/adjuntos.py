@@ -5,8 +5,8 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.views.decorators.http import require_GET, require_POST
 from django.http import JsonResponse, FileResponse, Http404
 from django.core.exceptions import ValidationError
-import os
 
+from ..adjuntos import guardar_adjunto, eliminar_adjunto as eliminar_adjunto_y_archivos
 from ..models import MovimientoFinanciero, AdjuntoMovimiento
 from ..validators import validar_archivo, validar_tamaño_total
 
@@ -34,28 +34,19 @@ def subir_adjunto(request, movimiento_id):
         validar_archivo(archivo)
         validar_tamaño_total(movimiento, archivo.size)
 
-        adjunto = AdjuntoMovimiento.objects.create(
-            movimiento=movimiento,
-            archivo=archivo,
-            nombre_original=archivo.name,
-            tamaño=archivo.size,
+        # El archivo se guarda por hash; las versiones derivadas se generan en segundo plano
+        adjunto, original = guardar_adjunto(
+            movimiento,
+            archivo,
+            usuario=request.user,
             tipo_mime=archivo.content_type,
-            subido_por=request.user
         )
 
         return JsonResponse({
             "success": True,
-            "adjunto": {
-                "id": adjunto.id,
-                "nombre": adjunto.nombre_original,
-                "tamaño": adjunto.tamaño_formateado(),
-                "icono": adjunto.get_icono(),
-                "url_descarga": f"/finanzas/adjuntos/{adjunto.id}/descargar/",
-                "url_eliminar": f"/finanzas/adjuntos/{adjunto.id}/eliminar/",
-                "puede_eliminar": adjunto.puede_eliminar(request.user),
-                "es_imagen": adjunto.es_imagen(),
-                "url_imagen": adjunto.archivo.url if adjunto.es_imagen() else None,
-            }
+            "adjunto": _serializar(adjunto, request.user),
+            "duplicado": original is not None,
+            "duplicado_de": original.movimiento_id if original is not None else None,
         })
 
     except ValidationError as e:
@@ -88,11 +79,8 @@ def eliminar_adjunto(request, adjunto_id):
     try:
         nombre = adjunto.nombre_original
 
-        if adjunto.archivo:
-            if os.path.isfile(adjunto.archivo.path):
-                os.remove(adjunto.archivo.path)
-
-        adjunto.delete()
+        # ⚠️ El archivo puede estar compartido con otros adjuntos (mismo hash)
+        eliminar_adjunto_y_archivos(adjunto)
 
         return JsonResponse({
             "success": True,
@@ -120,7 +108,7 @@ def descargar_adjunto(request, adjunto_id):
         raise Http404("Archivo no encontrado")
 
     try:
-        archivo = open(adjunto.archivo.path, 'rb')
+        archivo = adjunto.archivo.open('rb')
         response = FileResponse(archivo)
 
         response['Content-Type'] = adjunto.tipo_mime or 'application/octet-stream'
@@ -145,21 +133,13 @@ def listar_adjuntos(request, movimiento_id):
     tenant = request.tenant  # 👈 TENANT
     movimiento = get_object_or_404(MovimientoFinanciero, pk=movimiento_id, tenant=tenant)  # 👈 FILTRAR POR TENANT
 
-    adjuntos = AdjuntoMovimiento.objects.filter(movimiento=movimiento)
+    adjuntos = AdjuntoMovimiento.objects.filter(movimiento=movimiento).select_related("subido_por")
 
     data = {
         "success": True,
         "adjuntos": [
             {
-                "id": adj.id,
-                "nombre": adj.nombre_original,
-                "tamaño": adj.tamaño_formateado(),
-                "icono": adj.get_icono(),
-                "url_descarga": f"/finanzas/adjuntos/{adj.id}/descargar/",
-                "url_eliminar": f"/finanzas/adjuntos/{adj.id}/eliminar/",
-                "puede_eliminar": adj.puede_eliminar(request.user),
-                "es_imagen": adj.es_imagen(),
-                "url_imagen": adj.archivo.url if adj.es_imagen() else None,
+                **_serializar(adj, request.user),
                 "subido_por": adj.subido_por.get_full_name() if adj.subido_por else "Sistema",
                 "subido_en": adj.subido_en.strftime("%d/%m/%Y %H:%M"),
             }
@@ -167,4 +147,25 @@ def listar_adjuntos(request, movimiento_id):
         ]
     }
 
-    return JsonResponse(data)
\ No newline at end of file
+    return JsonResponse(data)
+
+
+def _serializar(adj, usuario):
+    """
+    Datos de un adjunto para el JS. En listados se usa la miniatura; mientras
+    se genera (o si falló) se cae a la versión optimizada / original.
+    """
+    es_imagen = adj.es_imagen()
+    return {
+        "id": adj.id,
+        "nombre": adj.nombre_original,
+        "tamaño": adj.tamaño_formateado(),
+        "icono": adj.get_icono(),
+        "url_descarga": f"/finanzas/adjuntos/{adj.id}/descargar/",
+        "url_eliminar": f"/finanzas/adjuntos/{adj.id}/eliminar/",
+        "puede_eliminar": adj.puede_eliminar(usuario),
+        "es_imagen": es_imagen,
+        "url_imagen": adj.url_vista() if es_imagen else None,
+        "url_miniatura": (adj.url_miniatura() or adj.url_vista()) if es_imagen else None,
+        "estado": adj.estado_proceso,
+    }
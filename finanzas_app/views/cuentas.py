@@ -7,8 +7,8 @@ from django.views.decorators.http import require_GET, require_POST, require_http
 from django.db.models import Sum, Q
 from decimal import Decimal
 
+from .. import ledger
 from ..models import (
-    MovimientoFinanciero,
     CuentaFinanciera,
 )
 from ..forms import CuentaFinancieraForm
@@ -33,20 +33,21 @@ def cuentas_listado(request):
     # Calcular saldo actual para cada cuenta
     cuentas_con_saldo = []
     saldo_total_general = Decimal("0")
+    totales_por_cuenta = {
+        fila["cuenta_id"]: fila
+        for fila in ledger.resumen(tenant).values("cuenta_id").annotate(
+            ingresos=Sum("total", filter=Q(tipo="ingreso")),
+            egresos=Sum("total", filter=Q(tipo="egreso")),
+        ).order_by()
+    }
 
     for cuenta in cuentas:
-        # Obtener totales de movimientos de esta cuenta (excluyendo anulados)
-        totales = MovimientoFinanciero.objects.filter(
-            tenant=tenant,  # 👈 FILTRAR POR TENANT
-            cuenta=cuenta
-        ).exclude(estado="anulado").aggregate(
-            ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-            egresos=Sum("monto", filter=Q(tipo="egreso")),
-        )
+        # Totales de movimientos de esta cuenta (excluyendo anulados)
+        totales = totales_por_cuenta.get(cuenta.pk, {})
 
         ingresos = totales.get("ingresos") or Decimal("0")
         egresos = totales.get("egresos") or Decimal("0")
-        saldo_actual = cuenta.saldo_inicial + ingresos - egresos
+        saldo_actual = cuenta.saldo_actual  # materializado por finanzas_app.ledger
 
         # Agregar datos calculados
         cuentas_con_saldo.append({
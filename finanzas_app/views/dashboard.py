@@ -2,13 +2,17 @@
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
-from django.views.decorators.http import require_GET
+from django.views.decorators.http import condition, require_GET
 from django.db.models import Sum, Q
 from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.formats import date_format
 from decimal import Decimal
-import json
-import datetime
 
+from .. import cache_reportes, ledger
 from ..models import (
     MovimientoFinanciero,
     CuentaFinanciera,
@@ -40,230 +44,207 @@ def egreso_recibo(request, pk):
     )
 
 
-@login_required
-def dashboard(request):
-    u = request.user
-    tenant = request.tenant  # 👈 TENANT
-
-    # Si NO tiene permiso de ver dashboard, lo mandamos a una pantalla permitida
-    if not (u.is_superuser or u.has_perm("finanzas_app.ver_dashboard_finanzas")):
-        if u.has_perm("finanzas_app.view_movimientofinanciero"):
-            return redirect("finanzas_app:movimientos_listado")
-
-        if u.has_perm("finanzas_app.view_cuentaporpagar"):
-            return redirect("finanzas_app:cxp_list")
+def _puede_ver_dashboard(user):
+    return user.is_superuser or user.has_perm("finanzas_app.ver_dashboard_finanzas")
 
-        if u.has_perm("finanzas_app.view_proveedorfinanciero"):
-            return redirect("finanzas_app:proveedores_list")
-
-        if u.has_perm("finanzas_app.view_cuentafinanciera"):
-            return redirect("finanzas_app:cuentas_listado")
 
-        if u.has_perm("finanzas_app.view_categoriamovimiento"):
-            return redirect("finanzas_app:categorias_listado")
+NOMBRES_MESES = [
+    "", "Ene", "Feb", "Mar", "Abr", "May", "Jun",
+    "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"
+]
 
-        raise PermissionDenied("No tienes permisos para acceder al módulo de Finanzas.")
 
-    from django.db.models.functions import TruncMonth
+def datos_dashboard(tenant, hoy):
+    """
+    KPIs del dashboard como dict serializable a JSON (Decimal -> str con
+    DjangoJSONEncoder): totales del mes e históricos, serie de 6 meses,
+    dona de ingresos por categoría, saldos por cuenta y últimos movimientos.
+    """
     from dateutil.relativedelta import relativedelta
 
-    hoy = datetime.date.today()
+    # Totales desde el resumen mensual (ResumenMensualMovimiento), no desde
+    # todo el histórico de movimientos
+    resumen_mes = ledger.resumen(tenant, anio=hoy.year, mes=hoy.month)  # 👈 FILTRA POR TENANT
 
     # ---- TOTALES DEL MES ACTUAL ----
-    movimientos_mes = MovimientoFinanciero.objects.filter(
-        tenant=tenant,  # 👈 FILTRAR POR TENANT
-        fecha__year=hoy.year,
-        fecha__month=hoy.month
-    ).exclude(estado="anulado")
-
-    totales_mes = movimientos_mes.aggregate(
-        ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-        egresos=Sum("monto", filter=Q(tipo="egreso")),
+    totales_mes = resumen_mes.aggregate(
+        ingresos=Sum("total", filter=Q(tipo="ingreso")),
+        egresos=Sum("total", filter=Q(tipo="egreso")),
+        num_movimientos=Sum("cantidad"),
+        num_ingresos=Sum("cantidad", filter=Q(tipo="ingreso")),
     )
 
     ingresos_mes = totales_mes.get("ingresos") or Decimal("0")
     egresos_mes = totales_mes.get("egresos") or Decimal("0")
-    balance_mes = ingresos_mes - egresos_mes
+    count_ingresos = totales_mes.get("num_ingresos") or 0
 
     # ---- TOTALES GENERALES (histórico) ----
-    totales_historico = MovimientoFinanciero.objects.filter(
-        tenant=tenant  # 👈 FILTRAR POR TENANT
-    ).exclude(
-        estado="anulado"
-    ).aggregate(
-        ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-        egresos=Sum("monto", filter=Q(tipo="egreso")),
+    totales_historico = ledger.resumen(tenant).aggregate(
+        ingresos=Sum("total", filter=Q(tipo="ingreso")),
+        egresos=Sum("total", filter=Q(tipo="egreso")),
     )
 
     ingresos_total = totales_historico.get("ingresos") or Decimal("0")
     egresos_total = totales_historico.get("egresos") or Decimal("0")
     balance_total = ingresos_total - egresos_total
 
-    # ---- SALDO TOTAL EN CUENTAS ----
-    saldo_inicial_cuentas = CuentaFinanciera.objects.filter(
-        tenant=tenant,  # 👈 FILTRAR POR TENANT
-        esta_activa=True
-    ).aggregate(total=Sum("saldo_inicial"))["total"] or Decimal("0")
-
-    saldo_actual = saldo_inicial_cuentas + balance_total
-
-    # ---- ÚLTIMOS MOVIMIENTOS ----
-    ultimos_movimientos = MovimientoFinanciero.objects.filter(
-        tenant=tenant  # 👈 FILTRAR POR TENANT
-    ).select_related(
-        "cuenta", "categoria"
-    ).exclude(estado="anulado").order_by("-fecha", "-creado_en")[:10]
+    # ---- CUENTAS ACTIVAS ----
+    # saldo_actual está materializado en la cuenta (finanzas_app.ledger)
+    cuentas = list(
+        CuentaFinanciera.objects.filter(tenant=tenant, esta_activa=True)  # 👈 FILTRAR POR TENANT
+    )
+    saldo_inicial_cuentas = sum((c.saldo_inicial or Decimal("0") for c in cuentas), Decimal("0"))
 
-    # ---- DATOS PARA GRÁFICO DE BARRAS (últimos 6 meses) ----
+    # ---- SERIE DE LOS ÚLTIMOS 6 MESES ----
     meses_atras = 6
     fecha_inicio_grafico = (hoy - relativedelta(months=meses_atras-1)).replace(day=1)
 
-    datos_mensuales = MovimientoFinanciero.objects.filter(
-        tenant=tenant,  # 👈 FILTRAR POR TENANT
-        fecha__gte=fecha_inicio_grafico
-    ).exclude(estado="anulado").annotate(
-        mes=TruncMonth("fecha")
-    ).values("mes", "tipo").annotate(
-        total=Sum("monto")
-    ).order_by("mes")
-
-    # Preparar estructura para el gráfico
-    meses_labels = []
-    ingresos_por_mes = []
-    egresos_por_mes = []
-
-    NOMBRES_MESES = [
-        "", "Ene", "Feb", "Mar", "Abr", "May", "Jun",
-        "Jul", "Ago", "Sep", "Oct", "Nov", "Dic"
-    ]
+    # Una sola consulta agrupada por año/mes; luego se pivota en memoria
+    datos_mensuales = ledger.totales_por_mes(
+        tenant, desde=(fecha_inicio_grafico.year, fecha_inicio_grafico.month)
+    )
 
+    serie = {"labels": [], "ingresos": [], "egresos": []}
     for i in range(meses_atras):
         fecha_mes = (hoy - relativedelta(months=meses_atras-1-i)).replace(day=1)
-        meses_labels.append(f"{NOMBRES_MESES[fecha_mes.month]} {fecha_mes.year}")
-
-        ingreso_mes_i = Decimal("0")
-        egreso_mes_i = Decimal("0")
-
-        for dato in datos_mensuales:
-            if dato["mes"].year == fecha_mes.year and dato["mes"].month == fecha_mes.month:
-                if dato["tipo"] == "ingreso":
-                    ingreso_mes_i = dato["total"]
-                else:
-                    egreso_mes_i = dato["total"]
-
-        ingresos_por_mes.append(float(ingreso_mes_i))
-        egresos_por_mes.append(float(egreso_mes_i))
-
-    # ---- DATOS PARA GRÁFICO DE DONA (distribución por categoría - mes actual) ----
-    distribucion_ingresos = MovimientoFinanciero.objects.filter(
-        tenant=tenant,  # 👈 FILTRAR POR TENANT
-        tipo="ingreso",
-        fecha__year=hoy.year,
-        fecha__month=hoy.month
-    ).exclude(estado="anulado").values(
-        "categoria__nombre"
-    ).annotate(
-        total=Sum("monto")
-    ).order_by("-total")[:6]
-
-    categorias_labels = [d["categoria__nombre"] for d in distribucion_ingresos]
-    categorias_valores = [float(d["total"]) for d in distribucion_ingresos]
-
-    # Si no hay datos, poner placeholder
-    if not categorias_labels:
-        categorias_labels = ["Sin datos"]
-        categorias_valores = [0]
-
-    # ---- RESUMEN POR CUENTA ----
-    cuentas_resumen = []
-    for cuenta in CuentaFinanciera.objects.filter(tenant=tenant, esta_activa=True):  # 👈 FILTRAR POR TENANT
-        movs_cuenta = MovimientoFinanciero.objects.filter(
-            tenant=tenant,  # 👈 FILTRAR POR TENANT
-            cuenta=cuenta
-        ).exclude(estado="anulado").aggregate(
-            ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-            egresos=Sum("monto", filter=Q(tipo="egreso")),
-        )
-
-        ing = movs_cuenta.get("ingresos") or Decimal("0")
-        egr = movs_cuenta.get("egresos") or Decimal("0")
-        saldo = cuenta.saldo_inicial + ing - egr
-
-        cuentas_resumen.append({
-            "cuenta": cuenta,
-            "saldo_actual": saldo,
-            "ingresos": ing,
-            "egresos": egr,
-        })
-
-    # ---- ESTADÍSTICAS RÁPIDAS ----
-    total_movimientos_mes = movimientos_mes.count()
-    count_ingresos = movimientos_mes.filter(tipo="ingreso").count()
-    promedio_ingreso = ingresos_mes / max(count_ingresos, 1)
-
-    # ---- TOP CATEGORÍAS DEL MES ----
-    top_categorias_ingreso = MovimientoFinanciero.objects.filter(
-        tenant=tenant,  # 👈 FILTRAR POR TENANT
-        tipo="ingreso",
-        fecha__year=hoy.year,
-        fecha__month=hoy.month
-    ).exclude(estado="anulado").values(
-        "categoria__nombre"
-    ).annotate(
-        total=Sum("monto")
-    ).order_by("-total")[:5]
-
-    top_categorias_egreso = MovimientoFinanciero.objects.filter(
-        tenant=tenant,  # 👈 FILTRAR POR TENANT
-        tipo="egreso",
-        fecha__year=hoy.year,
-        fecha__month=hoy.month
-    ).exclude(estado="anulado").values(
-        "categoria__nombre"
-    ).annotate(
-        total=Sum("monto")
-    ).order_by("-total")[:5]
+        dato = datos_mensuales.get((fecha_mes.year, fecha_mes.month), {})
+        serie["labels"].append(f"{NOMBRES_MESES[fecha_mes.month]} {fecha_mes.year}")
+        serie["ingresos"].append(float(dato.get("ingresos") or 0))
+        serie["egresos"].append(float(dato.get("egresos") or 0))
 
-    context = {
-        # Resumen del mes
-        "resumen": {
-            "ingresos_mes": ingresos_mes,
-            "egresos_mes": egresos_mes,
-            "balance": balance_mes,
+    # ---- DONA: distribución de ingresos por categoría (mes actual) ----
+    distribucion_ingresos = ledger.por_categoria(resumen_mes.filter(tipo="ingreso"), limite=6)
+
+    # ---- ÚLTIMOS MOVIMIENTOS ----
+    ultimos_movimientos = MovimientoFinanciero.objects.filter(
+        tenant=tenant  # 👈 FILTRAR POR TENANT
+    ).exclude(estado="anulado").order_by("-fecha", "-creado_en").values(
+        "id", "fecha", "tipo", "es_transferencia", "categoria__nombre", "cuenta__nombre", "monto"
+    )[:10]
+
+    return {
+        "mes": {
+            "anio": hoy.year,
+            "mes": hoy.month,
+            "ingresos": ingresos_mes,
+            "egresos": egresos_mes,
+            "balance": ingresos_mes - egresos_mes,
+            "num_movimientos": totales_mes.get("num_movimientos") or 0,
+            "promedio_ingreso": (ingresos_mes / max(count_ingresos, 1)).quantize(Decimal("0.01")),
         },
-        # Totales históricos
         "historico": {
-            "ingresos_total": ingresos_total,
-            "egresos_total": egresos_total,
-            "balance_total": balance_total,
+            "ingresos": ingresos_total,
+            "egresos": egresos_total,
+            "balance": balance_total,
+        },
+        "saldo_actual": saldo_inicial_cuentas + balance_total,
+        "serie_6_meses": serie,
+        "dona_ingresos": {
+            "labels": [d["categoria__nombre"] for d in distribucion_ingresos],
+            "valores": [float(d["total"]) for d in distribucion_ingresos],
         },
-        # Saldo actual
-        "saldo_actual": saldo_actual,
-        # Últimos movimientos
-        "ultimos_movimientos": ultimos_movimientos,
-        # Datos para gráfico de barras (JSON)
-        "grafico_barras": json.dumps({
-            "labels": meses_labels,
-            "ingresos": ingresos_por_mes,
-            "egresos": egresos_por_mes,
-        }),
-        # Datos para gráfico de dona (JSON)
-        "grafico_dona": json.dumps({
-            "labels": categorias_labels,
-            "valores": categorias_valores,
-        }),
-        # Resumen por cuenta
-        "cuentas_resumen": cuentas_resumen,
-        # Top categorías
-        "top_categorias_ingreso": top_categorias_ingreso,
-        "top_categorias_egreso": top_categorias_egreso,
-        # Estadísticas
-        "stats": {
-            "total_movimientos_mes": total_movimientos_mes,
-            "promedio_ingreso": promedio_ingreso,
+        "cuentas": [
+            {
+                "id": c.pk,
+                "nombre": c.nombre,
+                "tipo": c.get_tipo_display(),
+                "moneda": c.moneda,
+                "saldo_actual": c.saldo_actual,
+            }
+            for c in cuentas
+        ],
+        "top_categorias": {
+            "ingreso": ledger.por_categoria(resumen_mes.filter(tipo="ingreso"), limite=5),
+            "egreso": ledger.por_categoria(resumen_mes.filter(tipo="egreso"), limite=5),
         },
+        "ultimos_movimientos": [
+            {
+                "id": m["id"],
+                "fecha": m["fecha"],
+                "tipo": m["tipo"],
+                "es_transferencia": m["es_transferencia"],
+                "categoria": m["categoria__nombre"],
+                "cuenta": m["cuenta__nombre"],
+                "monto": m["monto"],
+            }
+            for m in ultimos_movimientos
+        ],
+    }
+
+
+@login_required
+def dashboard(request):
+    """
+    Página del dashboard. Solo pinta el esqueleto: los KPIs los trae el
+    navegador de dashboard_api, que responde 304 mientras el libro del
+    tenant no cambie.
+    """
+    u = request.user
+
+    # Si NO tiene permiso de ver dashboard, lo mandamos a una pantalla permitida
+    if not _puede_ver_dashboard(u):
+        if u.has_perm("finanzas_app.view_movimientofinanciero"):
+            return redirect("finanzas_app:movimientos_listado")
+
+        if u.has_perm("finanzas_app.view_cuentaporpagar"):
+            return redirect("finanzas_app:cxp_list")
+
+        if u.has_perm("finanzas_app.view_proveedorfinanciero"):
+            return redirect("finanzas_app:proveedores_list")
+
+        if u.has_perm("finanzas_app.view_cuentafinanciera"):
+            return redirect("finanzas_app:cuentas_listado")
+
+        if u.has_perm("finanzas_app.view_categoriamovimiento"):
+            return redirect("finanzas_app:categorias_listado")
+
+        raise PermissionDenied("No tienes permisos para acceder al módulo de Finanzas.")
+
+    hoy = timezone.localdate()
+    context = {
+        "api_url": reverse("finanzas_app:dashboard_api"),
         # Info de fecha
-        "mes_actual": hoy.strftime("%B %Y").capitalize(),
+        "mes_actual": date_format(hoy, "F Y").capitalize(),
         "fecha_hoy": hoy,
     }
-    return render(request, "finanzas_app/dashboard.html", context)
\ No newline at end of file
+    return render(request, "finanzas_app/dashboard.html", context)
+
+
+# ----------------------------------------------------------
+# API JSON DEL DASHBOARD (GET condicional)
+# ----------------------------------------------------------
+# ETag y Last-Modified salen de la versión del libro del tenant
+# (cache_reportes.estado_libro, una consulta memoizada por request). La
+# fecha entra en el ETag porque "el mes actual" cambia aunque el libro no.
+
+def _etag_dashboard(request):
+    version, _ = cache_reportes.estado_libro(request.tenant)
+    return f"fin-dashboard-{request.tenant.pk}-v{version}-{timezone.localdate().isoformat()}"
+
+
+def _ultima_modificacion_dashboard(request):
+    return cache_reportes.estado_libro(request.tenant)[1]
+
+
+@condition(etag_func=_etag_dashboard, last_modified_func=_ultima_modificacion_dashboard)
+def _dashboard_json(request):
+    hoy = timezone.localdate()
+    datos = cache_reportes.reporte_cacheado(
+        request, "dashboard", lambda: datos_dashboard(request.tenant, hoy)
+    )
+    response = JsonResponse(datos)
+    # El navegador guarda la respuesta pero revalida siempre (If-None-Match)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+@require_GET
+def dashboard_api(request):
+    """
+    KPIs del dashboard en JSON. Responde 304 Not Modified si el cliente ya
+    tiene la versión actual (If-None-Match / If-Modified-Since).
+    """
+    if not _puede_ver_dashboard(request.user):
+        return JsonResponse({"error": "No tienes permiso para ver el dashboard de Finanzas."}, status=403)
+    return _dashboard_json(request)
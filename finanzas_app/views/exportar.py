@@ -0,0 +1,144 @@
+# finanzas_app/views/exportar.py
+"""
+Exportación masiva de movimientos (CSV / XLSX) con los mismos filtros de
+movimientos_listado.
+
+Pensada para auditorías de varios años: las filas se leen con
+.values_list().iterator(chunk_size=...) (sin instanciar modelos ni cargar el
+queryset completo) y se escriben a medida que llegan:
+  - CSV  -> StreamingHttpResponse (el worker nunca tiene el archivo en memoria)
+  - XLSX -> openpyxl en modo write_only sobre un archivo temporal en disco
+"""
+import csv
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required, permission_required
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+
+from ..models import MovimientoFinanciero
+from .movimientos import filtrar_movimientos
+
+# Filas por viaje a la BD (en PostgreSQL usa un cursor del lado del servidor)
+EXPORT_CHUNK_SIZE = getattr(settings, "SOID_FINANZAS_EXPORT_CHUNK", 2000)
+
+COLUMNAS = [
+    ("fecha", "Fecha"),
+    ("tipo", "Tipo"),
+    ("es_transferencia", "Transferencia"),
+    ("cuenta__nombre", "Cuenta"),
+    ("categoria__codigo", "Código categoría"),
+    ("categoria__nombre", "Categoría"),
+    ("descripcion", "Descripción"),
+    ("referencia", "Referencia"),
+    ("forma_pago", "Forma de pago"),
+    ("persona_asociada__nombres", "Nombres persona"),
+    ("persona_asociada__apellidos", "Apellidos persona"),
+    ("monto", "Monto"),
+    ("estado", "Estado"),
+    ("creado_por__username", "Registrado por"),
+    ("creado_en", "Registrado en"),
+]
+
+_TIPOS = dict(MovimientoFinanciero.TIPO_MOVIMIENTO_CHOICES)
+_FORMAS_PAGO = dict(MovimientoFinanciero.FORMA_PAGO_CHOICES)
+_ESTADOS = dict(MovimientoFinanciero.ESTADO_MOVIMIENTO_CHOICES)
+
+
+def _filas(request):
+    """Generador de filas (listas) ya formateadas para exportar."""
+    movimientos = MovimientoFinanciero.objects.filter(
+        tenant=request.tenant  # 👈 FILTRAR POR TENANT
+    ).exclude(estado="anulado").order_by("fecha", "creado_en", "pk")
+
+    movimientos, _ = filtrar_movimientos(movimientos, request.GET)
+
+    campos = [campo for campo, _ in COLUMNAS]
+
+    for fila in movimientos.values_list(*campos).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        datos = dict(zip(campos, fila))
+        yield [
+            datos["fecha"],
+            _TIPOS.get(datos["tipo"], datos["tipo"]),
+            "Sí" if datos["es_transferencia"] else "No",
+            datos["cuenta__nombre"] or "",
+            datos["categoria__codigo"] or "",
+            datos["categoria__nombre"] or "",
+            datos["descripcion"] or "",
+            datos["referencia"] or "",
+            _FORMAS_PAGO.get(datos["forma_pago"], datos["forma_pago"] or ""),
+            datos["persona_asociada__nombres"] or "",
+            datos["persona_asociada__apellidos"] or "",
+            datos["monto"],
+            _ESTADOS.get(datos["estado"], datos["estado"]),
+            datos["creado_por__username"] or "",
+            # Excel no admite fechas con zona horaria
+            timezone.localtime(datos["creado_en"]).replace(tzinfo=None, microsecond=0) if datos["creado_en"] else "",
+        ]
+
+
+def _nombre_archivo(extension):
+    return f"movimientos_{timezone.localdate():%Y%m%d}.{extension}"
+
+
+class _Eco:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _exportar_csv(request):
+    writer = csv.writer(_Eco())
+
+    def lineas():
+        # BOM para que Excel abra el archivo en UTF-8 (tildes y ñ)
+        yield "\ufeff"
+        yield writer.writerow([titulo for _, titulo in COLUMNAS])
+        for fila in _filas(request):
+            yield writer.writerow(fila)
+
+    response = StreamingHttpResponse(lineas(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{_nombre_archivo("csv")}"'
+    return response
+
+
+def _exportar_xlsx(request):
+    from openpyxl import Workbook
+
+    # write_only: openpyxl va escribiendo las filas en disco en lugar de
+    # mantener todas las celdas en memoria
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Movimientos")
+    ws.append([titulo for _, titulo in COLUMNAS])
+    for fila in _filas(request):
+        ws.append(fila)
+
+    archivo = tempfile.TemporaryFile(suffix=".xlsx")
+    wb.save(archivo)
+    archivo.seek(0)
+
+    # FileResponse envía el archivo por bloques y lo cierra (y borra) al terminar
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename=_nombre_archivo("xlsx"),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+@login_required
+@require_GET
+@permission_required("finanzas_app.view_movimientofinanciero", raise_exception=True)
+def movimientos_exportar(request, formato):
+    """
+    Descarga los movimientos (no anulados) con los filtros del listado:
+    tipo, cuenta, categoria, q, fecha_desde, fecha_hasta.
+    """
+    if formato == "csv":
+        return _exportar_csv(request)
+    if formato == "xlsx":
+        return _exportar_xlsx(request)
+    raise Http404("Formato de exportación no soportado.")
@@ -0,0 +1,64 @@
+# finanzas_app/views/importar.py
+"""
+Importación de extractos bancarios (CSV / XLSX) a movimientos.
+
+Flujo: el usuario sube el archivo con "Solo vista previa" marcado, revisa
+qué filas entran, cuáles son duplicadas y cuáles tienen errores, y vuelve a
+subirlo sin la vista previa para guardar. El trabajo pesado vive en
+finanzas_app.importacion.
+"""
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required, permission_required
+from django.core.exceptions import ValidationError
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods
+
+from ..forms import ImportarExtractoForm
+from ..importacion import importar_extracto
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+@permission_required("finanzas_app.add_movimientofinanciero", raise_exception=True)
+def movimientos_importar(request):
+    tenant = request.tenant  # 👈 TENANT
+    resultado = None
+
+    if request.method == "POST":
+        form = ImportarExtractoForm(request.POST, request.FILES, tenant=tenant)
+        if form.is_valid():
+            datos = form.cleaned_data
+            try:
+                resultado = importar_extracto(
+                    tenant,
+                    datos["archivo"],
+                    datos["cuenta"],
+                    categoria_ingreso=datos["categoria_ingreso"],
+                    categoria_egreso=datos["categoria_egreso"],
+                    mapeo=form.mapeo(),
+                    usuario=request.user,
+                    simulacion=datos["simulacion"],
+                )
+            except ValidationError as e:
+                messages.error(request, " ".join(e.messages))
+            else:
+                if not resultado.simulacion:
+                    messages.success(
+                        request,
+                        f"✅ Importación completada: {resultado.nuevas} movimiento(s) nuevos, "
+                        f"{resultado.duplicadas} duplicado(s) omitidos, "
+                        f"{resultado.con_error} fila(s) con error.",
+                    )
+                    if not resultado.con_error:
+                        return redirect(
+                            f"{reverse('finanzas_app:movimientos_listado')}?cuenta={datos['cuenta'].pk}"
+                        )
+    else:
+        form = ImportarExtractoForm(tenant=tenant)
+
+    context = {
+        "form": form,
+        "resultado": resultado,
+    }
+    return render(request, "finanzas_app/movimientos_importar.html", context)
@@ -4,6 +4,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.views.decorators.http import require_GET, require_POST, require_http_methods
+from django.db import transaction
 from django.db.models import Sum, Q
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.http import JsonResponse
@@ -27,28 +28,19 @@ from ..forms import (
 )
 
 
-@login_required
-@require_GET
-@permission_required("finanzas_app.view_movimientofinanciero", raise_exception=True)
-def movimientos_listado(request):
+def filtrar_movimientos(movimientos, params):
     """
-    Listado de movimientos financieros con filtros, totales y paginación.
+    Aplica los filtros del listado de movimientos (tipo, cuenta, categoria,
+    q, fecha_desde, fecha_hasta) tomados de `params` (request.GET).
+    Lo comparten movimientos_listado y la exportación CSV/XLSX.
+    Retorna (queryset, {filtro: valor_str}).
     """
-    tenant = request.tenant
-    
-    movimientos = MovimientoFinanciero.objects.filter(
-        tenant=tenant
-    ).select_related(
-        "cuenta", "categoria", "creado_por", "persona_asociada", "unidad"
-    ).exclude(estado="anulado").order_by("-fecha", "-creado_en")
-
-    # --------- FILTROS ----------
-    tipo = request.GET.get("tipo")
-    cuenta_id = request.GET.get("cuenta")
-    categoria_id = request.GET.get("categoria")
-    q = request.GET.get("q")
-    fecha_desde = request.GET.get("fecha_desde")
-    fecha_hasta = request.GET.get("fecha_hasta")
+    tipo = params.get("tipo")
+    cuenta_id = params.get("cuenta")
+    categoria_id = params.get("categoria")
+    q = params.get("q")
+    fecha_desde = params.get("fecha_desde")
+    fecha_hasta = params.get("fecha_hasta")
 
     if tipo == "transferencia":
         movimientos = movimientos.filter(es_transferencia=True)
@@ -76,6 +68,35 @@ def movimientos_listado(request):
     if fecha_hasta:
         movimientos = movimientos.filter(fecha__lte=fecha_hasta)
 
+    filtros = {
+        "tipo": tipo or "",
+        "cuenta": cuenta_id or "",
+        "categoria": categoria_id or "",
+        "q": q or "",
+        "fecha_desde": fecha_desde or "",
+        "fecha_hasta": fecha_hasta or "",
+    }
+    return movimientos, filtros
+
+
+@login_required
+@require_GET
+@permission_required("finanzas_app.view_movimientofinanciero", raise_exception=True)
+def movimientos_listado(request):
+    """
+    Listado de movimientos financieros con filtros, totales y paginación.
+    """
+    tenant = request.tenant
+    
+    movimientos = MovimientoFinanciero.objects.filter(
+        tenant=tenant
+    ).select_related(
+        "cuenta", "categoria", "creado_por", "persona_asociada", "unidad"
+    ).exclude(estado="anulado").order_by("-fecha", "-creado_en")
+
+    # --------- FILTROS ----------
+    movimientos, filtros = filtrar_movimientos(movimientos, request.GET)
+
     # --------- TOTALES ----------
     totales = movimientos.aggregate(
         total_ingresos=Sum("monto", filter=Q(tipo="ingreso")),
@@ -111,12 +132,12 @@ def movimientos_listado(request):
         "total_ingresos": total_ingresos,
         "total_egresos": total_egresos,
         "balance": balance,
-        "f_tipo": tipo or "",
-        "f_cuenta": cuenta_id or "",
-        "f_categoria": categoria_id or "",
-        "f_q": q or "",
-        "f_fecha_desde": fecha_desde or "",
-        "f_fecha_hasta": fecha_hasta or "",
+        "f_tipo": filtros["tipo"],
+        "f_cuenta": filtros["cuenta"],
+        "f_categoria": filtros["categoria"],
+        "f_q": filtros["q"],
+        "f_fecha_desde": filtros["fecha_desde"],
+        "f_fecha_hasta": filtros["fecha_hasta"],
     }
     return render(request, "finanzas_app/movimientos_listado.html", context)
 
@@ -324,16 +345,7 @@ def egreso_crear(request):
     umbral_saldo_bajo = Decimal("5000")
 
     for cuenta in CuentaFinanciera.objects.filter(tenant=tenant, esta_activa=True):
-        movs = MovimientoFinanciero.objects.filter(
-            tenant=tenant,
-            cuenta=cuenta
-        ).exclude(estado="anulado").aggregate(
-            ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-            egresos=Sum("monto", filter=Q(tipo="egreso")),
-        )
-        ing = movs.get("ingresos") or Decimal("0")
-        egr = movs.get("egresos") or Decimal("0")
-        saldo = cuenta.saldo_inicial + ing - egr
+        saldo = cuenta.saldo_actual  # materializado por finanzas_app.ledger
         cuentas_con_saldo[cuenta.id] = {
             "saldo": float(saldo),
             "nombre": cuenta.nombre,
@@ -348,21 +360,26 @@ def egreso_crear(request):
             monto = form.cleaned_data.get("monto")
 
             if cuenta and monto:
-                saldo_actual = Decimal(str(cuentas_con_saldo.get(cuenta.id, {}).get("saldo", 0)))
-                
-                if monto > saldo_actual:
+                mov = None
+                with transaction.atomic():
+                    # ✅ Saldo leído con la cuenta bloqueada hasta el commit:
+                    #    dos egresos simultáneos no pueden pasar ambos la validación
+                    saldo_actual = CuentaFinanciera.objects.select_for_update().get(pk=cuenta.pk).saldo_actual
+
+                    if monto <= saldo_actual:
+                        mov = form.save(commit=False)
+                        mov.tenant = tenant
+                        mov.tipo = "egreso"
+                        mov.estado = "confirmado"
+                        mov.creado_por = request.user
+                        mov.save()
+
+                if mov is None:
                     form.add_error(
                         "monto",
                         f"Fondos insuficientes. Saldo disponible: RD$ {saldo_actual:,.2f}"
                     )
                 else:
-                    mov = form.save(commit=False)
-                    mov.tenant = tenant
-                    mov.tipo = "egreso"
-                    mov.estado = "confirmado"
-                    mov.creado_por = request.user
-                    mov.save()
-
                     messages.success(request, "Egreso registrado y confirmado correctamente.")
 
                     accion = request.POST.get("accion")
@@ -17,15 +17,17 @@ import json
 import datetime
 # finanzas_app/views/reportes.py
 from types import SimpleNamespace
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, permission_required
-from django.views.decorators.http import require_GET, require_http_methods
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
 from django.db import transaction  # 👈 AGREGAR
 from django.db.models import Sum, Q, Count
 ...
 
 from core.utils_config import get_config
 
+from .. import antiguedad_cxp, cache_reportes, f001, ledger
 from ..models import (
     MovimientoFinanciero,
     CuentaFinanciera,
@@ -69,54 +71,65 @@ def reporte_resumen_mensual(request):
         year = hoy.year
         month = hoy.month
 
-    # ---- query del mes (excluyendo anulados) ----
-    qs_mes = MovimientoFinanciero.objects.filter(
-        tenant=tenant,
-        fecha__year=year,
-        fecha__month=month,
-    ).exclude(estado="anulado")
-
-    # filtro por cuenta (si viene)
     cuenta_obj = None
     if cuenta_id:
-        qs_mes = qs_mes.filter(cuenta_id=cuenta_id)
         cuenta_obj = CuentaFinanciera.objects.filter(tenant=tenant, pk=cuenta_id).first()
 
-    # ---- ingresos/egresos (operativo vs incluyendo transferencias) ----
-    if incluir_transferencias:
-        qs_balance = qs_mes
-    else:
-        qs_balance = qs_mes.exclude(es_transferencia=True)
+    def calcular():
+        # ---- resumen del mes (ResumenMensualMovimiento ya excluye anulados) ----
+        qs_mes = ledger.resumen(tenant, anio=year, mes=month)
 
-    totales = qs_balance.aggregate(
-        ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-        egresos=Sum("monto", filter=Q(tipo="egreso")),
-    )
+        # filtro por cuenta (si viene)
+        if cuenta_id:
+            qs_mes = qs_mes.filter(cuenta_id=cuenta_id)
 
-    ingresos_mes = totales.get("ingresos") or Decimal("0")
-    egresos_mes = totales.get("egresos") or Decimal("0")
-    balance_mes = ingresos_mes - egresos_mes
+        # ---- ingresos/egresos (operativo vs incluyendo transferencias) ----
+        if incluir_transferencias:
+            qs_balance = qs_mes
+        else:
+            qs_balance = qs_mes.exclude(es_transferencia=True)
 
-    # ---- transferencias del mes (informativo) ----
-    qs_transf = qs_mes.filter(es_transferencia=True)
-    transf_totales = qs_transf.aggregate(
-        transf_egreso=Sum("monto", filter=Q(tipo="egreso")),
-        transf_ingreso=Sum("monto", filter=Q(tipo="ingreso")),
-    )
-    transf_egreso = transf_totales.get("transf_egreso") or Decimal("0")
-    transf_ingreso = transf_totales.get("transf_ingreso") or Decimal("0")
-
-    # ---- agrupación por categoría (opcional) ----
-    resumen_por_categoria = []
-    if agrupar:
-        # OJO: si NO incluimos transferencias, también las excluimos aquí para coherencia
-        qs_cat = qs_balance.values("tipo", "categoria__nombre").annotate(total=Sum("monto")).order_by("tipo", "-total")
-        for row in qs_cat:
-            resumen_por_categoria.append({
-                "tipo": row["tipo"],
-                "categoria": row["categoria__nombre"] or "Sin categoría",
-                "total": row["total"] or Decimal("0"),
-            })
+        totales = qs_balance.aggregate(
+            ingresos=Sum("total", filter=Q(tipo="ingreso")),
+            egresos=Sum("total", filter=Q(tipo="egreso")),
+        )
+
+        ingresos_mes = totales.get("ingresos") or Decimal("0")
+        egresos_mes = totales.get("egresos") or Decimal("0")
+        balance_mes = ingresos_mes - egresos_mes
+
+        # ---- transferencias del mes (informativo) ----
+        qs_transf = qs_mes.filter(es_transferencia=True)
+        transf_totales = qs_transf.aggregate(
+            transf_egreso=Sum("total", filter=Q(tipo="egreso")),
+            transf_ingreso=Sum("total", filter=Q(tipo="ingreso")),
+        )
+        transf_egreso = transf_totales.get("transf_egreso") or Decimal("0")
+        transf_ingreso = transf_totales.get("transf_ingreso") or Decimal("0")
+
+        # ---- agrupación por categoría (opcional) ----
+        resumen_por_categoria = []
+        if agrupar:
+            # OJO: si NO incluimos transferencias, también las excluimos aquí para coherencia
+            qs_cat = qs_balance.values("tipo", "categoria__nombre").annotate(suma=Sum("total")).order_by("tipo", "-suma")
+            for row in qs_cat:
+                resumen_por_categoria.append({
+                    "tipo": row["tipo"],
+                    "categoria": row["categoria__nombre"] or "Sin categoría",
+                    "total": row["suma"] or Decimal("0"),
+                })
+
+        return {
+            "ingresos_mes": ingresos_mes,
+            "egresos_mes": egresos_mes,
+            "balance_mes": balance_mes,
+            "transf_ingreso": transf_ingreso,
+            "transf_egreso": transf_egreso,
+            "resumen_por_categoria": resumen_por_categoria,
+        }
+
+    # ✅ Datos desde el cache de reportes (se invalida al cambiar el libro)
+    datos = cache_reportes.reporte_cacheado(request, "resumen_mensual", calcular)
 
     # ---- combos para el form ----
     cuentas = CuentaFinanciera.objects.filter(tenant=tenant, esta_activa=True).order_by("nombre")
@@ -144,18 +157,11 @@ def reporte_resumen_mensual(request):
         "incluir_transferencias": incluir_transferencias,
         "agrupar": agrupar,
 
-        # datos
-        "ingresos_mes": ingresos_mes,
-        "egresos_mes": egresos_mes,
-        "balance_mes": balance_mes,
-        "transf_ingreso": transf_ingreso,
-        "transf_egreso": transf_egreso,
-        "resumen_por_categoria": resumen_por_categoria,
-
         # selects
         "cuentas": cuentas,
         "meses": [(i, NOMBRES_MESES[i]) for i in range(1, 13)],
     }
+    context.update(datos)
     return render(request, "finanzas_app/reportes/resumen_mensual.html", context)
 
 @login_required
@@ -193,43 +199,46 @@ def reporte_resumen_por_cuenta(request):
         year = hoy.year
         month = hoy.month
 
-    qs = MovimientoFinanciero.objects.filter(
-        tenant=tenant,
-        fecha__year=year,
-        fecha__month=month,
-    ).exclude(estado="anulado")
-
-    if not incluir_transferencias:
-        qs = qs.exclude(es_transferencia=True)
-
-    # Agrupar por cuenta + sumar por tipo
-    filas = (qs.values("cuenta_id", "cuenta__nombre")
-               .annotate(
-                    ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-                    egresos=Sum("monto", filter=Q(tipo="egreso")),
-                )
-               .order_by("cuenta__nombre"))
-
-    data = []
-    total_ing = Decimal("0")
-    total_egr = Decimal("0")
-
-    for f in filas:
-        ing = f["ingresos"] or Decimal("0")
-        egr = f["egresos"] or Decimal("0")
-        bal = ing - egr
+    def calcular():
+        qs = ledger.resumen(tenant, anio=year, mes=month, incluir_transferencias=incluir_transferencias)
+
+        # Agrupar por cuenta + sumar por tipo
+        filas = (qs.values("cuenta_id", "cuenta__nombre")
+                   .annotate(
+                        ingresos=Sum("total", filter=Q(tipo="ingreso")),
+                        egresos=Sum("total", filter=Q(tipo="egreso")),
+                    )
+                   .order_by("cuenta__nombre"))
+
+        data = []
+        total_ing = Decimal("0")
+        total_egr = Decimal("0")
+
+        for f in filas:
+            ing = f["ingresos"] or Decimal("0")
+            egr = f["egresos"] or Decimal("0")
+            bal = ing - egr
+
+            total_ing += ing
+            total_egr += egr
+
+            data.append({
+                "cuenta": f["cuenta__nombre"] or "Sin cuenta",
+                "ingresos": ing,
+                "egresos": egr,
+                "balance": bal,
+            })
 
-        total_ing += ing
-        total_egr += egr
+        total_balance = total_ing - total_egr
 
-        data.append({
-            "cuenta": f["cuenta__nombre"] or "Sin cuenta",
-            "ingresos": ing,
-            "egresos": egr,
-            "balance": bal,
-        })
+        return {
+            "data": data,
+            "total_ingresos": total_ing,
+            "total_egresos": total_egr,
+            "total_balance": total_balance,
+        }
 
-    total_balance = total_ing - total_egr
+    datos = cache_reportes.reporte_cacheado(request, "resumen_por_cuenta", calcular)
 
     NOMBRES_MESES = [
         "", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
@@ -250,12 +259,8 @@ def reporte_resumen_por_cuenta(request):
         "mes_label": mes_label,
         "incluir_transferencias": incluir_transferencias,
         "meses": [(i, NOMBRES_MESES[i]) for i in range(1, 13)],
-
-        "data": data,
-        "total_ingresos": total_ing,
-        "total_egresos": total_egr,
-        "total_balance": total_balance,
     }
+    context.update(datos)
     return render(request, "finanzas_app/reportes/resumen_por_cuenta.html", context)
 
 
@@ -288,50 +293,55 @@ def reporte_resumen_por_categoria(request):
         year = hoy.year
         month = hoy.month
 
-    qs = MovimientoFinanciero.objects.filter(
-        tenant=tenant,
-        fecha__year=year,
-        fecha__month=month,
-    ).exclude(estado="anulado")
-
     cuenta_obj = None
     if cuenta_id:
-        qs = qs.filter(cuenta_id=cuenta_id)
         cuenta_obj = CuentaFinanciera.objects.filter(tenant=tenant, pk=cuenta_id).first()
 
-    if not incluir_transferencias:
-        qs = qs.exclude(es_transferencia=True)
-
-    # Agrupar por categoría + sumar por tipo
-    filas = (
-        qs.values("categoria_id", "categoria__nombre")
-          .annotate(
-              ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-              egresos=Sum("monto", filter=Q(tipo="egreso")),
-          )
-          .order_by("categoria__nombre")
-    )
+    def calcular():
+        qs = ledger.resumen(tenant, anio=year, mes=month, incluir_transferencias=incluir_transferencias)
 
-    data = []
-    total_ing = Decimal("0")
-    total_egr = Decimal("0")
+        if cuenta_id:
+            qs = qs.filter(cuenta_id=cuenta_id)
 
-    for f in filas:
-        ing = f["ingresos"] or Decimal("0")
-        egr = f["egresos"] or Decimal("0")
-        bal = ing - egr
+        # Agrupar por categoría + sumar por tipo
+        filas = (
+            qs.values("categoria_id", "categoria__nombre")
+              .annotate(
+                  ingresos=Sum("total", filter=Q(tipo="ingreso")),
+                  egresos=Sum("total", filter=Q(tipo="egreso")),
+              )
+              .order_by("categoria__nombre")
+        )
 
-        total_ing += ing
-        total_egr += egr
+        data = []
+        total_ing = Decimal("0")
+        total_egr = Decimal("0")
 
-        data.append({
-            "categoria": f["categoria__nombre"] or "Sin categoría",
-            "ingresos": ing,
-            "egresos": egr,
-            "balance": bal,
-        })
+        for f in filas:
+            ing = f["ingresos"] or Decimal("0")
+            egr = f["egresos"] or Decimal("0")
+            bal = ing - egr
 
-    total_balance = total_ing - total_egr
+            total_ing += ing
+            total_egr += egr
+
+            data.append({
+                "categoria": f["categoria__nombre"] or "Sin categoría",
+                "ingresos": ing,
+                "egresos": egr,
+                "balance": bal,
+            })
+
+        total_balance = total_ing - total_egr
+
+        return {
+            "data": data,
+            "total_ingresos": total_ing,
+            "total_egresos": total_egr,
+            "total_balance": total_balance,
+        }
+
+    datos = cache_reportes.reporte_cacheado(request, "resumen_por_categoria", calcular)
 
     NOMBRES_MESES = [
         "", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
@@ -357,12 +367,8 @@ def reporte_resumen_por_categoria(request):
         "cuenta_obj": cuenta_obj,
 
         "incluir_transferencias": incluir_transferencias,
-
-        "data": data,
-        "total_ingresos": total_ing,
-        "total_egresos": total_egr,
-        "total_balance": total_balance,
     }
+    context.update(datos)
     return render(request, "finanzas_app/reportes/resumen_por_categoria.html", context)
 
 
@@ -1047,53 +1053,63 @@ def reporte_cxp_por_proveedor(request):
     fecha_hasta = (request.GET.get("fecha_hasta") or "").strip()
     auto_print = request.GET.get("print") in ("1", "true", "True")
     
-    # QuerySet base - excluir canceladas
-    qs = CuentaPorPagar.objects.filter(tenant=tenant).exclude(estado="cancelada")
+    def calcular():
+        # QuerySet base - excluir canceladas
+        qs = CuentaPorPagar.objects.filter(tenant=tenant).exclude(estado="cancelada")
     
-    if fecha_desde:
-        qs = qs.filter(fecha_emision__gte=fecha_desde)
+        if fecha_desde:
+            qs = qs.filter(fecha_emision__gte=fecha_desde)
     
-    if fecha_hasta:
-        qs = qs.filter(fecha_emision__lte=fecha_hasta)
+        if fecha_hasta:
+            qs = qs.filter(fecha_emision__lte=fecha_hasta)
     
-    # Agrupar por proveedor
-    filas = (
-        qs.values("proveedor_id", "proveedor__nombre")
-        .annotate(
-            cantidad=Count("id"),
-            monto_total=Sum("monto_total"),
-            monto_pagado=Sum("monto_pagado"),
+        # Agrupar por proveedor (los alias no pueden llamarse como los campos)
+        filas = (
+            qs.values("proveedor_id", "proveedor__nombre")
+            .annotate(
+                num_cxp=Count("id"),
+                suma_total=Sum("monto_total"),
+                suma_pagado=Sum("monto_pagado"),
+            )
+            .order_by("proveedor__nombre")
         )
-        .order_by("proveedor__nombre")
-    )
+
+        # Si solo_con_saldo, omitir proveedores sin pendiente (HAVING en la BD)
+        if solo_con_saldo:
+            filas = filas.filter(suma_total__gt=F("suma_pagado"))
     
-    data = []
-    total_monto = Decimal("0")
-    total_pagado = Decimal("0")
+        data = []
+        total_monto = Decimal("0")
+        total_pagado = Decimal("0")
     
-    for f in filas:
-        monto = f["monto_total"] or Decimal("0")
-        pagado = f["monto_pagado"] or Decimal("0")
-        pendiente = monto - pagado
+        for f in filas:
+            monto = f["suma_total"] or Decimal("0")
+            pagado = f["suma_pagado"] or Decimal("0")
+            pendiente = monto - pagado
         
-        # Si solo_con_saldo, omitir proveedores sin pendiente
-        if solo_con_saldo and pendiente <= 0:
-            continue
-        
-        total_monto += monto
-        total_pagado += pagado
+            total_monto += monto
+            total_pagado += pagado
         
-        data.append({
-            "proveedor_id": f["proveedor_id"],
-            "proveedor": f["proveedor__nombre"] or "Sin proveedor",
-            "cantidad": f["cantidad"],
-            "monto_total": monto,
-            "monto_pagado": pagado,
-            "saldo_pendiente": pendiente,
-        })
-    
-    total_pendiente = total_monto - total_pagado
+            data.append({
+                "proveedor_id": f["proveedor_id"],
+                "proveedor": f["proveedor__nombre"] or "Sin proveedor",
+                "cantidad": f["num_cxp"],
+                "monto_total": monto,
+                "monto_pagado": pagado,
+                "saldo_pendiente": pendiente,
+            })
     
+        total_pendiente = total_monto - total_pagado
+
+        return {
+            "data": data,
+            "total_monto": total_monto,
+            "total_pagado": total_pagado,
+            "total_pendiente": total_pendiente,
+        }
+
+    datos = cache_reportes.reporte_cacheado(request, "cxp_por_proveedor", calcular)
+
     tenant = request.tenant
     CFG = get_config(tenant)
         
@@ -1106,13 +1122,8 @@ def reporte_cxp_por_proveedor(request):
         "solo_con_saldo": solo_con_saldo,
         "fecha_desde": fecha_desde,
         "fecha_hasta": fecha_hasta,
-        
-        # Datos
-        "data": data,
-        "total_monto": total_monto,
-        "total_pagado": total_pagado,
-        "total_pendiente": total_pendiente,
     }
+    context.update(datos)
     return render(request, "finanzas_app/reportes/reporte_cxp_por_proveedor.html", context)
 
 
@@ -1145,63 +1156,39 @@ def reporte_cxp_vencidas(request):
         dias_alerta = 7
     
     fecha_limite = hoy + datetime.timedelta(days=dias_alerta)
-    
-    # CxP vencidas (fecha_vencimiento < hoy y no pagadas/canceladas)
-    qs_vencidas = CuentaPorPagar.objects.filter(
-        fecha_vencimiento__lt=hoy
-    ).exclude(
-        estado__in=["pagada", "cancelada"]
-    ).select_related("proveedor", "categoria")
-    
-    # CxP próximas a vencer
-    qs_proximas = CuentaPorPagar.objects.filter(
-        fecha_vencimiento__gte=hoy,
-        fecha_vencimiento__lte=fecha_limite
-    ).exclude(
-        estado__in=["pagada", "cancelada"]
-    ).select_related("proveedor", "categoria")
-    
+
+    # CxP abiertas (no pagadas/canceladas) del tenant
+    abiertas = antiguedad_cxp.cxp_abiertas(tenant)
     if proveedor_id:
-        qs_vencidas = qs_vencidas.filter(proveedor_id=proveedor_id)
-        qs_proximas = qs_proximas.filter(proveedor_id=proveedor_id)
-    
-    # Procesar vencidas
-    vencidas = []
-    total_vencidas_monto = Decimal("0")
-    total_vencidas_pendiente = Decimal("0")
-    
-    for item in qs_vencidas.order_by("fecha_vencimiento"):
-        dias_mora = (hoy - item.fecha_vencimiento).days
-        pendiente = item.saldo_pendiente
-        
-        total_vencidas_monto += item.monto_total
-        total_vencidas_pendiente += pendiente
-        
-        vencidas.append({
-            "obj": item,
-            "dias_mora": dias_mora,
-            "saldo_pendiente": pendiente,
-        })
-    
-    # Procesar próximas a vencer
+        abiertas = abiertas.filter(proveedor_id=proveedor_id)
+
+    filtro_vencidas = Q(fecha_vencimiento__lt=hoy)
+    filtro_proximas = Q(fecha_vencimiento__gte=hoy, fecha_vencimiento__lte=fecha_limite)
+
+    # Conteos y sumas de ambos grupos en una sola consulta
+    resumen = antiguedad_cxp.totales(abiertas, vencidas=filtro_vencidas, proximas=filtro_proximas)
+
+    def detalle(filtro):
+        return (
+            abiertas.filter(filtro)
+            .annotate(pendiente=F("monto_total") - F("monto_pagado"))
+            .select_related("proveedor")
+            .order_by("fecha_vencimiento", "pk")
+        )
+
+    vencidas = [
+        {"obj": item, "dias_mora": (hoy - item.fecha_vencimiento).days, "saldo_pendiente": item.pendiente}
+        for item in detalle(filtro_vencidas)
+    ]
+
+    # Próximas a vencer: el detalle solo se consulta si se pidió
     proximas = []
-    total_proximas_monto = Decimal("0")
-    total_proximas_pendiente = Decimal("0")
-    
     if incluir_proximas:
-        for item in qs_proximas.order_by("fecha_vencimiento"):
-            dias_para_vencer = (item.fecha_vencimiento - hoy).days
-            pendiente = item.saldo_pendiente
-            
-            total_proximas_monto += item.monto_total
-            total_proximas_pendiente += pendiente
-            
-            proximas.append({
-                "obj": item,
-                "dias_para_vencer": dias_para_vencer,
-                "saldo_pendiente": pendiente,
-            })
-    
+        proximas = [
+            {"obj": item, "dias_para_vencer": (item.fecha_vencimiento - hoy).days, "saldo_pendiente": item.pendiente}
+            for item in detalle(filtro_proximas)
+        ]
+
     proveedores = ProveedorFinanciero.objects.filter(tenant=tenant, activo=True).order_by("nombre")
     tenant = request.tenant
     CFG = get_config(tenant)
@@ -1217,15 +1204,15 @@ def reporte_cxp_vencidas(request):
         
         # Datos vencidas
         "vencidas": vencidas,
-        "total_vencidas": len(vencidas),
-        "total_vencidas_monto": total_vencidas_monto,
-        "total_vencidas_pendiente": total_vencidas_pendiente,
+        "total_vencidas": resumen["vencidas"]["cantidad"],
+        "total_vencidas_monto": resumen["vencidas"]["monto"],
+        "total_vencidas_pendiente": resumen["vencidas"]["pendiente"],
         
         # Datos próximas
         "proximas": proximas,
-        "total_proximas": len(proximas),
-        "total_proximas_monto": total_proximas_monto,
-        "total_proximas_pendiente": total_proximas_pendiente,
+        "total_proximas": resumen["proximas"]["cantidad"],
+        "total_proximas_monto": resumen["proximas"]["monto"],
+        "total_proximas_pendiente": resumen["proximas"]["pendiente"],
         
         # Selects
         "proveedores": proveedores,
@@ -1243,111 +1230,38 @@ def reporte_antiguedad_cxp(request):
     Clasifica por rangos: 0-30, 31-60, 61-90, +90 días.
     Filtros:
       - proveedor
+      - tramo (opcional): despliega las CxP de ese rango
       - print=1
     """
     tenant = request.tenant  # 👈 TENANT
     hoy = timezone.now().date()
     
     proveedor_id = (request.GET.get("proveedor") or "").strip()
+    tramo = (request.GET.get("tramo") or "").strip()
     auto_print = request.GET.get("print") in ("1", "true", "True")
     
     # CxP con saldo pendiente (no pagadas ni canceladas)
-    qs = CuentaPorPagar.objects.exclude(
-        estado__in=["pagada", "cancelada"]
-    ).select_related("proveedor", "categoria")
+    qs = antiguedad_cxp.cxp_abiertas(tenant)
     
     if proveedor_id:
         qs = qs.filter(proveedor_id=proveedor_id)
     
-    # Rangos de antigüedad (días desde fecha_vencimiento o fecha_emision)
-    rangos = {
-        "corriente": {"label": "Corriente (no vencido)", "min": None, "max": 0, "items": [], "total": Decimal("0")},
-        "0_30": {"label": "1-30 días", "min": 1, "max": 30, "items": [], "total": Decimal("0")},
-        "31_60": {"label": "31-60 días", "min": 31, "max": 60, "items": [], "total": Decimal("0")},
-        "61_90": {"label": "61-90 días", "min": 61, "max": 90, "items": [], "total": Decimal("0")},
-        "mas_90": {"label": "Más de 90 días", "min": 91, "max": None, "items": [], "total": Decimal("0")},
-    }
-    
-    total_general = Decimal("0")
-    
-    for item in qs:
-        pendiente = item.saldo_pendiente
-        if pendiente <= 0:
-            continue
-        
-        # Calcular días de mora basado en fecha_vencimiento
-        fecha_ref = item.fecha_vencimiento or item.fecha_emision
-        dias = (hoy - fecha_ref).days if fecha_ref else 0
-        
-        total_general += pendiente
-        
-        # Clasificar en rango
-        if dias <= 0:
-            rangos["corriente"]["items"].append(item)
-            rangos["corriente"]["total"] += pendiente
-        elif dias <= 30:
-            rangos["0_30"]["items"].append(item)
-            rangos["0_30"]["total"] += pendiente
-        elif dias <= 60:
-            rangos["31_60"]["items"].append(item)
-            rangos["31_60"]["total"] += pendiente
-        elif dias <= 90:
-            rangos["61_90"]["items"].append(item)
-            rangos["61_90"]["total"] += pendiente
-        else:
-            rangos["mas_90"]["items"].append(item)
-            rangos["mas_90"]["total"] += pendiente
-    
-    # Calcular porcentajes
-    for key in rangos:
-        if total_general > 0:
-            rangos[key]["porcentaje"] = (rangos[key]["total"] / total_general * 100)
-        else:
-            rangos[key]["porcentaje"] = Decimal("0")
-        rangos[key]["cantidad"] = len(rangos[key]["items"])
-    
-    # Resumen por proveedor con aging
-    proveedores_aging = defaultdict(lambda: {
-        "nombre": "",
-        "corriente": Decimal("0"),
-        "0_30": Decimal("0"),
-        "31_60": Decimal("0"),
-        "61_90": Decimal("0"),
-        "mas_90": Decimal("0"),
-        "total": Decimal("0"),
-    })
-    
-    for item in qs:
-        pendiente = item.saldo_pendiente
-        if pendiente <= 0:
-            continue
-        
-        prov_id = item.proveedor_id
-        prov_nombre = item.proveedor.nombre if item.proveedor else "Sin proveedor"
-        
-        proveedores_aging[prov_id]["nombre"] = prov_nombre
-        proveedores_aging[prov_id]["total"] += pendiente
-        
-        fecha_ref = item.fecha_vencimiento or item.fecha_emision
-        dias = (hoy - fecha_ref).days if fecha_ref else 0
-        
-        if dias <= 0:
-            proveedores_aging[prov_id]["corriente"] += pendiente
-        elif dias <= 30:
-            proveedores_aging[prov_id]["0_30"] += pendiente
-        elif dias <= 60:
-            proveedores_aging[prov_id]["31_60"] += pendiente
-        elif dias <= 90:
-            proveedores_aging[prov_id]["61_90"] += pendiente
-        else:
-            proveedores_aging[prov_id]["mas_90"] += pendiente
-    
-    # Convertir a lista ordenada
-    proveedores_lista = sorted(
-        proveedores_aging.values(),
-        key=lambda x: x["total"],
-        reverse=True
-    )
+    # Rangos de antigüedad (días desde fecha_vencimiento o fecha_emision),
+    # sumados por tramo y proveedor en la BD
+    def calcular():
+        rangos, proveedores_lista, total_general = antiguedad_cxp.aging(qs, hoy)
+        return {
+            "rangos": rangos,
+            "total_general": total_general,
+            "proveedores_aging": proveedores_lista,
+        }
+
+    datos = cache_reportes.reporte_cacheado(request, "antiguedad_cxp", calcular)
+
+    # Detalle de CxP solo del tramo desplegado (?tramo=31_60)
+    if tramo not in antiguedad_cxp.CLAVES_TRAMOS:
+        tramo = ""
+    detalle = list(antiguedad_cxp.detalle_tramo(qs, hoy, tramo)) if tramo else []
     
     proveedores = ProveedorFinanciero.objects.filter(tenant=tenant, activo=True).order_by("nombre")
     tenant = request.tenant
@@ -1359,15 +1273,15 @@ def reporte_antiguedad_cxp(request):
         
         # Filtros
         "proveedor_id": proveedor_id,
+        "tramo": tramo,
         
         # Datos
-        "rangos": rangos,
-        "total_general": total_general,
-        "proveedores_aging": proveedores_lista,
+        "detalle": detalle,
         
         # Selects
         "proveedores": proveedores,
     }
+    context.update(datos)
     return render(request, "finanzas_app/reportes/reporte_antiguedad_cxp.html", context)
 
 
@@ -1493,56 +1407,65 @@ def reporte_estado_resultados(request):
         year = hoy.year
         month = hoy.month
 
-    # ---- Query base (todas las cuentas consolidadas) ----
-    qs = MovimientoFinanciero.objects.filter(
-        tenant=tenant,
-        fecha__year=year,
-        fecha__month=month,
-    ).exclude(
-        estado="anulado"
-    ).exclude(
-        es_transferencia=True  # Las transferencias no son ingresos/egresos reales
-    )
+    def calcular():
+        # ---- Query base (todas las cuentas consolidadas, desde el resumen mensual) ----
+        qs = ledger.resumen(
+            tenant,
+            anio=year,
+            mes=month,
+            incluir_transferencias=False,  # Las transferencias no son ingresos/egresos reales
+        )
 
-    # ---- INGRESOS por categoría ----
-    ingresos_por_categoria = (
-        qs.filter(tipo="ingreso")
-        .values("categoria__nombre")
-        .annotate(total=Sum("monto"))
-        .order_by("-total")
-    )
+        # ---- INGRESOS por categoría ----
+        ingresos_por_categoria = (
+            qs.filter(tipo="ingreso")
+            .values("categoria__nombre")
+            .annotate(suma=Sum("total"))
+            .order_by("-suma")
+        )
 
-    ingresos_detalle = []
-    total_ingresos = Decimal("0")
-    for row in ingresos_por_categoria:
-        monto = row["total"] or Decimal("0")
-        total_ingresos += monto
-        ingresos_detalle.append({
-            "categoria": row["categoria__nombre"] or "Sin categoría",
-            "monto": monto,
-        })
+        ingresos_detalle = []
+        total_ingresos = Decimal("0")
+        for row in ingresos_por_categoria:
+            monto = row["suma"] or Decimal("0")
+            total_ingresos += monto
+            ingresos_detalle.append({
+                "categoria": row["categoria__nombre"] or "Sin categoría",
+                "monto": monto,
+            })
 
-    # ---- EGRESOS por categoría ----
-    egresos_por_categoria = (
-        qs.filter(tipo="egreso")
-        .values("categoria__nombre")
-        .annotate(total=Sum("monto"))
-        .order_by("-total")
-    )
+        # ---- EGRESOS por categoría ----
+        egresos_por_categoria = (
+            qs.filter(tipo="egreso")
+            .values("categoria__nombre")
+            .annotate(suma=Sum("total"))
+            .order_by("-suma")
+        )
 
-    egresos_detalle = []
-    total_egresos = Decimal("0")
-    for row in egresos_por_categoria:
-        monto = row["total"] or Decimal("0")
-        total_egresos += monto
-        egresos_detalle.append({
-            "categoria": row["categoria__nombre"] or "Sin categoría",
-            "monto": monto,
-        })
+        egresos_detalle = []
+        total_egresos = Decimal("0")
+        for row in egresos_por_categoria:
+            monto = row["suma"] or Decimal("0")
+            total_egresos += monto
+            egresos_detalle.append({
+                "categoria": row["categoria__nombre"] or "Sin categoría",
+                "monto": monto,
+            })
+
+        # ---- RESULTADO ----
+        resultado = total_ingresos - total_egresos
+        es_superavit = resultado >= 0
 
-    # ---- RESULTADO ----
-    resultado = total_ingresos - total_egresos
-    es_superavit = resultado >= 0
+        return {
+            "ingresos_detalle": ingresos_detalle,
+            "total_ingresos": total_ingresos,
+            "egresos_detalle": egresos_detalle,
+            "total_egresos": total_egresos,
+            "resultado": resultado,
+            "es_superavit": es_superavit,
+        }
+
+    datos = cache_reportes.reporte_cacheado(request, "estado_resultados", calcular)
 
     # ---- Período label ----
     NOMBRES_MESES = [
@@ -1563,19 +1486,8 @@ def reporte_estado_resultados(request):
         "month": month,
         "periodo_label": periodo_label,
         "meses": [(i, NOMBRES_MESES[i]) for i in range(1, 13)],
-
-        # Datos de ingresos
-        "ingresos_detalle": ingresos_detalle,
-        "total_ingresos": total_ingresos,
-
-        # Datos de egresos
-        "egresos_detalle": egresos_detalle,
-        "total_egresos": total_egresos,
-
-        # Resultado
-        "resultado": resultado,
-        "es_superavit": es_superavit,
     }
+    context.update(datos)
     return render(request, "finanzas_app/reportes/estado_resultados.html", context)
 
 # ============================================
@@ -1836,150 +1748,29 @@ def a_cajitas(valor, tamaño=8):
 from django.apps import apps
 from django.db.models import Sum
 
-@login_required
-def reporte_f001_concilio(request):
-    tenant = request.tenant  # 👈 TENANT
-
-    from django.db.models import Sum
-    from django.utils import timezone
-    from decimal import Decimal
-
+def _periodo_f001(datos):
+    """(mes, ano) de GET/POST, por defecto el mes actual."""
     hoy = timezone.localdate()
-    mes = int(request.GET.get("mes", hoy.month))
-    ano = int(request.GET.get("ano", hoy.year))
-
-    movimientos = (
-        MovimientoFinanciero.objects
-        .filter(fecha__year=ano, fecha__month=mes)
-        .exclude(estado="anulado")
-        .filter(es_transferencia=False)
-        .filter(categoria__casilla_f001__isnull=False)
-    )
-
-    agrupado = (
-        movimientos
-        .values("categoria__casilla_f001__codigo")
-        .annotate(total=Sum("monto"))
-    )
-
-    totales_casillas = {r["categoria__casilla_f001__codigo"]: r["total"] for r in agrupado}
-
-    def v(codigo):
-        return totales_casillas.get(codigo, Decimal("0.00"))
-    
-    # ============================================
-    # SECCIÓN B: INGRESOS Y EGRESOS
-    # ============================================
-    
-    ingresos = {
-        "diezmos": v("ING_DIEZMOS"),
-        "ofrendas_voluntarias": v("ING_OFRENDA_VOL"),
-        "ofrendas_especiales": v("ING_OFRENDA_ESP"),
-        "otras_ofrendas": v("ING_OTRAS_OFR"),
-        "otros_ingresos": v("ING_OTROS"),
-        "ayudas_concilio": v("ING_AYUDA_CONCILIO"),
-        "ofrendas_exterior": v("ING_EXTERIOR"),
-    }
-
-    ministerios = {
-        "femenil": v("MIN_FEMENIL"),
-        "hombres_honor": v("MIN_HOMBRES"),
-        "embajadores": v("MIN_EMBAJADORES"),
-        "escuela_biblica": v("MIN_ESC_BIBLICA"),
-        "misioneritas": v("MIN_MISIONERITAS"),
-        "exploradores": v("MIN_EXPLORADORES"),
-        "mda": v("MIN_MDA"),
-        "misiones": v("MIN_MISIONES"),
-        "otros": v("MIN_OTROS"),
-    }
-
-    egresos = {
-        "asignacion_pastoral": v("EGR_ASIG_PASTORAL"),
-        "alquileres": v("EGR_ALQUILER"),
-        "evangelismo_misiones": v("EGR_EVANGELISMO"),
-        "servicios_basicos": v("EGR_SERVICIOS"),
-        "ayuda_capillas": v("EGR_CAPILLAS"),
-        "ayuda_necesitados": v("EGR_NECESITADOS"),
-        "mantenimientos": v("EGR_MANTENIMIENTO"),
-        "apoyo_ministerios": v("EGR_APOYO_MIN"),
-        "otras_salidas": v("EGR_OTRAS"),
-    }
-
-    total_ing_iglesia = sum(ingresos.values(), Decimal("0.00"))
-    total_ing_min = sum(ministerios.values(), Decimal("0.00"))
-    total_egresos = sum(egresos.values(), Decimal("0.00"))
-    total_ingresos = total_ing_iglesia + total_ing_min
-    asig_past = egresos["asignacion_pastoral"]
-
-    # ============================================
-    # SECCIÓN C: ENVÍOS A LA OFICINA NACIONAL
-    # ============================================
-
-    base_diezmo_iglesia = total_ingresos - asig_past
-    if base_diezmo_iglesia < 0:
-        base_diezmo_iglesia = Decimal("0.00")
-
-    # Envíos de la Iglesia (CALCULADOS)
-    envios = {
-        "diezmo_iglesia": base_diezmo_iglesia * Decimal("0.10"),
-        "instituto_biblico": total_ingresos * Decimal("0.03"),
-        "educacion_cristiana": total_ingresos * Decimal("0.01"),
-        "pension_jubilacion": total_ingresos * Decimal("0.01"),
-        "diezmo_asignacion": asig_past * Decimal("0.10"),
-        "diezmo_pastor_otro": Decimal("0.00"),
-        "diezmo_conyuge": Decimal("0.00"),
-        "cotizacion_pastor": asig_past * Decimal("0.05"),
-    }
+    try:
+        mes = int(datos.get("mes", hoy.month))
+        ano = int(datos.get("ano", hoy.year))
+        if not 1 <= mes <= 12:
+            raise ValueError
+    except (TypeError, ValueError):
+        mes, ano = hoy.month, hoy.year
+    return mes, ano
 
-    subtotal_envios_iglesia = sum(envios.values(), Decimal("0.00"))
-
-    # Ministerios Locales a Nacionales (códigos: ENV_MIN_*)
-    envios_min = {
-        "femenil": v("ENV_MIN_FEMENIL"),
-        "hombres_honor": v("ENV_MIN_HOMBRES"),
-        "embajadores": v("ENV_MIN_EMBAJADORES"),
-        "escuela_biblica": v("ENV_MIN_ESC_BIBLICA"),
-        "misioneritas": v("ENV_MIN_MISIONERITAS"),
-        "misioneros": v("ENV_MIN_MISIONEROS"),
-        "exploradores": v("ENV_MIN_EXPLORADORES"),
-        "mda": v("ENV_MIN_MDA"),
-        "misiones": v("ENV_MIN_MISIONES"),
-        "otros": v("ENV_MIN_OTROS"),
-    }
 
-    subtotal_envios_ministerios = sum(envios_min.values(), Decimal("0.00"))
-
-    # Aportes Especiales (códigos: A_*)
-    aportes = {
-        "evangelismo": v("A_EVANGELISMO"),
-        "desead": v("A_DESEAD"),
-        "plantacion": v("A_PLANTACION"),
-        "misioneros": v("A_MISIONEROS"),
-        "huerfanos": v("A_HUERFANOS"),
-        "envejecientes": v("A_ENVEJECIENTES"),
-        "grupos_vulnerables": v("A_VULNERABLES"),
-        "sordos": v("A_SORDOS"),
-        "desarrollo_concilio": v("A_DESARROLLO"),
-    }
-
-    subtotal_aportes = sum(aportes.values(), Decimal("0.00"))
+@login_required
+def reporte_f001_concilio(request):
+    tenant = request.tenant  # 👈 TENANT
+    mes, ano = _periodo_f001(request.GET)
 
-    # ============================================
-    # TOTALES
-    # ============================================
-    meses = [
-        "", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
-        "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
-    ]
+    # ✅ Valores precalculados del periodo (finanzas_app.f001): solo se
+    # recalculan si cambiaron movimientos del mes y el periodo no está cerrado
+    informe = f001.obtener(tenant, ano, mes)
+    secciones = f001.valores(informe)
 
-    totales = {
-        "total_ingresos_iglesia": total_ing_iglesia,
-        "total_ingresos_ministerios": total_ing_min,
-        "total_egresos": total_egresos,
-        "subtotal_envios_iglesia": subtotal_envios_iglesia,
-        "subtotal_envios_ministerios": subtotal_envios_ministerios,
-        "subtotal_aportes": subtotal_aportes,
-    }
     CFG = get_config(request.tenant)
 
     config = SimpleNamespace(
@@ -1993,33 +1784,36 @@ def reporte_f001_concilio(request):
     config.credencial_pastor_lista = a_cajitas(CFG.credencial_pastor)
     config.credencial_conyuge_lista = a_cajitas(CFG.credencial_conyuge)
 
-    # TOTAL ENVÍO (solo sección C por ahora)
-    total_envio_cyd = (
-        subtotal_envios_iglesia
-        + subtotal_envios_ministerios
-        + subtotal_aportes
-    )
-
-    totales["total_envio_cyd"] = total_envio_cyd
-
-
     context = {
-        "mes_nombre": meses[mes],
+        "mes": mes,
+        "mes_nombre": f001.MESES[mes],
+        "meses_opciones": list(enumerate(f001.MESES))[1:],
         "ano": ano,
-        "ingresos": ingresos,
-        "ministerios": ministerios,
-        "egresos": egresos,
-        "envios": envios,
-        "envios_min": envios_min,
-        "aportes": aportes,
-        "totales": totales,
+        **secciones,
         "config": config,
-
+        "informe": informe,
+        "puede_cerrar": request.user.has_perm("finanzas_app.change_movimientofinanciero"),
     }
 
     return render(request, "finanzas_app/reportes/Informe_f001_concilio.html", context)
 
 
+@login_required
+@require_POST
+@permission_required("finanzas_app.change_movimientofinanciero", raise_exception=True)
+def reporte_f001_cerrar(request):
+    """Cierra (congela) o reabre el F.001 de un mes."""
+    tenant = request.tenant  # 👈 TENANT
+    mes, ano = _periodo_f001(request.POST)
+
+    if request.POST.get("accion") == "reabrir":
+        f001.reabrir(tenant, ano, mes)
+    else:
+        f001.cerrar(tenant, ano, mes, usuario=request.user)
+
+    return redirect(f"{reverse('finanzas_app:reporte_f001_concilio')}?mes={mes}&ano={ano}")
+
+
 
 def categoria_sugerir_codigo(request):
     tenant = request.tenant  # 👈 TENANT
@@ -2120,189 +1914,200 @@ def reporte_comparativo_anual(request):
     # Lista completa de años a procesar (base + comparación)
     todos_los_anios = sorted([anio_base] + anios_validos, reverse=True)
     
-    # ---- Query base ----
-    qs_base = MovimientoFinanciero.objects.filter(tenant=tenant).exclude(estado="anulado")
-    
-    # Filtro por cuenta
     cuenta_obj = None
     if cuenta_id:
-        qs_base = qs_base.filter(cuenta_id=cuenta_id)
         cuenta_obj = CuentaFinanciera.objects.filter(tenant=tenant, pk=cuenta_id).first()
     
-    # Excluir transferencias si no se solicitan
-    if not incluir_transferencias:
-        qs_base = qs_base.exclude(es_transferencia=True)
-    
-    # ---- Calcular datos por mes y año ----
     NOMBRES_MESES = [
         "", "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
         "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
     ]
     
-    # Estructura: {anio: {mes: {ingresos, egresos, balance}}}
-    datos_por_anio = {}
-    totales_por_anio = {}
+    def calcular():
+        # ---- Filtro de las sumas (el resumen mensual ya excluye anulados) ----
+        filtro = Q()
     
-    for anio in todos_los_anios:
-        datos_por_anio[anio] = {}
-        totales_por_anio[anio] = {
-            "ingresos": Decimal("0"),
-            "egresos": Decimal("0"),
-            "balance": Decimal("0"),
-        }
+        # Filtro por cuenta
+        if cuenta_id:
+            filtro &= Q(cuenta_id=cuenta_id)
+    
+        # Excluir transferencias si no se solicitan
+        if not incluir_transferencias:
+            filtro &= Q(es_transferencia=False)
+    
+        # ✅ UNA consulta agrupada por año/mes para todo el histórico del tenant
+        #    (también da el primer año con movimientos para el selector)
+        totales_mensuales = ledger.totales_por_mes(tenant, filtro=filtro)
+    
+        # ---- Calcular datos por mes y año ----
+        # Estructura: {anio: {mes: {ingresos, egresos, balance}}}
+        datos_por_anio = {}
+        totales_por_anio = {}
+    
+        for anio in todos_los_anios:
+            datos_por_anio[anio] = {}
+            totales_por_anio[anio] = {
+                "ingresos": Decimal("0"),
+                "egresos": Decimal("0"),
+                "balance": Decimal("0"),
+            }
         
-        for mes in range(1, 13):
-            qs_mes = qs_base.filter(fecha__year=anio, fecha__month=mes)
-            
-            totales = qs_mes.aggregate(
-                ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-                egresos=Sum("monto", filter=Q(tipo="egreso")),
-            )
+            for mes in range(1, 13):
+                totales = totales_mensuales.get((anio, mes), {})
             
-            ingresos = totales.get("ingresos") or Decimal("0")
-            egresos = totales.get("egresos") or Decimal("0")
-            balance = ingresos - egresos
+                ingresos = totales.get("ingresos") or Decimal("0")
+                egresos = totales.get("egresos") or Decimal("0")
+                balance = ingresos - egresos
             
-            datos_por_anio[anio][mes] = {
-                "ingresos": ingresos,
-                "egresos": egresos,
-                "balance": balance,
-            }
+                datos_por_anio[anio][mes] = {
+                    "ingresos": ingresos,
+                    "egresos": egresos,
+                    "balance": balance,
+                }
             
-            totales_por_anio[anio]["ingresos"] += ingresos
-            totales_por_anio[anio]["egresos"] += egresos
-            totales_por_anio[anio]["balance"] += balance
+                totales_por_anio[anio]["ingresos"] += ingresos
+                totales_por_anio[anio]["egresos"] += egresos
+                totales_por_anio[anio]["balance"] += balance
     
-    # ---- Construir tabla comparativa ----
-    tabla_comparativa = []
+        # ---- Construir tabla comparativa ----
+        tabla_comparativa = []
     
-    for mes in range(1, 13):
-        fila = {
-            "mes": mes,
-            "mes_nombre": NOMBRES_MESES[mes],
-            "datos": {},
-        }
+        for mes in range(1, 13):
+            fila = {
+                "mes": mes,
+                "mes_nombre": NOMBRES_MESES[mes],
+                "datos": {},
+            }
         
-        for anio in todos_los_anios:
-            datos_mes = datos_por_anio[anio][mes]
+            for anio in todos_los_anios:
+                datos_mes = datos_por_anio[anio][mes]
             
-            # Calcular variación vs año anterior (si existe)
-            var_ingresos = None
-            var_egresos = None
-            anio_anterior = anio - 1
+                # Calcular variación vs año anterior (si existe)
+                var_ingresos = None
+                var_egresos = None
+                anio_anterior = anio - 1
             
-            if anio_anterior in datos_por_anio:
-                datos_anterior = datos_por_anio[anio_anterior][mes]
+                if anio_anterior in datos_por_anio:
+                    datos_anterior = datos_por_anio[anio_anterior][mes]
                 
-                # Variación ingresos
-                if datos_anterior["ingresos"] > 0:
-                    var_ingresos = ((datos_mes["ingresos"] - datos_anterior["ingresos"]) / datos_anterior["ingresos"]) * 100
-                elif datos_mes["ingresos"] > 0:
-                    var_ingresos = 100  # De 0 a algo = +100%
+                    # Variación ingresos
+                    if datos_anterior["ingresos"] > 0:
+                        var_ingresos = ((datos_mes["ingresos"] - datos_anterior["ingresos"]) / datos_anterior["ingresos"]) * 100
+                    elif datos_mes["ingresos"] > 0:
+                        var_ingresos = 100  # De 0 a algo = +100%
                 
-                # Variación egresos
-                if datos_anterior["egresos"] > 0:
-                    var_egresos = ((datos_mes["egresos"] - datos_anterior["egresos"]) / datos_anterior["egresos"]) * 100
-                elif datos_mes["egresos"] > 0:
-                    var_egresos = 100
+                    # Variación egresos
+                    if datos_anterior["egresos"] > 0:
+                        var_egresos = ((datos_mes["egresos"] - datos_anterior["egresos"]) / datos_anterior["egresos"]) * 100
+                    elif datos_mes["egresos"] > 0:
+                        var_egresos = 100
             
-            fila["datos"][anio] = {
-                "ingresos": datos_mes["ingresos"],
-                "egresos": datos_mes["egresos"],
-                "balance": datos_mes["balance"],
-                "var_ingresos": var_ingresos,
-                "var_egresos": var_egresos,
-            }
+                fila["datos"][anio] = {
+                    "ingresos": datos_mes["ingresos"],
+                    "egresos": datos_mes["egresos"],
+                    "balance": datos_mes["balance"],
+                    "var_ingresos": var_ingresos,
+                    "var_egresos": var_egresos,
+                }
         
-        tabla_comparativa.append(fila)
+            tabla_comparativa.append(fila)
     
-    # ---- KPIs ----
-    kpis = {}
-    for anio in todos_los_anios:
-        datos_anio = datos_por_anio[anio]
-        totales = totales_por_anio[anio]
+        # ---- KPIs ----
+        kpis = {}
+        for anio in todos_los_anios:
+            datos_anio = datos_por_anio[anio]
+            totales = totales_por_anio[anio]
         
-        # Encontrar mejor y peor mes
-        mejor_mes = max(range(1, 13), key=lambda m: datos_anio[m]["balance"])
-        peor_mes = min(range(1, 13), key=lambda m: datos_anio[m]["balance"])
+            # Encontrar mejor y peor mes
+            mejor_mes = max(range(1, 13), key=lambda m: datos_anio[m]["balance"])
+            peor_mes = min(range(1, 13), key=lambda m: datos_anio[m]["balance"])
         
-        # Promedio mensual
-        meses_con_datos = sum(1 for m in range(1, 13) if datos_anio[m]["ingresos"] > 0 or datos_anio[m]["egresos"] > 0)
-        promedio_ingresos = totales["ingresos"] / 12
-        promedio_egresos = totales["egresos"] / 12
+            # Promedio mensual
+            meses_con_datos = sum(1 for m in range(1, 13) if datos_anio[m]["ingresos"] > 0 or datos_anio[m]["egresos"] > 0)
+            promedio_ingresos = totales["ingresos"] / 12
+            promedio_egresos = totales["egresos"] / 12
         
-        kpis[anio] = {
-            "total_ingresos": totales["ingresos"],
-            "total_egresos": totales["egresos"],
-            "balance_anual": totales["balance"],
-            "promedio_ingresos": promedio_ingresos,
-            "promedio_egresos": promedio_egresos,
-            "mejor_mes": NOMBRES_MESES[mejor_mes],
-            "mejor_mes_balance": datos_anio[mejor_mes]["balance"],
-            "peor_mes": NOMBRES_MESES[peor_mes],
-            "peor_mes_balance": datos_anio[peor_mes]["balance"],
-            "meses_con_movimientos": meses_con_datos,
-        }
+            kpis[anio] = {
+                "total_ingresos": totales["ingresos"],
+                "total_egresos": totales["egresos"],
+                "balance_anual": totales["balance"],
+                "promedio_ingresos": promedio_ingresos,
+                "promedio_egresos": promedio_egresos,
+                "mejor_mes": NOMBRES_MESES[mejor_mes],
+                "mejor_mes_balance": datos_anio[mejor_mes]["balance"],
+                "peor_mes": NOMBRES_MESES[peor_mes],
+                "peor_mes_balance": datos_anio[peor_mes]["balance"],
+                "meses_con_movimientos": meses_con_datos,
+            }
     
-    # Variación interanual (año base vs año anterior)
-    if len(todos_los_anios) > 1:
-        anio_anterior = todos_los_anios[1]
-        if totales_por_anio[anio_anterior]["ingresos"] > 0:
-            kpis[anio_base]["var_ingresos_anual"] = (
-                (totales_por_anio[anio_base]["ingresos"] - totales_por_anio[anio_anterior]["ingresos"]) 
-                / totales_por_anio[anio_anterior]["ingresos"]
-            ) * 100
-        else:
-            kpis[anio_base]["var_ingresos_anual"] = None
+        # Variación interanual (año base vs año anterior)
+        if len(todos_los_anios) > 1:
+            anio_anterior = todos_los_anios[1]
+            if totales_por_anio[anio_anterior]["ingresos"] > 0:
+                kpis[anio_base]["var_ingresos_anual"] = (
+                    (totales_por_anio[anio_base]["ingresos"] - totales_por_anio[anio_anterior]["ingresos"]) 
+                    / totales_por_anio[anio_anterior]["ingresos"]
+                ) * 100
+            else:
+                kpis[anio_base]["var_ingresos_anual"] = None
         
-        if totales_por_anio[anio_anterior]["egresos"] > 0:
-            kpis[anio_base]["var_egresos_anual"] = (
-                (totales_por_anio[anio_base]["egresos"] - totales_por_anio[anio_anterior]["egresos"]) 
-                / totales_por_anio[anio_anterior]["egresos"]
-            ) * 100
-        else:
-            kpis[anio_base]["var_egresos_anual"] = None
+            if totales_por_anio[anio_anterior]["egresos"] > 0:
+                kpis[anio_base]["var_egresos_anual"] = (
+                    (totales_por_anio[anio_base]["egresos"] - totales_por_anio[anio_anterior]["egresos"]) 
+                    / totales_por_anio[anio_anterior]["egresos"]
+                ) * 100
+            else:
+                kpis[anio_base]["var_egresos_anual"] = None
     
-    # ---- Datos para gráfico (JSON) ----
-    datos_grafico = {
-        "labels": NOMBRES_MESES[1:],  # Ene, Feb, ... Dic
-        "datasets": []
-    }
+        # ---- Datos para gráfico (JSON) ----
+        datos_grafico = {
+            "labels": NOMBRES_MESES[1:],  # Ene, Feb, ... Dic
+            "datasets": []
+        }
     
-    colores = {
-        0: {"ingreso": "#22c55e", "egreso": "#ef4444"},  # Verde/Rojo - año más reciente
-        1: {"ingreso": "#86efac", "egreso": "#fca5a5"},  # Versiones claras
-        2: {"ingreso": "#bbf7d0", "egreso": "#fecaca"},  # Más claras aún
-    }
+        colores = {
+            0: {"ingreso": "#22c55e", "egreso": "#ef4444"},  # Verde/Rojo - año más reciente
+            1: {"ingreso": "#86efac", "egreso": "#fca5a5"},  # Versiones claras
+            2: {"ingreso": "#bbf7d0", "egreso": "#fecaca"},  # Más claras aún
+        }
     
-    for idx, anio in enumerate(todos_los_anios):
-        # Dataset de ingresos
-        datos_grafico["datasets"].append({
-            "label": f"Ingresos {anio}",
-            "data": [float(datos_por_anio[anio][m]["ingresos"]) for m in range(1, 13)],
-            "borderColor": colores.get(idx, colores[0])["ingreso"],
-            "backgroundColor": colores.get(idx, colores[0])["ingreso"] + "20",
-            "tension": 0.3,
-        })
+        for idx, anio in enumerate(todos_los_anios):
+            # Dataset de ingresos
+            datos_grafico["datasets"].append({
+                "label": f"Ingresos {anio}",
+                "data": [float(datos_por_anio[anio][m]["ingresos"]) for m in range(1, 13)],
+                "borderColor": colores.get(idx, colores[0])["ingreso"],
+                "backgroundColor": colores.get(idx, colores[0])["ingreso"] + "20",
+                "tension": 0.3,
+            })
         
-        # Dataset de egresos
-        datos_grafico["datasets"].append({
-            "label": f"Egresos {anio}",
-            "data": [float(datos_por_anio[anio][m]["egresos"]) for m in range(1, 13)],
-            "borderColor": colores.get(idx, colores[0])["egreso"],
-            "backgroundColor": colores.get(idx, colores[0])["egreso"] + "20",
-            "tension": 0.3,
-            "borderDash": [5, 5],  # Línea punteada para egresos
-        })
+            # Dataset de egresos
+            datos_grafico["datasets"].append({
+                "label": f"Egresos {anio}",
+                "data": [float(datos_por_anio[anio][m]["egresos"]) for m in range(1, 13)],
+                "borderColor": colores.get(idx, colores[0])["egreso"],
+                "backgroundColor": colores.get(idx, colores[0])["egreso"] + "20",
+                "tension": 0.3,
+                "borderDash": [5, 5],  # Línea punteada para egresos
+            })
     
+        # Años disponibles (desde el primer movimiento hasta el actual)
+        anio_inicio = min(a for a, _ in totales_mensuales) if totales_mensuales else hoy.year - 5
+        anios_disponibles = list(range(hoy.year, anio_inicio - 1, -1))
+
+        return {
+            "tabla_comparativa": tabla_comparativa,
+            "totales_por_anio": totales_por_anio,
+            "kpis": kpis,
+            "datos_grafico_json": json.dumps(datos_grafico),
+            "anios_disponibles": anios_disponibles,
+        }
+
+    datos = cache_reportes.reporte_cacheado(request, "comparativo_anual", calcular)
+
     # ---- Opciones para los selectores ----
     cuentas = CuentaFinanciera.objects.filter(tenant=tenant, esta_activa=True).order_by("nombre")
     
-    # Años disponibles (desde el primer movimiento hasta el actual)
-    primer_movimiento = MovimientoFinanciero.objects.filter(tenant=tenant).order_by("fecha").first()
-    anio_inicio = primer_movimiento.fecha.year if primer_movimiento else hoy.year - 5
-    anios_disponibles = list(range(hoy.year, anio_inicio - 1, -1))
-    
     tenant = request.tenant
     CFG = get_config(tenant)
     context = {
@@ -2318,16 +2123,10 @@ def reporte_comparativo_anual(request):
         "cuenta_obj": cuenta_obj,
         "incluir_transferencias": incluir_transferencias,
         
-        # Datos
-        "tabla_comparativa": tabla_comparativa,
-        "totales_por_anio": totales_por_anio,
-        "kpis": kpis,
-        "datos_grafico_json": json.dumps(datos_grafico),
-        
         # Selectores
         "cuentas": cuentas,
-        "anios_disponibles": anios_disponibles,
         "NOMBRES_MESES": NOMBRES_MESES,
     }
+    context.update(datos)
     
     return render(request, "finanzas_app/reportes/comparativo_anual.html", context)
\ No newline at end of file
@@ -4,10 +4,8 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.views.decorators.http import require_GET, require_POST
-from django.db.models import Sum, Q
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from decimal import Decimal
 import json
 
 from core.utils_config import get_config
@@ -33,16 +31,7 @@ def transferencia_crear(request):
     cuentas_con_saldo = {}
 
     for cuenta in CuentaFinanciera.objects.filter(tenant=tenant, esta_activa=True):  # 👈 FILTRAR POR TENANT
-        movs = MovimientoFinanciero.objects.filter(
-            tenant=tenant,  # 👈 FILTRAR POR TENANT
-            cuenta=cuenta
-        ).exclude(estado="anulado").aggregate(
-            ingresos=Sum("monto", filter=Q(tipo="ingreso")),
-            egresos=Sum("monto", filter=Q(tipo="egreso")),
-        )
-        ing = movs.get("ingresos") or Decimal("0")
-        egr = movs.get("egresos") or Decimal("0")
-        saldo = cuenta.saldo_inicial + ing - egr
+        saldo = cuenta.saldo_actual  # materializado por finanzas_app.ledger
         cuentas_con_saldo[cuenta.id] = {
             "saldo": float(saldo),
             "nombre": cuenta.nombre,
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+miembros_app/busqueda.py
+
+Búsqueda de miembros compartida por el listado y los autocompletes.
+
+Cada endpoint armaba su propio OR de `icontains` sobre nombres, apellidos,
+cédula, código... (un seq scan por campo y sin ignorar acentos: "Jose" no
+encontraba a "José"). Ahora:
+  1. Miembro.save() guarda en `texto_busqueda` los campos buscables ya
+     normalizados: minúsculas, sin acentos, espacios colapsados.
+  2. filtrar() normaliza el término igual y exige cada palabra como
+     subcadena de esa única columna ("jose perez" encuentra "José A. Pérez").
+  3. En PostgreSQL la columna tiene un índice GIN con pg_trgm (migración
+     0043), que sirve para LIKE '%...%'. En SQLite no hay índice de
+     subcadenas: se recorre una sola columna en lugar de cinco ORs.
+  4. `nombre_busqueda` guarda solo nombre, apellidos y código: lo usan las
+     búsquedas abiertas a los miembros (portal) con solo_nombre=True, para
+     que no se pueda sondear cédula, email o teléfono de otros.
+"""
+
+import re
+import unicodedata
+
+# Campos del miembro que entran en la búsqueda (orden = orden en la columna)
+CAMPOS = (
+    "nombres",
+    "apellidos",
+    "apodo",
+    "codigo_miembro",
+    "codigo_seguimiento",
+    "cedula",
+    "email",
+    "telefono",
+    "telefono_norm",
+)
+
+# Subconjunto visible para cualquier miembro (columna nombre_busqueda)
+CAMPOS_NOMBRE = ("nombres", "apellidos", "codigo_miembro")
+
+# Más palabras no afinan un autocomplete y cada una es un LIKE
+MAX_TERMINOS = 6
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar(texto):
+    """'  José  ÁLVAREZ ' -> 'jose alvarez'."""
+    if not texto:
+        return ""
+    descompuesto = unicodedata.normalize("NFKD", str(texto))
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return _ESPACIOS.sub(" ", sin_acentos.casefold()).strip()
+
+
+def texto_de(miembro, campos=CAMPOS):
+    """Valor de `texto_busqueda` (o de `nombre_busqueda` con CAMPOS_NOMBRE)."""
+    return " ".join(
+        valor for valor in (normalizar(getattr(miembro, campo, "")) for campo in campos) if valor
+    )
+
+
+def terminos(q):
+    """Palabras normalizadas del término de búsqueda, sin repetir."""
+    vistos = []
+    for palabra in normalizar(q).split(" "):
+        if palabra and palabra not in vistos:
+            vistos.append(palabra)
+    return vistos[:MAX_TERMINOS]
+
+
+def filtrar(queryset, q, prefijo="", solo_nombre=False):
+    """
+    Aplica la búsqueda a un queryset de Miembro (o de un modelo que apunte a
+    Miembro: prefijo="miembro__"). Sin término devuelve el queryset tal cual.
+    solo_nombre=True busca únicamente en CAMPOS_NOMBRE.
+    """
+    columna = "nombre_busqueda" if solo_nombre else "texto_busqueda"
+    for palabra in terminos(q):
+        queryset = queryset.filter(**{f"{prefijo}{columna}__contains": palabra})
+    return queryset
@@ -0,0 +1,74 @@
+# miembros_app/cron.py
+#
+# Recálculo masivo de Miembro.categoria_edad.
+#
+# La categoría solo se recalculaba en Miembro.save(), así que se quedaba
+# vieja a medida que los miembros cumplían años (un niño que cumple 12 seguía
+# como "nino" hasta que alguien editara su ficha). Volver a guardar cada
+# miembro dispara toda la cadena de signals; aquí se hace en la BD:
+#   1. Un SELECT de los miembros cuya categoría guardada no coincide con la
+#      calculada (expresion_categoria_edad: CASE por límites de fecha).
+#   2. UPDATE ... SET categoria_edad = CASE ... solo sobre esos ids.
+# QuerySet.update() no llama a save() ni emite signals.
+#
+# Corre una vez al día (cron.yaml: recalcular_categorias_edad --resumen); no
+# está en el motor de notificaciones porque ese corre cada 10 minutos.
+
+from collections import Counter
+from typing import Any, Dict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from miembros_app.models import Miembro, expresion_categoria_edad
+
+# Ids por UPDATE (SQLite limita los parámetros de una consulta)
+LOTE = 500
+
+
+def recalcular_categorias_edad(tenant=None, hoy=None, aplicar=True):
+    """
+    Recalcula categoria_edad de todos los miembros (o de un tenant).
+    Devuelve la lista de cambios: dicts con id, tenant_id, nombre,
+    anterior y nueva. Con aplicar=False solo informa.
+    """
+    hoy = hoy or timezone.localdate()
+    categoria = expresion_categoria_edad(hoy)
+
+    qs = Miembro.all_objects.all()
+    if tenant is not None:
+        qs = qs.filter(tenant_id=getattr(tenant, "pk", tenant))
+
+    cambios = [
+        {
+            "id": pk,
+            "tenant_id": tenant_id,
+            "nombre": f"{nombres} {apellidos}".strip(),
+            "anterior": anterior,
+            "nueva": nueva,
+        }
+        for pk, tenant_id, nombres, apellidos, anterior, nueva in (
+            qs.alias(categoria_calculada=categoria)
+            .exclude(categoria_edad=F("categoria_calculada"))
+            .annotate(nueva=categoria)
+            .order_by("tenant_id", "pk")
+            .values_list("pk", "tenant_id", "nombres", "apellidos", "categoria_edad", "nueva")
+        )
+    ]
+
+    if aplicar and cambios:
+        ids = [c["id"] for c in cambios]
+        with transaction.atomic():
+            for i in range(0, len(ids), LOTE):
+                Miembro.all_objects.filter(pk__in=ids[i:i + LOTE]).update(categoria_edad=categoria)
+
+    return cambios
+
+
+def resumen(cambios) -> Dict[str, Any]:
+    """Solo conteos (sin nombres): lo que puede ir a logs compartidos."""
+    return {
+        "actualizados": len(cambios),
+        "por_categoria": dict(Counter(c["nueva"] or "sin_fecha" for c in cambios)),
+    }
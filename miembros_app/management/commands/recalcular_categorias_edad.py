@@ -0,0 +1,57 @@
+# USO:
+#   python manage.py recalcular_categorias_edad                (todos los tenants)
+#   python manage.py recalcular_categorias_edad --tenant 3 --dry-run
+#   python manage.py recalcular_categorias_edad --resumen     (cron diario: solo conteos)
+#
+# Recalcula la categoría de edad en BD sin disparar signals. Sin --resumen
+# lista cada miembro que cambió (nombres: solo para correrlo a mano).
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = "Recalcula Miembro.categoria_edad en BD y lista los miembros que cambiaron de categoría."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tenant",
+            type=int,
+            help="ID del tenant específico. Si no se indica, se procesan TODOS los tenants.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo mostrar los cambios, sin guardarlos.",
+        )
+        parser.add_argument(
+            "--resumen",
+            action="store_true",
+            help="Mostrar solo conteos por categoría, sin nombres de miembros.",
+        )
+
+    def handle(self, *args, **options):
+        from miembros_app.cron import recalcular_categorias_edad, resumen
+
+        tenant = None
+        if options.get("tenant"):
+            tenant = Tenant.objects.filter(pk=options["tenant"]).first()
+            if tenant is None:
+                raise CommandError(f"No existe el tenant {options['tenant']}.")
+
+        cambios = recalcular_categorias_edad(tenant, aplicar=not options["dry_run"])
+
+        if options["resumen"]:
+            for categoria, total in sorted(resumen(cambios)["por_categoria"].items()):
+                self.stdout.write(f"  → {categoria}: {total}")
+        else:
+            slugs = dict(Tenant.objects.values_list("id", "slug"))
+            for c in cambios:
+                self.stdout.write(
+                    f"  {slugs.get(c['tenant_id'], c['tenant_id'])} · #{c['id']} {c['nombre']}: "
+                    f"{c['anterior'] or '—'} → {c['nueva'] or '—'}"
+                )
+
+        accion = "a cambiar (dry-run)" if options["dry_run"] else "actualizado(s)"
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(cambios)} miembro(s) {accion}"))
@@ -0,0 +1,46 @@
+# USO:
+#   python manage.py reconstruir_parentescos --tenant 3
+#   python manage.py reconstruir_parentescos --lote 500      (todos los tenants)
+#
+# Recalcula las relaciones inferidas (abuelos, tíos, primos, cuñados...) desde
+# las relaciones directas. Útil tras importar familias o si la sincronización
+# diferida falló (queda en el log de miembros_app.parentesco).
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = "Reconstruye las relaciones familiares inferidas de uno o todos los tenants, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tenant",
+            type=int,
+            help="ID del tenant específico. Si no se indica, se procesan TODOS los tenants.",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=200,
+            help="Miembros por transacción (por defecto 200).",
+        )
+
+    def handle(self, *args, **options):
+        from miembros_app import parentesco
+
+        if options["lote"] < 1:
+            raise CommandError("--lote debe ser mayor que 0.")
+
+        tenants = Tenant.objects.all().order_by("id")
+        if options.get("tenant"):
+            tenants = tenants.filter(pk=options["tenant"])
+            if not tenants.exists():
+                raise CommandError(f"No existe el tenant {options['tenant']}.")
+
+        for tenant in tenants:
+            creadas, borradas = parentesco.reconstruir(tenant.pk, lote=options["lote"])
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {tenant.slug}: {creadas} inferida(s) creada(s), {borradas} eliminada(s)"
+            ))
@@ -68,11 +68,24 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument("--total", type=int, default=100, help="Cantidad de miembros a crear")
+        parser.add_argument("--tenant", type=int, required=True, help="ID del tenant donde se crean los miembros")
 
     def handle(self, *args, **options):
+        from tenants.models import Tenant
+        from tenants.threadlocal import set_current_tenant
+
         total = options["total"]
         miembros = []
 
+        try:
+            tenant = Tenant.objects.get(pk=options["tenant"])
+        except Tenant.DoesNotExist:
+            self.stdout.write(self.style.ERROR(f"❌ No existe tenant con ID {options['tenant']}"))
+            return
+
+        # Miembro.objects filtra por el tenant actual
+        set_current_tenant(tenant)
+
         # =========================
         # 1️⃣ Crear miembros base
         # =========================
@@ -87,6 +100,7 @@ class Command(BaseCommand):
             tel = telefono_rd()
 
             miembro = Miembro.objects.create(
+                tenant=tenant,
                 nombres=nombre,
                 apellidos=apellido,
                 genero=genero,
@@ -131,12 +145,14 @@ class Command(BaseCommand):
                 m2.save(update_fields=["estado_civil"])
 
                 rel1 = MiembroRelacion.objects.create(
+                    tenant=tenant,
                     miembro=m1,
                     familiar=m2,
                     tipo_relacion="conyuge",
                     es_inferida=True,
                 )
                 MiembroRelacion.objects.create(
+                    tenant=tenant,
                     miembro=m2,
                     familiar=m1,
                     tipo_relacion="conyuge",
@@ -164,6 +180,7 @@ class Command(BaseCommand):
                 fecha_nacimiento = date.today() - timedelta(days=edad_hijo * 365)
 
                 hijo = Miembro.objects.create(
+                    tenant=tenant,
                     nombres=nombre,
                     apellidos=padre.apellidos,
                     genero=genero,
@@ -174,6 +191,7 @@ class Command(BaseCommand):
                 )
 
                 rel = MiembroRelacion.objects.create(
+                    tenant=tenant,
                     miembro=padre,
                     familiar=hijo,
                     tipo_relacion="hijo",
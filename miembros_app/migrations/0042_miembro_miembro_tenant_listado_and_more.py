@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miembros_app', '0041_miembro_apodo'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='miembro',
+            index=models.Index(fields=['tenant', 'nuevo_creyente', 'activo', 'nombres', 'apellidos'], name='miembro_tenant_listado'),
+        ),
+        migrations.AddIndex(
+            model_name='miembro',
+            index=models.Index(fields=['tenant', 'fecha_nacimiento'], name='miembro_tenant_nacimiento'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:33
+
+from django.db import migrations, models
+
+INDICE_TRGM = "miembro_busqueda_trgm"
+
+
+def poblar_texto_busqueda(apps, schema_editor):
+    from miembros_app.busqueda import CAMPOS, texto_de
+
+    Miembro = apps.get_model("miembros_app", "Miembro")
+    lote = []
+    for m in Miembro.objects.all().only("pk", *CAMPOS).iterator(chunk_size=1000):
+        m.texto_busqueda = texto_de(m)
+        lote.append(m)
+        if len(lote) >= 1000:
+            Miembro.objects.bulk_update(lote, ["texto_busqueda"])
+            lote = []
+    if lote:
+        Miembro.objects.bulk_update(lote, ["texto_busqueda"])
+
+
+def crear_indice_trgm(apps, schema_editor):
+    # GIN + pg_trgm acelera LIKE '%...%'; SQLite no tiene equivalente
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDICE_TRGM} "
+        "ON miembros_app_miembro USING gin (texto_busqueda gin_trgm_ops)"
+    )
+
+
+def borrar_indice_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDICE_TRGM}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miembros_app', '0042_miembro_miembro_tenant_listado_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='miembro',
+            name='texto_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(poblar_texto_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_trgm, borrar_indice_trgm),
+    ]
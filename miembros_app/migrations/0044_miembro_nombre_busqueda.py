@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+INDICE_TRGM = "miembro_nombre_busqueda_trgm"
+
+
+def poblar_nombre_busqueda(apps, schema_editor):
+    from miembros_app.busqueda import CAMPOS_NOMBRE, texto_de
+
+    Miembro = apps.get_model("miembros_app", "Miembro")
+    lote = []
+    for m in Miembro.objects.all().only("pk", *CAMPOS_NOMBRE).iterator(chunk_size=1000):
+        m.nombre_busqueda = texto_de(m, CAMPOS_NOMBRE)
+        lote.append(m)
+        if len(lote) >= 1000:
+            Miembro.objects.bulk_update(lote, ["nombre_busqueda"])
+            lote = []
+    if lote:
+        Miembro.objects.bulk_update(lote, ["nombre_busqueda"])
+
+
+def crear_indice_trgm(apps, schema_editor):
+    # pg_trgm ya lo habilita 0043
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDICE_TRGM} "
+        "ON miembros_app_miembro USING gin (nombre_busqueda gin_trgm_ops)"
+    )
+
+
+def borrar_indice_trgm(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDICE_TRGM}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('miembros_app', '0043_miembro_texto_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='miembro',
+            name='nombre_busqueda',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(poblar_nombre_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indice_trgm, borrar_indice_trgm),
+    ]
@@ -1,9 +1,12 @@
+from tenants.managers import TenantManager, TenantQuerySet
 from tenants.mixins import TenantAwareModel
+from miembros_app import busqueda
 from datetime import date
 from django.db import models
 from core.utils_config import get_edad_minima_miembro_oficial
 from django.core.validators import RegexValidator
-from django.db.models import Max
+from django.db.models import Case, Max, Q, Value, When
+from django.db.models.functions import ExtractYear
 from core.models import ConfiguracionSistema
 from django.conf import settings
 from django.utils import timezone
@@ -107,6 +110,18 @@ CATEGORIA_EDAD_CHOICES = [
     ("adulto_mayor", "Adulto mayor"),
 ]
 
+# Edad mínima de cada categoría, de mayor a menor. La usan
+# Miembro.actualizar_categoria_edad() y el recálculo masivo en BD
+# (expresion_categoria_edad), así que ambos clasifican igual.
+CORTES_CATEGORIA_EDAD = [
+    (60, "adulto_mayor"),
+    (31, "adulto"),
+    (18, "joven"),
+    (12, "adolescente"),
+    (6, "nino"),
+    (0, "infante"),
+]
+
 VIVIENDA_CHOICES = [
     ("propia", "Casa propia"),
     ("alquilada", "Alquilada"),
@@ -194,10 +209,85 @@ class RazonSalidaMiembro(TenantAwareModel):
         return self.nombre
 
 
+# ==============================================================================
+# EDAD EN CONSULTAS
+# ==============================================================================
+# La edad no se guarda: se traduce a límites de fecha_nacimiento para que el
+# filtro lo resuelva la BD (índice miembro_tenant_nacimiento) con la misma
+# regla que calcular_edad(), sin aproximar años a 365 días.
+
+def fecha_limite_edad(edad, hoy=None):
+    """
+    Última fecha de nacimiento con la que hoy se tienen al menos `edad` años
+    (nacer ese día o antes). Si hoy es 29/02 y el año destino no es
+    bisiesto, el límite es el 28/02.
+    """
+    hoy = hoy or date.today()
+    try:
+        return hoy.replace(year=hoy.year - edad)
+    except ValueError:
+        return hoy.replace(year=hoy.year - edad, day=28)
+
+
+def expresion_categoria_edad(hoy=None):
+    """
+    CASE sobre fecha_nacimiento equivalente a actualizar_categoria_edad(),
+    para recalcular la categoría de muchos miembros en un solo UPDATE.
+    """
+    hoy = hoy or date.today()
+    return Case(
+        When(fecha_nacimiento__isnull=True, then=Value("")),
+        *[
+            When(fecha_nacimiento__lte=fecha_limite_edad(edad_min, hoy), then=Value(categoria))
+            for edad_min, categoria in CORTES_CATEGORIA_EDAD[:-1]
+        ],
+        default=Value(CORTES_CATEGORIA_EDAD[-1][1]),
+        output_field=models.CharField(),
+    )
+
+
+class MiembroQuerySet(TenantQuerySet):
+    def age_between(self, edad_min=None, edad_max=None, hoy=None, sin_fecha=False):
+        """
+        Miembros con edad_min <= edad <= edad_max (cualquiera puede ser None).
+        Los que no tienen fecha de nacimiento quedan fuera, salvo sin_fecha=True
+        (reglas de unidades: edad desconocida no descalifica).
+        """
+        if edad_min is None and edad_max is None:
+            return self
+        rango = Q()
+        if edad_min is not None:
+            rango &= Q(fecha_nacimiento__lte=fecha_limite_edad(edad_min, hoy))
+        if edad_max is not None:
+            # edad <= max  <=>  todavía no cumple max + 1
+            rango &= Q(fecha_nacimiento__gt=fecha_limite_edad(edad_max + 1, hoy))
+        if sin_fecha:
+            rango |= Q(fecha_nacimiento__isnull=True)
+        return self.filter(rango)
+
+    def with_age(self, hoy=None):
+        """Anota `edad_anios` (None sin fecha de nacimiento), calculada en la BD."""
+        hoy = hoy or date.today()
+        aun_no_cumple = Q(fecha_nacimiento__month__gt=hoy.month) | Q(
+            fecha_nacimiento__month=hoy.month, fecha_nacimiento__day__gt=hoy.day
+        )
+        return self.annotate(
+            edad_anios=Case(
+                When(fecha_nacimiento__isnull=True, then=Value(None)),
+                When(aun_no_cumple, then=hoy.year - ExtractYear("fecha_nacimiento") - 1),
+                default=hoy.year - ExtractYear("fecha_nacimiento"),
+                output_field=models.IntegerField(),
+            )
+        )
+
+
 # ==============================================================================
 # ✅ MIEMBRO - Ya hereda de TenantAwareModel (corregido save() y constraints)
 # ==============================================================================
 class Miembro(TenantAwareModel):
+    objects = TenantManager.from_queryset(MiembroQuerySet)()
+    all_objects = models.Manager.from_queryset(MiembroQuerySet)()
+
     # --- Información personal básica ---
     nombres = models.CharField(max_length=100)
     apellidos = models.CharField(max_length=100)
@@ -229,6 +319,11 @@ class Miembro(TenantAwareModel):
         editable=False,
     )
 
+    # Campos buscables normalizados (sin acentos, minúsculas): miembros_app.busqueda
+    texto_busqueda = models.TextField(blank=True, default="", editable=False)
+    # Solo nombre/apellidos/código normalizados: búsqueda del portal
+    nombre_busqueda = models.TextField(blank=True, default="", editable=False)
+
     fecha_nacimiento = models.DateField(
         blank=True,
         null=True,
@@ -719,6 +814,15 @@ class Miembro(TenantAwareModel):
                 condition=models.Q(numero_seguimiento__isnull=False),
             ),
         ]
+        indexes = [
+            # Listados: tenant + nuevo_creyente/activo, ordenados por nombre
+            models.Index(
+                fields=["tenant", "nuevo_creyente", "activo", "nombres", "apellidos"],
+                name="miembro_tenant_listado",
+            ),
+            # Cumpleaños y filtros por edad
+            models.Index(fields=["tenant", "fecha_nacimiento"], name="miembro_tenant_nacimiento"),
+        ]
 
     # ==========================
     # LÓGICA DE EDAD Y CATEGORÍA
@@ -747,18 +851,10 @@ class Miembro(TenantAwareModel):
             self.categoria_edad = ""
             return
 
-        if edad < 6:
-            self.categoria_edad = "infante"
-        elif 6 <= edad <= 11:
-            self.categoria_edad = "nino"
-        elif 12 <= edad <= 17:
-            self.categoria_edad = "adolescente"
-        elif 18 <= edad <= 30:
-            self.categoria_edad = "joven"
-        elif 31 <= edad <= 59:
-            self.categoria_edad = "adulto"
-        else:
-            self.categoria_edad = "adulto_mayor"
+        self.categoria_edad = next(
+            (categoria for edad_min, categoria in CORTES_CATEGORIA_EDAD if edad >= edad_min),
+            CORTES_CATEGORIA_EDAD[-1][1],
+        )
 
         # ✅ SAVE CORREGIDO - FILTRA POR TENANT
     def save(self, *args, **kwargs):
@@ -805,7 +901,7 @@ class Miembro(TenantAwareModel):
         # 2) MIEMBRO OFICIAL → TF-XXXX
         # ======================================
         else:
-            cfg = ConfiguracionSistema.load(self.tenant)
+            cfg = ConfiguracionSistema.cached(self.tenant_id)
             prefijo = cfg.codigo_miembro_prefijo or "TF-"
 
             if self.numero_miembro is None:
@@ -823,6 +919,15 @@ class Miembro(TenantAwareModel):
             self.numero_seguimiento = None
             self.codigo_seguimiento = None
 
+        # ======================================
+        # TEXTO DE BÚSQUEDA (después de los códigos)
+        # ======================================
+        self.texto_busqueda = busqueda.texto_de(self)
+        self.nombre_busqueda = busqueda.texto_de(self, busqueda.CAMPOS_NOMBRE)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and set(update_fields) & set(busqueda.CAMPOS):
+            kwargs["update_fields"] = {*update_fields, "texto_busqueda", "nombre_busqueda"}
+
         super().save(*args, **kwargs)
     @property
     def es_miembro_oficial(self):
@@ -834,7 +939,7 @@ class Miembro(TenantAwareModel):
         edad = self.calcular_edad()
         if edad is None:
             return False
-        edad_minima = get_edad_minima_miembro_oficial(self.tenant)  # ✅ PASAR TENANT
+        edad_minima = get_edad_minima_miembro_oficial(self.tenant_id)  # ✅ PASAR TENANT (id: evita cargar el FK)
         return self.bautizado_confirmado and edad >= edad_minima
 
     @property
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+"""
+miembros_app/parentesco.py
+
+Motor de parentescos: infiere abuelos, tíos, primos, cuñados, suegros, etc.
+a partir de las relaciones DIRECTAS (MiembroRelacion con es_inferida=False).
+
+Antes cada paso del árbol hacía su propia consulta (relaciones de cada
+padre, de cada hermano, de cada tío...) y luego un exists() por par antes
+del bulk_create. Ahora:
+  1. GrafoFamiliar.cargar() trae en UNA consulta (values_list, sin
+     instancias) las aristas directas del tenant con el género de ambos
+     extremos.
+  2. Todo el cálculo es en memoria con operaciones de conjuntos.
+  3. sincronizar() compara lo calculado con las inferidas guardadas de todo
+     el componente familiar y aplica la diferencia: un SELECT, un DELETE y
+     un bulk_create, sin importar el tamaño de la familia.
+  4. Los signals no sincronizan en el momento: anotan los miembros tocados
+     (programar_sincronizacion) y una sola pasada corre después del commit,
+     así una alta de familia con N relaciones recalcula una vez, no N.
+"""
+
+import contextvars
+import logging
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+# Tipos inferidos en orden de presentación: (tipo, razón)
+RAZONES = {
+    "padre": "Cónyuge de tu padre/madre",
+    "hijo": "Hijo/a de tu cónyuge",
+    "hermano": "Comparten padre/madre",
+    "abuelo": "Padre/madre de tu padre/madre",
+    "bisabuelo": "Padre/madre de tu abuelo/a",
+    "tio": "Hermano/a de tu padre/madre",
+    "sobrino": "Hijo/a de tu hermano/a",
+    "primo": "Hijo/a de tu tío/a",
+    "nieto": "Hijo/a de tu hijo/a",
+    "bisnieto": "Hijo/a de tu nieto/a",
+    "cunado": "Cónyuge de hermano/a o hermano/a de cónyuge",
+    "suegro": "Padre/madre de tu cónyuge",
+    "yerno": "Cónyuge de tu hijo/a",
+    "consuegro": "Padre/madre del cónyuge de tu hijo/a",
+}
+
+_VACIO = frozenset()
+
+
+def _es_mujer(genero):
+    return (genero or "").strip().lower() in ("f", "femenino", "mujer")
+
+
+class GrafoFamiliar:
+    """
+    Relaciones directas normalizadas desde el punto de vista de cada miembro:
+    padres[x], hijos[x], hermanos[x], conyuges[x] (conjuntos de ids).
+    Una fila (miembro=A, familiar=B, tipo=T) significa "B es el T de A";
+    para B se invierte con MiembroRelacion.inverse_tipo (como en las vistas).
+    """
+
+    def __init__(self, filas):
+        from miembros_app.models import MiembroRelacion
+
+        self.padres = defaultdict(set)
+        self.hijos = defaultdict(set)
+        self.hermanos = defaultdict(set)
+        self.conyuges = defaultdict(set)
+        self.vecinos = defaultdict(set)    # cualquier arista directa, para el componente
+        self.salientes = defaultdict(set)  # familiares con fila directa miembro=x
+        self.generos = {}
+
+        por_tipo = {
+            "padre": self.padres,
+            "madre": self.padres,
+            "hijo": self.hijos,
+            "hermano": self.hermanos,
+            "conyuge": self.conyuges,
+        }
+
+        for miembro_id, familiar_id, tipo, genero_miembro, genero_familiar in filas:
+            self.generos[miembro_id] = genero_miembro
+            self.generos[familiar_id] = genero_familiar
+            self.vecinos[miembro_id].add(familiar_id)
+            self.vecinos[familiar_id].add(miembro_id)
+            self.salientes[miembro_id].add(familiar_id)
+
+            destino = por_tipo.get(tipo)
+            if destino is not None:
+                destino[miembro_id].add(familiar_id)
+            destino = por_tipo.get(MiembroRelacion.inverse_tipo(tipo, genero_miembro))
+            if destino is not None:
+                destino[familiar_id].add(miembro_id)
+
+        self._padres_completos = {}
+        self._hijos_completos = {}
+
+    @classmethod
+    def cargar(cls, tenant_id):
+        """Grafo con todas las relaciones directas del tenant (una consulta)."""
+        from miembros_app.models import MiembroRelacion
+
+        filas = (
+            MiembroRelacion.all_objects
+            .filter(tenant_id=tenant_id, es_inferida=False)
+            .values_list("miembro_id", "familiar_id", "tipo_relacion", "miembro__genero", "familiar__genero")
+        )
+        return cls(filas)
+
+    def componente(self, semillas):
+        """Ids conectados (por cualquier relación directa) con las semillas."""
+        vistos = set(semillas)
+        pendientes = deque(vistos)
+        while pendientes:
+            actual = pendientes.popleft()
+            for otro in self.vecinos.get(actual, _VACIO):
+                if otro not in vistos:
+                    vistos.add(otro)
+                    pendientes.append(otro)
+        return vistos
+
+    # ─── Bloques básicos ──────────────────────────────────────────────────────
+
+    def _get(self, indice, x):
+        return indice.get(x, _VACIO)
+
+    def padres_completos(self, x):
+        """(directos, inferidos): inferidos = cónyuges de mis padres."""
+        if x not in self._padres_completos:
+            directos = self._get(self.padres, x)
+            inferidos = set()
+            for p in directos:
+                inferidos |= self._get(self.conyuges, p)
+            inferidos -= directos
+            inferidos.discard(x)
+            self._padres_completos[x] = (directos, inferidos)
+        return self._padres_completos[x]
+
+    def hijos_completos(self, x):
+        """(directos, inferidos): inferidos = hijos de mi cónyuge."""
+        if x not in self._hijos_completos:
+            directos = self._get(self.hijos, x)
+            inferidos = set()
+            for c in self._get(self.conyuges, x):
+                inferidos |= self._get(self.hijos, c)
+            inferidos -= directos
+            inferidos.discard(x)
+            self._hijos_completos[x] = (directos, inferidos)
+        return self._hijos_completos[x]
+
+    def todos_padres(self, x):
+        directos, inferidos = self.padres_completos(x)
+        return directos | inferidos
+
+    def todos_hijos(self, x):
+        directos, inferidos = self.hijos_completos(x)
+        return directos | inferidos
+
+    def hermanos_por_padres(self, x, padres):
+        """Quienes comparten al menos uno de `padres` con x."""
+        hermanos = set()
+        for p in padres:
+            hermanos |= self._get(self.hijos, p)
+        hermanos.discard(x)
+        return hermanos
+
+    # ─── Inferencia ───────────────────────────────────────────────────────────
+
+    def inferidos(self, x):
+        """
+        {tipo: ids} con los parentescos inferidos de x (claves de RAZONES),
+        sin x ni sus familiares directos (padres, hijos, hermanos, cónyuges).
+        """
+        padres_dir, padres_inf = self.padres_completos(x)
+        mis_padres = padres_dir | padres_inf
+        hijos_dir, hijos_inf = self.hijos_completos(x)
+        mis_hijos = hijos_dir | hijos_inf
+        hermanos_dir = self._get(self.hermanos, x)
+        conyuges = self._get(self.conyuges, x)
+        hermanos = self.hermanos_por_padres(x, mis_padres) | hermanos_dir
+
+        abuelos = set()
+        tios = set()
+        for p in mis_padres:
+            abuelos_linea = self.todos_padres(p)
+            abuelos |= abuelos_linea
+            tios |= self.hermanos_por_padres(p, abuelos_linea)
+
+        sobrinos = set()
+        cunados = set()
+        for h in hermanos:
+            sobrinos |= self.todos_hijos(h)
+            cunados |= self._get(self.conyuges, h)
+
+        suegros = set()
+        for c in conyuges:
+            padres_conyuge = self.todos_padres(c)
+            suegros |= padres_conyuge
+            cunados |= self.hermanos_por_padres(c, padres_conyuge)
+
+        primos = set()
+        for t in tios:
+            primos |= self.todos_hijos(t)
+
+        nietos = set()
+        yernos = set()
+        for h in mis_hijos:
+            nietos |= self.todos_hijos(h)
+            yernos |= self._get(self.conyuges, h)
+
+        consuegros = set()
+        for y in yernos:
+            consuegros |= self.todos_padres(y)
+
+        bisabuelos = set()
+        for a in abuelos:
+            bisabuelos |= self.todos_padres(a)
+
+        bisnietos = set()
+        for n in nietos:
+            bisnietos |= self.todos_hijos(n)
+
+        resultado = {
+            "padre": padres_inf,
+            "hijo": hijos_inf,
+            "hermano": hermanos,
+            "abuelo": abuelos,
+            "bisabuelo": bisabuelos,
+            "tio": tios,
+            "sobrino": sobrinos,
+            "primo": primos,
+            "nieto": nietos,
+            "bisnieto": bisnietos,
+            "cunado": cunados,
+            "suegro": suegros,
+            "yerno": yernos,
+            "consuegro": consuegros,
+        }
+
+        excluir = padres_dir | hijos_dir | hermanos_dir | conyuges | {x}
+        return {tipo: ids - excluir for tipo, ids in resultado.items()}
+
+    def relaciones_a_guardar(self, x):
+        """
+        {(familiar_id, tipo_relacion): notas} de las inferidas que x debe
+        tener guardadas. No se duplica a quien ya tiene una fila directa
+        desde x, y el padre/madre inferido se guarda según su género.
+        """
+        con_fila = self._get(self.salientes, x)
+        deseadas = {}
+        for tipo, ids in self.inferidos(x).items():
+            for otro in ids:
+                if otro in con_fila:
+                    continue
+                tipo_guardado = tipo
+                if tipo == "padre" and _es_mujer(self.generos.get(otro)):
+                    tipo_guardado = "madre"
+                deseadas.setdefault((otro, tipo_guardado), RAZONES[tipo])
+        return deseadas
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SINCRONIZACIÓN DE INFERIDAS GUARDADAS
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@transaction.atomic
+def sincronizar(tenant_id, miembro_ids, grafo=None, todo_el_componente=True):
+    """
+    Deja las relaciones inferidas guardadas de `miembro_ids` (y, por
+    defecto, de todo su componente familiar) iguales a las calculadas.
+    Devuelve (creadas, borradas).
+    """
+    from miembros_app.models import MiembroRelacion
+
+    if grafo is None:
+        grafo = GrafoFamiliar.cargar(tenant_id)
+    ids = grafo.componente(miembro_ids) if todo_el_componente else set(miembro_ids)
+    if not ids:
+        return 0, 0
+
+    deseadas = {}
+    for x in ids:
+        for (otro, tipo), notas in grafo.relaciones_a_guardar(x).items():
+            deseadas[(x, otro, tipo)] = notas
+
+    # Solo las inferidas que genera este motor (las reconoce la nota); otras
+    # filas marcadas es_inferida, como la inversa que crea el portal, no se tocan
+    existentes = (
+        MiembroRelacion.all_objects
+        .filter(tenant_id=tenant_id, es_inferida=True, miembro_id__in=ids, notas__in=set(RAZONES.values()))
+        .values_list("pk", "miembro_id", "familiar_id", "tipo_relacion")
+    )
+    borrar = []
+    for pk, miembro_id, familiar_id, tipo in existentes:
+        clave = (miembro_id, familiar_id, tipo)
+        if clave in deseadas:
+            del deseadas[clave]  # ya está guardada
+        else:
+            borrar.append(pk)
+
+    if borrar:
+        MiembroRelacion.all_objects.filter(pk__in=borrar).delete()
+    if deseadas:
+        MiembroRelacion.all_objects.bulk_create(
+            [
+                MiembroRelacion(
+                    tenant_id=tenant_id,
+                    miembro_id=miembro_id,
+                    familiar_id=familiar_id,
+                    tipo_relacion=tipo,
+                    es_inferida=True,
+                    notas=notas,
+                )
+                for (miembro_id, familiar_id, tipo), notas in deseadas.items()
+            ],
+            ignore_conflicts=True,  # otra sincronización concurrente pudo crearla
+        )
+    return len(deseadas), len(borrar)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# SINCRONIZACIÓN DIFERIDA
+# ═══════════════════════════════════════════════════════════════════════════════
+# {tenant_id: {miembro_id, ...}} pendientes del contexto actual. ContextVar
+# (como el usuario actual en signals.py) para que WSGI y ASGI no se mezclen.
+
+_pendientes = contextvars.ContextVar("soid_parentesco_pendientes", default=None)
+_diferido = contextvars.ContextVar("soid_parentesco_diferido", default=0)
+
+
+def programar_sincronizacion(tenant_id, miembro_ids):
+    """
+    Anota miembros cuya familia hay que resincronizar. Se procesan juntos
+    después del commit de la transacción actual (o al salir de
+    sincronizacion_diferida()); varias relaciones de la misma familia
+    cuestan una sola sincronización.
+    """
+    pendientes = _pendientes.get()
+    if pendientes is None:
+        pendientes = {}
+        _pendientes.set(pendientes)
+    pendientes.setdefault(tenant_id, set()).update(miembro_ids)
+
+    if not _diferido.get():
+        # Si ya hay un callback pendiente, este encuentra la cola vacía
+        transaction.on_commit(procesar_pendientes)
+
+
+def procesar_pendientes():
+    """Sincroniza (un grafo por tenant) todo lo anotado y vacía la cola."""
+    pendientes = _pendientes.get()
+    if not pendientes:
+        return 0
+    _pendientes.set(None)
+
+    total = 0
+    for tenant_id, ids in pendientes.items():
+        try:
+            creadas, borradas = sincronizar(tenant_id, ids)
+            total += creadas + borradas
+        except Exception:
+            # La relación directa ya está guardada; reconstruir_parentescos repara
+            logger.exception("Error sincronizando parentescos del tenant %s", tenant_id)
+    return total
+
+
+@contextmanager
+def sincronizacion_diferida():
+    """
+    Agrupa las sincronizaciones de un bloque que guarda varias relaciones
+    sin transacción propia (cada save confirma por separado):
+
+        with sincronizacion_diferida():
+            for ...:
+                MiembroRelacion.objects.update_or_create(...)
+    """
+    token = _diferido.set(_diferido.get() + 1)
+    try:
+        yield
+    finally:
+        _diferido.reset(token)
+        if not _diferido.get():
+            transaction.on_commit(procesar_pendientes)
+
+
+def reconstruir(tenant_id, lote=200):
+    """
+    Recalcula todas las inferidas del tenant en lotes de `lote` miembros
+    (una transacción por lote, un solo grafo). Devuelve (creadas, borradas).
+    """
+    from miembros_app.models import MiembroRelacion
+
+    grafo = GrafoFamiliar.cargar(tenant_id)
+    ids = set(grafo.vecinos)
+    # Miembros sin relaciones directas que aún conservan inferidas viejas
+    ids.update(
+        MiembroRelacion.all_objects
+        .filter(tenant_id=tenant_id, es_inferida=True, notas__in=set(RAZONES.values()))
+        .values_list("miembro_id", flat=True)
+        .distinct()
+    )
+
+    ordenados = sorted(ids)
+    creadas = borradas = 0
+    for i in range(0, len(ordenados), lote):
+        c, b = sincronizar(tenant_id, ordenados[i:i + lote], grafo=grafo, todo_el_componente=False)
+        creadas += c
+        borradas += b
+    return creadas, borradas
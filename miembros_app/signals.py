@@ -7,8 +7,6 @@
 from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from django.db import transaction
-from django.db.models import Q
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # 🧠 MENSAJES DE BIENVENIDA INTELIGENTES
@@ -41,21 +39,10 @@ def on_user_login_welcome(sender, request, user, **kwargs):
             previous = None
             print("   ⚠️ Sin tenant, omitiendo registro de historial")
         
-        # Determinar rol
-        soid_ctx = {'rol': 'usuario'}
-        if getattr(user, 'is_superuser', False):
-            soid_ctx['rol'] = 'admin'
-        else:
-            try:
-                groups = [g.name.lower() for g in user.groups.all()]
-                if any("admin" in g or "geren" in g for g in groups):
-                    soid_ctx['rol'] = 'admin'
-                elif any("secre" in g for g in groups):
-                    soid_ctx['rol'] = 'secretaria'
-                elif any("lider" in g or "pastor" in g for g in groups):
-                    soid_ctx['rol'] = 'lider'
-            except:
-                pass
+        # Determinar rol (snapshot cacheado del usuario)
+        from core.permisos_cache import get_user_snapshot
+        snap = get_user_snapshot(user)
+        soid_ctx = {'rol': snap.rol if snap else 'usuario'}
         
         mensaje_data = WelcomeMessageService.get_welcome_message(
             user=user,
@@ -73,39 +60,84 @@ def on_user_login_welcome(sender, request, user, **kwargs):
         traceback.print_exc()
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# HELPER: Obtener usuario actual del request (thread-local)
+# HELPER: Obtener usuario actual del request (contextvars)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-import threading
+import contextvars
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
-_thread_locals = threading.local()
+# ContextVar (no threading.local) para que funcione igual en WSGI y ASGI
+_current_user = contextvars.ContextVar("soid_current_user", default=None)
+_current_request = contextvars.ContextVar("soid_current_request", default=None)
 
 
 def get_current_user():
     """Obtiene el usuario actual del request (si existe)."""
-    return getattr(_thread_locals, 'user', None)
+    return _current_user.get()
 
 
 def get_current_request():
     """Obtiene el request actual (si existe)."""
-    return getattr(_thread_locals, 'request', None)
+    return _current_request.get()
+
+
+@contextmanager
+def user_context(user):
+    """
+    Fija el usuario actual fuera de un request (comandos, cron), para que
+    el timeline registre quién hizo el cambio.
+    """
+    token = _current_user.set(user)
+    try:
+        yield user
+    finally:
+        _current_user.reset(token)
 
 
 class CurrentUserMiddleware:
     """
-    Middleware para capturar el usuario actual en thread-local.
+    Middleware para capturar el usuario actual en el contexto del request.
     
     Agregar a MIDDLEWARE en settings.py:
         'miembros_app.signals.CurrentUserMiddleware',
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        _thread_locals.request = request
-        _thread_locals.user = getattr(request, 'user', None)
-        response = self.get_response(request)
-        return response
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        tokens = self._set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            self._reset(tokens)
+
+    async def __acall__(self, request):
+        tokens = self._set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            self._reset(tokens)
+
+    def _set(self, request):
+        return (
+            _current_request.set(request),
+            _current_user.set(getattr(request, 'user', None)),
+        )
+
+    def _reset(self, tokens):
+        token_request, token_user = tokens
+        _current_user.reset(token_user)
+        _current_request.reset(token_request)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -350,362 +382,77 @@ def registrar_evento_personalizado(miembro, tipo, descripcion, detalle='', usuar
 # ═══════════════════════════════════════════════════════════════════════════════
 
 
-def _obtener_relaciones_directas(miembro_id, MiembroRelacion):
-    """Obtiene relaciones directas normalizadas de un miembro."""
-    padres = set()
-    hijos = set()
-    hermanos = set()
-    conyuges = set()
-    
-    rels = (
-        MiembroRelacion.objects
-        .filter(Q(miembro_id=miembro_id) | Q(familiar_id=miembro_id))
-        .filter(es_inferida=False)
-        .select_related("miembro", "familiar")
-    )
-    
-    for rel in rels:
-        if rel.miembro_id == miembro_id:
-            otro_id = rel.familiar_id
-            tipo = rel.tipo_relacion
-        else:
-            otro_id = rel.miembro_id
-            tipo = MiembroRelacion.inverse_tipo(rel.tipo_relacion, rel.miembro.genero)
-        
-        if tipo in ("padre", "madre"):
-            padres.add(otro_id)
-        elif tipo == "hijo":
-            hijos.add(otro_id)
-        elif tipo == "hermano":
-            hermanos.add(otro_id)
-        elif tipo == "conyuge":
-            conyuges.add(otro_id)
-    
-    return {"padres": padres, "hijos": hijos, "hermanos": hermanos, "conyuges": conyuges}
-
-
-def _obtener_padres_completos(miembro_id, MiembroRelacion):
-    """Obtiene padres directos + inferidos (cónyuges de padres)."""
-    rels = _obtener_relaciones_directas(miembro_id, MiembroRelacion)
-    padres_directos = rels["padres"]
-    padres_inferidos = set()
-    
-    if padres_directos:
-        rels_padres = (
-            MiembroRelacion.objects
-            .filter(
-                Q(miembro_id__in=padres_directos, tipo_relacion="conyuge") |
-                Q(familiar_id__in=padres_directos, tipo_relacion="conyuge")
-            )
-            .filter(es_inferida=False)
-        )
-        
-        for rel in rels_padres:
-            conyuge_id = rel.familiar_id if rel.miembro_id in padres_directos else rel.miembro_id
-            if conyuge_id not in padres_directos and conyuge_id != miembro_id:
-                padres_inferidos.add(conyuge_id)
-    
-    return padres_directos, padres_inferidos
-
-
-def _obtener_hijos_completos(miembro_id, MiembroRelacion):
-    """Obtiene hijos directos + inferidos (hijos de cónyuge)."""
-    rels = _obtener_relaciones_directas(miembro_id, MiembroRelacion)
-    hijos_directos = rels["hijos"]
-    conyuges = rels["conyuges"]
-    hijos_inferidos = set()
-    
-    for conyuge_id in conyuges:
-        rels_conyuge = _obtener_relaciones_directas(conyuge_id, MiembroRelacion)
-        for hijo_id in rels_conyuge["hijos"]:
-            if hijo_id not in hijos_directos and hijo_id != miembro_id:
-                hijos_inferidos.add(hijo_id)
-    
-    return hijos_directos, hijos_inferidos
+# El cálculo vive en miembros_app.parentesco (grafo en memoria + diff en
+# bloque); aquí quedan los puntos de entrada que usan los signals y vistas.
 
+def _tenant_de(miembro_id):
+    from miembros_app.models import Miembro
 
-def _obtener_hermanos_completos(miembro_id, todos_padres, MiembroRelacion):
-    """Obtiene hermanos (comparten al menos un padre)."""
-    hermanos = set()
-    
-    if todos_padres:
-        hermanos = set(
-            MiembroRelacion.objects
-            .filter(tipo_relacion__in=["padre", "madre"], familiar_id__in=todos_padres, es_inferida=False)
-            .exclude(miembro_id=miembro_id)
-            .values_list("miembro_id", flat=True)
-        )
-        
-        hijos_de_padres = set(
-            MiembroRelacion.objects
-            .filter(miembro_id__in=todos_padres, tipo_relacion="hijo", es_inferida=False)
-            .exclude(familiar_id=miembro_id)
-            .values_list("familiar_id", flat=True)
-        )
-        hermanos |= hijos_de_padres
-    
-    return hermanos
+    return (
+        Miembro.all_objects.filter(pk=miembro_id)
+        .values_list("tenant_id", flat=True)
+        .first()
+    )
 
 
-@transaction.atomic
 def sincronizar_relaciones_inferidas(miembro_id):
     """
-    Calcula y guarda todas las relaciones inferidas de un miembro.
-    Elimina las inferidas anteriores y crea las nuevas.
+    Calcula y guarda todas las relaciones inferidas de UN miembro: borra
+    las que sobran y crea las que faltan. Devuelve cuántas creó.
     """
-    from miembros_app.models import MiembroRelacion, Miembro
-    
-    # 1) Eliminar relaciones inferidas anteriores de este miembro
-    MiembroRelacion.objects.filter(
-        miembro_id=miembro_id,
-        es_inferida=True
-    ).delete()
-    
-    # 2) Obtener relaciones directas
-    rels = _obtener_relaciones_directas(miembro_id, MiembroRelacion)
-    padres_directos = rels["padres"]
-    hijos_directos = rels["hijos"]
-    hermanos_directos = rels["hermanos"]
-    conyuges_directos = rels["conyuges"]
-    
-    # 3) Calcular padres completos
-    _, padres_inferidos = _obtener_padres_completos(miembro_id, MiembroRelacion)
-    todos_padres = padres_directos | padres_inferidos
-    
-    # 4) Calcular hijos completos
-    _, hijos_inferidos = _obtener_hijos_completos(miembro_id, MiembroRelacion)
-    todos_hijos = hijos_directos | hijos_inferidos
-    
-    # 5) Calcular hermanos
-    hermanos = _obtener_hermanos_completos(miembro_id, todos_padres, MiembroRelacion)
-    hermanos |= hermanos_directos
-    hermanos_solo_inferidos = hermanos - hermanos_directos
-    
-    # 6) Calcular abuelos (padres de mis padres)
-    abuelos = set()
-    for padre_id in todos_padres:
-        p_dir, p_inf = _obtener_padres_completos(padre_id, MiembroRelacion)
-        abuelos |= p_dir | p_inf
-    
-    # 7) Calcular tíos (hermanos de mis padres)
-    tios = set()
-    for padre_id in todos_padres:
-        p_dir, p_inf = _obtener_padres_completos(padre_id, MiembroRelacion)
-        abuelos_linea = p_dir | p_inf
-        hermanos_padre = _obtener_hermanos_completos(padre_id, abuelos_linea, MiembroRelacion)
-        tios |= hermanos_padre
-    
-    # 8) Calcular sobrinos (hijos de mis hermanos)
-    sobrinos = set()
-    for hermano_id in hermanos:
-        h_dir, h_inf = _obtener_hijos_completos(hermano_id, MiembroRelacion)
-        sobrinos |= h_dir | h_inf
-    
-    # 9) Calcular primos (hijos de mis tíos)
-    primos = set()
-    for tio_id in tios:
-        h_dir, h_inf = _obtener_hijos_completos(tio_id, MiembroRelacion)
-        primos |= h_dir | h_inf
-    
-    # 10) Calcular nietos (hijos de mis hijos)
-    nietos = set()
-    for hijo_id in todos_hijos:
-        h_dir, h_inf = _obtener_hijos_completos(hijo_id, MiembroRelacion)
-        nietos |= h_dir | h_inf
-    
-    # 11) Calcular cuñados
-    cunados = set()
-    for hermano_id in hermanos:
-        r = _obtener_relaciones_directas(hermano_id, MiembroRelacion)
-        cunados |= r["conyuges"]
-    for conyuge_id in conyuges_directos:
-        p_dir, p_inf = _obtener_padres_completos(conyuge_id, MiembroRelacion)
-        padres_conyuge = p_dir | p_inf
-        hermanos_conyuge = _obtener_hermanos_completos(conyuge_id, padres_conyuge, MiembroRelacion)
-        cunados |= hermanos_conyuge
-    
-    # 12) Calcular suegros (padres de mi cónyuge)
-    suegros = set()
-    for conyuge_id in conyuges_directos:
-        p_dir, p_inf = _obtener_padres_completos(conyuge_id, MiembroRelacion)
-        suegros |= p_dir | p_inf
-    
-    # 13) Calcular yernos/nueras (cónyuges de mis hijos)
-    yernos = set()
-    for hijo_id in todos_hijos:
-        r = _obtener_relaciones_directas(hijo_id, MiembroRelacion)
-        yernos |= r["conyuges"]
-    
-    # 14) Calcular consuegros (padres de mis yernos)
-    consuegros = set()
-    for yerno_id in yernos:
-        p_dir, p_inf = _obtener_padres_completos(yerno_id, MiembroRelacion)
-        consuegros |= p_dir | p_inf
-    
-    # 15) Calcular bisabuelos (padres de mis abuelos)
-    bisabuelos = set()
-    for abuelo_id in abuelos:
-        p_dir, p_inf = _obtener_padres_completos(abuelo_id, MiembroRelacion)
-        bisabuelos |= p_dir | p_inf
-    
-    # 16) Calcular bisnietos (hijos de mis nietos)
-    bisnietos = set()
-    for nieto_id in nietos:
-        h_dir, h_inf = _obtener_hijos_completos(nieto_id, MiembroRelacion)
-        bisnietos |= h_dir | h_inf
-    
-    # ═══════════════════════════════════════════════════════════════════════════
-    # CREAR RELACIONES INFERIDAS
-    # ═══════════════════════════════════════════════════════════════════════════
-    
-    ids_directos = padres_directos | hijos_directos | hermanos_directos | conyuges_directos
-    
-    todos_ids = (
-        padres_inferidos | hijos_inferidos | hermanos_solo_inferidos | abuelos | tios |
-        sobrinos | primos | nietos | cunados | suegros | yernos | consuegros |
-        bisabuelos | bisnietos
-    )
-    
-    miembros_map = {}
-    for m in Miembro.objects.filter(id__in=todos_ids).only("id", "genero"):
-        miembros_map[m.id] = m
-    
-    relaciones_a_crear = []
-    
-    # ✅ OBTENER EL TENANT DEL MIEMBRO PRINCIPAL
-    miembro_obj = Miembro.objects.filter(id=miembro_id).only("id", "tenant").first()
-    tenant = miembro_obj.tenant if miembro_obj else None
-    
-    def crear_relacion(otro_id, tipo, nota):
-        if otro_id == miembro_id or otro_id in ids_directos:
-            return
-        existe = MiembroRelacion.objects.filter(
-            miembro_id=miembro_id, familiar_id=otro_id
-        ).exists()
-        if not existe:
-            relaciones_a_crear.append(MiembroRelacion(
-                tenant=tenant,  # ✅ AGREGAR TENANT
-                miembro_id=miembro_id,
-                familiar_id=otro_id,
-                tipo_relacion=tipo,
-                es_inferida=True,
-                notas=nota
-            ))
-    
-    # Crear cada tipo de relación
-    for otro_id in padres_inferidos:
-        otro = miembros_map.get(otro_id)
-        genero = (otro.genero or "").lower() if otro else ""
-        tipo = "madre" if genero in ("f", "femenino", "mujer") else "padre"
-        crear_relacion(otro_id, tipo, "Cónyuge de tu padre/madre")
-    
-    for otro_id in hijos_inferidos:
-        crear_relacion(otro_id, "hijo", "Hijo/a de tu cónyuge")
-    
-    for otro_id in hermanos_solo_inferidos:
-        crear_relacion(otro_id, "hermano", "Comparten padre/madre")
-    
-    for otro_id in abuelos:
-        crear_relacion(otro_id, "abuelo", "Padre/madre de tu padre/madre")
-    
-    for otro_id in tios:
-        crear_relacion(otro_id, "tio", "Hermano/a de tu padre/madre")
-    
-    for otro_id in sobrinos:
-        crear_relacion(otro_id, "sobrino", "Hijo/a de tu hermano/a")
-    
-    for otro_id in primos:
-        crear_relacion(otro_id, "primo", "Hijo/a de tu tío/a")
-    
-    for otro_id in nietos:
-        crear_relacion(otro_id, "nieto", "Hijo/a de tu hijo/a")
-    
-    for otro_id in cunados:
-        crear_relacion(otro_id, "cunado", "Cónyuge de hermano/a o hermano/a de cónyuge")
-    
-    for otro_id in suegros:
-        crear_relacion(otro_id, "suegro", "Padre/madre de tu cónyuge")
-    
-    for otro_id in yernos:
-        crear_relacion(otro_id, "yerno", "Cónyuge de tu hijo/a")
-    
-    for otro_id in consuegros:
-        crear_relacion(otro_id, "consuegro", "Padre/madre del cónyuge de tu hijo/a")
-    
-    for otro_id in bisabuelos:
-        crear_relacion(otro_id, "bisabuelo", "Padre/madre de tu abuelo/a")
-    
-    for otro_id in bisnietos:
-        crear_relacion(otro_id, "bisnieto", "Hijo/a de tu nieto/a")
-    
-    # Guardar todas las relaciones
-    if relaciones_a_crear:
-        MiembroRelacion.objects.bulk_create(relaciones_a_crear)
-    
-    return len(relaciones_a_crear)
+    from miembros_app import parentesco
+
+    tenant_id = _tenant_de(miembro_id)
+    if tenant_id is None:
+        return 0
+    creadas, _ = parentesco.sincronizar(tenant_id, [miembro_id], todo_el_componente=False)
+    return creadas
 
 
 def sincronizar_familia_completa(miembro_id):
     """
-    Sincroniza las relaciones de un miembro Y de todos sus familiares directos.
+    Sincroniza las relaciones inferidas de todo el componente familiar del
+    miembro (cualquiera conectado por relaciones directas). Número de
+    consultas constante, sin importar el tamaño de la familia.
     """
-    from miembros_app.models import MiembroRelacion
-    
-    ids_a_sincronizar = {miembro_id}
-    
-    rels = MiembroRelacion.objects.filter(
-        Q(miembro_id=miembro_id) | Q(familiar_id=miembro_id),
-        es_inferida=False
-    )
-    
-    for rel in rels:
-        ids_a_sincronizar.add(rel.miembro_id)
-        ids_a_sincronizar.add(rel.familiar_id)
-    
-    total = 0
-    for mid in ids_a_sincronizar:
-        total += sincronizar_relaciones_inferidas(mid)
-    
-    return total
+    from miembros_app import parentesco
+
+    tenant_id = _tenant_de(miembro_id)
+    if tenant_id is None:
+        return 0
+    creadas, _ = parentesco.sincronizar(tenant_id, [miembro_id])
+    return creadas
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # SIGNALS PARA RELACIONES FAMILIARES
 # ═══════════════════════════════════════════════════════════════════════════════
 
-# Flag para evitar recursión infinita
-_sincronizando = threading.local()
+# No se sincroniza dentro del save: se anotan ambos extremos y
+# miembros_app.parentesco procesa la cola una vez después del commit. La
+# sincronización solo escribe filas inferidas, que estos signals ignoran,
+# así que no hay recursión.
 
+def _programar_extremos(relacion):
+    from miembros_app import parentesco
 
-@receiver(post_save, sender='miembros_app.MiembroRelacion')
-def relacion_familiar_post_save(sender, instance, created, **kwargs):
-    """Sincroniza relaciones inferidas cuando se guarda una relación directa."""
-    if instance.es_inferida:
+    tenant_id = relacion.tenant_id or _tenant_de(relacion.miembro_id)
+    if tenant_id is None:
         return
-    
-    if getattr(_sincronizando, 'activo', False):
+    parentesco.programar_sincronizacion(tenant_id, [relacion.miembro_id, relacion.familiar_id])
+
+
+@receiver(post_save, sender='miembros_app.MiembroRelacion')
+def relacion_familiar_post_save(sender, instance, created, raw=False, **kwargs):
+    """Programa la sincronización de inferidas cuando se guarda una relación directa."""
+    if raw or instance.es_inferida:
         return
-    
-    try:
-        _sincronizando.activo = True
-        sincronizar_familia_completa(instance.miembro_id)
-        sincronizar_familia_completa(instance.familiar_id)
-    finally:
-        _sincronizando.activo = False
+    _programar_extremos(instance)
 
 
 @receiver(post_delete, sender='miembros_app.MiembroRelacion')
 def relacion_familiar_post_delete(sender, instance, **kwargs):
-    """Sincroniza relaciones inferidas cuando se elimina una relación."""
+    """Programa la sincronización de inferidas cuando se elimina una relación."""
     if instance.es_inferida:
         return
-    
-    if getattr(_sincronizando, 'activo', False):
-        return
-    
-    try:
-        _sincronizando.activo = True
-        sincronizar_familia_completa(instance.miembro_id)
-        sincronizar_familia_completa(instance.familiar_id)
-    finally:
-        _sincronizando.activo = False
\ No newline at end of file
+    _programar_extremos(instance)
@@ -13,9 +13,9 @@ from django.contrib.auth.decorators import login_required, permission_required
 from django.views.decorators.http import require_POST, require_GET
 from django.urls import reverse
 from django.utils import timezone
-from django.db.models import Q
 from django.core.files.base import ContentFile
 
+from miembros_app import busqueda
 from miembros_app.models import Miembro
 from miembros_app.pdf_reportlab import generar_pdf_listado_miembros_reportlab
 from core.models import DocumentoCompartido
@@ -150,11 +150,7 @@ def listado_miembros_crear_link_publico(request):
 
         q = request.GET.get("q", "").strip()
         if q:
-            miembros = miembros.filter(
-                Q(nombres__icontains=q) |
-                Q(apellidos__icontains=q) |
-                Q(cedula__icontains=q)
-            )
+            miembros = busqueda.filtrar(miembros, q)
 
         estado = request.GET.get("estado", "")
         if estado:
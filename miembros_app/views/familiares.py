@@ -17,6 +17,8 @@ from django.db import transaction
 from miembros_app.models import Miembro, MiembroRelacion
 from miembros_app.validators import validar_relacion_familiar
 from miembros_app.models import HogarFamiliar, HogarMiembro, Miembro, MiembroRelacion
+from miembros_app import busqueda
+from miembros_app.parentesco import RAZONES, GrafoFamiliar
 
 
 
@@ -39,277 +41,34 @@ TIPOS_RELACION = MiembroRelacion.TIPO_RELACION_CHOICES
 # FUNCIONES AUXILIARES
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def _obtener_relaciones_directas(miembro_id):
+def calcular_parentescos_inferidos(miembro):
     """
-    Obtiene todas las relaciones directas de un miembro, normalizadas.
+    Calcula TODOS los parentescos inferidos de un miembro con el motor de
+    miembros_app.parentesco (una consulta para el grafo + una para los datos
+    de las personas).
     """
-    padres = set()
-    hijos = set()
-    hermanos = set()
-    conyuges = set()
-    
-    rels = (
-        MiembroRelacion.objects
-        .filter(Q(miembro_id=miembro_id) | Q(familiar_id=miembro_id))
-        .select_related("miembro", "familiar")
-    )
-    
-    for rel in rels:
-        if rel.miembro_id == miembro_id:
-            otro_id = rel.familiar_id
-            tipo = rel.tipo_relacion
-        else:
-            otro_id = rel.miembro_id
-            tipo = MiembroRelacion.inverse_tipo(rel.tipo_relacion, rel.miembro.genero)
-        
-        if tipo in ("padre", "madre"):
-            padres.add(otro_id)
-        elif tipo == "hijo":
-            hijos.add(otro_id)
-        elif tipo == "hermano":
-            hermanos.add(otro_id)
-        elif tipo == "conyuge":
-            conyuges.add(otro_id)
-    
-    return {
-        "padres": padres,
-        "hijos": hijos,
-        "hermanos": hermanos,
-        "conyuges": conyuges,
-    }
-
-
-def _obtener_padres_completos(miembro_id, cache=None):
-    """Obtiene TODOS los padres de un miembro (directos + inferidos por cónyuge)."""
-    if cache is None:
-        cache = {}
-    
-    cache_key = f"padres_{miembro_id}"
-    if cache_key in cache:
-        return cache[cache_key]
-    
-    rels = _obtener_relaciones_directas(miembro_id)
-    padres_directos = rels["padres"]
-    padres_inferidos = set()
-    
-    if padres_directos:
-        rels_padres = (
-            MiembroRelacion.objects
-            .filter(
-                Q(miembro_id__in=padres_directos, tipo_relacion="conyuge") |
-                Q(familiar_id__in=padres_directos, tipo_relacion="conyuge")
-            )
-        )
-        
-        for rel in rels_padres:
-            conyuge_id = rel.familiar_id if rel.miembro_id in padres_directos else rel.miembro_id
-            if conyuge_id not in padres_directos and conyuge_id != miembro_id:
-                padres_inferidos.add(conyuge_id)
-    
-    resultado = (padres_directos, padres_inferidos)
-    cache[cache_key] = resultado
-    return resultado
-
-
-def _obtener_hijos_completos(miembro_id, cache=None):
-    """Obtiene TODOS los hijos de un miembro (directos + inferidos por cónyuge)."""
-    if cache is None:
-        cache = {}
-    
-    cache_key = f"hijos_{miembro_id}"
-    if cache_key in cache:
-        return cache[cache_key]
-    
-    rels = _obtener_relaciones_directas(miembro_id)
-    hijos_directos = rels["hijos"]
-    conyuges = rels["conyuges"]
-    hijos_inferidos = set()
-    
-    if conyuges:
-        for conyuge_id in conyuges:
-            rels_conyuge = _obtener_relaciones_directas(conyuge_id)
-            hijos_conyuge = rels_conyuge["hijos"]
-            for hijo_id in hijos_conyuge:
-                if hijo_id not in hijos_directos and hijo_id != miembro_id:
-                    hijos_inferidos.add(hijo_id)
-    
-    resultado = (hijos_directos, hijos_inferidos)
-    cache[cache_key] = resultado
-    return resultado
-
-
-def _obtener_hermanos_completos(miembro_id, todos_padres_ids):
-    """Obtiene todos los hermanos (personas que comparten al menos un padre)."""
-    hermanos = set()
-    
-    if not todos_padres_ids:
-        return hermanos
-    
-    hermanos = set(
-        MiembroRelacion.objects
-        .filter(tipo_relacion__in=["padre", "madre"], familiar_id__in=todos_padres_ids)
-        .exclude(miembro_id=miembro_id)
-        .values_list("miembro_id", flat=True)
-    )
-    
-    hijos_de_padres = set(
-        MiembroRelacion.objects
-        .filter(miembro_id__in=todos_padres_ids, tipo_relacion="hijo")
-        .exclude(familiar_id=miembro_id)
-        .values_list("familiar_id", flat=True)
-    )
-    
-    hermanos |= hijos_de_padres
-    return hermanos
+    grafo = GrafoFamiliar.cargar(miembro.tenant_id)
+    por_tipo = grafo.inferidos(miembro.id)
 
-
-def calcular_parentescos_inferidos(miembro):
-    """Calcula TODOS los parentescos inferidos de un miembro."""
-    mi_id = miembro.id
-    cache = {}
-
-    mis_rels = _obtener_relaciones_directas(mi_id)
-    padres_directos = mis_rels["padres"]
-    hijos_directos = mis_rels["hijos"]
-    hermanos_directos = mis_rels["hermanos"]
-    conyuges_directos = mis_rels["conyuges"]
-
-    padres_dir, padres_inf = _obtener_padres_completos(mi_id, cache)
-    todos_mis_padres = padres_dir | padres_inf
-
-    hijos_dir, hijos_inf = _obtener_hijos_completos(mi_id, cache)
-    todos_mis_hijos = hijos_dir | hijos_inf
-
-    hermanos_inferidos = _obtener_hermanos_completos(mi_id, todos_mis_padres)
-    hermanos_inferidos |= hermanos_directos
-    todos_mis_hermanos = hermanos_inferidos.copy()
-
-    # Abuelos
-    abuelos_ids = set()
-    for padre_id in todos_mis_padres:
-        p_dir, p_inf = _obtener_padres_completos(padre_id, cache)
-        abuelos_ids |= p_dir | p_inf
-
-    # Tíos
-    tios_ids = set()
-    for padre_id in todos_mis_padres:
-        p_dir, p_inf = _obtener_padres_completos(padre_id, cache)
-        abuelos_linea = p_dir | p_inf
-        hermanos_del_padre = _obtener_hermanos_completos(padre_id, abuelos_linea)
-        tios_ids |= hermanos_del_padre
-
-    # Sobrinos
-    sobrinos_ids = set()
-    for hermano_id in todos_mis_hermanos:
-        h_dir, h_inf = _obtener_hijos_completos(hermano_id, cache)
-        sobrinos_ids |= h_dir | h_inf
-
-    # Primos
-    primos_ids = set()
-    for tio_id in tios_ids:
-        h_dir, h_inf = _obtener_hijos_completos(tio_id, cache)
-        primos_ids |= h_dir | h_inf
-
-    # Nietos
-    nietos_ids = set()
-    for hijo_id in todos_mis_hijos:
-        h_dir, h_inf = _obtener_hijos_completos(hijo_id, cache)
-        nietos_ids |= h_dir | h_inf
-
-    # Cuñados
-    cunados_ids = set()
-    for hermano_id in todos_mis_hermanos:
-        rels_hermano = _obtener_relaciones_directas(hermano_id)
-        cunados_ids |= rels_hermano["conyuges"]
-    
-    for conyuge_id in conyuges_directos:
-        p_dir, p_inf = _obtener_padres_completos(conyuge_id, cache)
-        hermanos_conyuge = _obtener_hermanos_completos(conyuge_id, p_dir | p_inf)
-        cunados_ids |= hermanos_conyuge
-
-    # Suegros
-    suegros_ids = set()
-    for conyuge_id in conyuges_directos:
-        p_dir, p_inf = _obtener_padres_completos(conyuge_id, cache)
-        suegros_ids |= p_dir | p_inf
-
-    # Yernos/Nueras
-    yernos_ids = set()
-    for hijo_id in todos_mis_hijos:
-        rels_hijo = _obtener_relaciones_directas(hijo_id)
-        yernos_ids |= rels_hijo["conyuges"]
-
-    # Consuegros
-    consuegros_ids = set()
-    for yerno_id in yernos_ids:
-        p_dir, p_inf = _obtener_padres_completos(yerno_id, cache)
-        consuegros_ids |= p_dir | p_inf
-
-    # Bisabuelos
-    bisabuelos_ids = set()
-    for abuelo_id in abuelos_ids:
-        p_dir, p_inf = _obtener_padres_completos(abuelo_id, cache)
-        bisabuelos_ids |= p_dir | p_inf
-
-    # Bisnietos
-    bisnietos_ids = set()
-    for nieto_id in nietos_ids:
-        h_dir, h_inf = _obtener_hijos_completos(nieto_id, cache)
-        bisnietos_ids |= h_dir | h_inf
-
-    # Limpieza
-    ids_directos = padres_directos | hijos_directos | hermanos_directos | conyuges_directos
-    
-    todos_sets = [
-        padres_inf, hijos_inf, hermanos_inferidos, abuelos_ids, tios_ids,
-        sobrinos_ids, primos_ids, nietos_ids, cunados_ids, suegros_ids,
-        yernos_ids, consuegros_ids, bisabuelos_ids, bisnietos_ids
-    ]
-    
-    for s in todos_sets:
-        s.discard(mi_id)
-        s -= ids_directos
-    
-    hermanos_inferidos -= hermanos_directos
-
-    # Construir resultado
-    ids_total = set()
-    for s in todos_sets:
-        ids_total |= s
-    
+    ids_total = set().union(*por_tipo.values())
     miembros_map = {
-        m.id: m 
+        m.id: m
         for m in Miembro.objects.filter(id__in=ids_total).only("id", "nombres", "apellidos", "genero", "foto")
     }
 
-    def pack(ids_set, tipo, razon=""):
-        return [
+    inferidos = []
+    for tipo, ids in por_tipo.items():
+        inferidos += [
             {
                 "otro": miembros_map[mid],
                 "tipo": tipo,
                 "tipo_label": MiembroRelacion.label_por_genero(tipo, miembros_map[mid].genero),
                 "inferido": True,
-                "razon": razon,
+                "razon": RAZONES[tipo],
             }
-            for mid in ids_set if mid in miembros_map
+            for mid in ids if mid in miembros_map
         ]
 
-    inferidos = []
-    inferidos += pack(padres_inf, "padre", "Cónyuge de tu padre/madre")
-    inferidos += pack(hijos_inf, "hijo", "Hijo/a de tu cónyuge")
-    inferidos += pack(hermanos_inferidos, "hermano", "Comparten padre/madre")
-    inferidos += pack(abuelos_ids, "abuelo", "Padre/madre de tu padre/madre")
-    inferidos += pack(bisabuelos_ids, "bisabuelo", "Padre/madre de tu abuelo/a")
-    inferidos += pack(tios_ids, "tio", "Hermano/a de tu padre/madre")
-    inferidos += pack(sobrinos_ids, "sobrino", "Hijo/a de tu hermano/a")
-    inferidos += pack(primos_ids, "primo", "Hijo/a de tu tío/a")
-    inferidos += pack(nietos_ids, "nieto", "Hijo/a de tu hijo/a")
-    inferidos += pack(bisnietos_ids, "bisnieto", "Hijo/a de tu nieto/a")
-    inferidos += pack(cunados_ids, "cunado", "Cónyuge de hermano/a o hermano/a de cónyuge")
-    inferidos += pack(suegros_ids, "suegro", "Padre/madre de tu cónyuge")
-    inferidos += pack(yernos_ids, "yerno", "Cónyuge de tu hijo/a")
-    inferidos += pack(consuegros_ids, "consuegro", "Padre/madre del cónyuge de tu hijo/a")
-
     return inferidos
 
 
@@ -530,15 +289,11 @@ def ajax_buscar_miembros(request):
     if len(q) < 2:
         return JsonResponse({"results": []})
     
-    miembros = Miembro.objects.filter(
-        Q(nombres__icontains=q) |
-        Q(apellidos__icontains=q) |
-        Q(codigo_miembro__icontains=q) |
-        Q(codigo_seguimiento__icontains=q)
-    )[:15]
+    miembros = busqueda.filtrar(Miembro.objects.all(), q)
     
     if exclude_id:
         miembros = miembros.exclude(pk=exclude_id)
+    miembros = miembros[:15]
     
     results = []
     for m in miembros:
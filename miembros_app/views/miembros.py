@@ -4,7 +4,7 @@ miembros_app/views/miembros.py
 Vistas CRUD de miembros: lista, crear, editar, detalle.
 """
 from django.core.paginator import Paginator
-from datetime import date, timedelta
+from datetime import date
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
@@ -15,8 +15,10 @@ from django.views.decorators.http import require_GET
 from django.urls import reverse
 from django.db.models import Q, Sum
 
-from miembros_app.models import Miembro, MiembroRelacion, sync_familia_inteligente_por_relacion
+from miembros_app.models import Miembro, MiembroRelacion, fecha_limite_edad, sync_familia_inteligente_por_relacion
 from miembros_app.forms import MiembroForm, MiembroRelacionForm
+from miembros_app import busqueda
+from miembros_app.parentesco import sincronizacion_diferida
 from core.utils_config import get_edad_minima_miembro_oficial
 from notificaciones_app.utils import crear_notificacion
 from finanzas_app.models import MovimientoFinanciero
@@ -42,8 +44,9 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
     Aplica todos los filtros del listado general de miembros.
     Devuelve: (miembros, filtros_context)
     
-    Si para_paginacion=True, el filtro de rango de edad se hace en BD
-    en lugar de en memoria (más eficiente para paginación).
+    Siempre devuelve un queryset (el rango de edad se filtra en BD), así las
+    exportaciones PDF/Excel iteran desde la consulta. para_paginacion se
+    mantiene por compatibilidad con las vistas que lo pasan.
     """
     hoy = date.today()
     
@@ -74,7 +77,7 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
         miembros = miembros.filter(activo=True)
 
     # Exclusión de niños
-    cutoff_ninos = hoy - timedelta(days=CORTE_NINOS * 365)
+    cutoff_ninos = fecha_limite_edad(CORTE_NINOS, hoy)
     categorias_nino = ("infante", "nino")
 
     if not incluir_ninos and categoria_edad_filtro not in categorias_nino:
@@ -84,13 +87,7 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
 
     # Búsqueda general
     if query:
-        miembros = miembros.filter(
-            Q(nombres__icontains=query) |
-            Q(apellidos__icontains=query) |
-            Q(telefono__icontains=query) |
-            Q(email__icontains=query) |
-            Q(cedula__icontains=query)
-        )
+        miembros = busqueda.filtrar(miembros, query)
 
     # Filtros simples
     if estado:
@@ -127,43 +124,12 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
         )
 
     # ═══════════════════════════════════════════════════════════════════════════
-    # FILTRO POR RANGO DE EDAD - Optimizado para BD
+    # FILTRO POR RANGO DE EDAD - En BD para listado y exportaciones
     # ═══════════════════════════════════════════════════════════════════════════
-    if usar_rango_edad and (edad_min is not None or edad_max is not None):
-        if para_paginacion:
-            # Filtrar en BD usando fecha_nacimiento (más eficiente)
-            if edad_min is not None:
-                # Para tener al menos edad_min años, debe haber nacido antes de esta fecha
-                fecha_max_nacimiento = hoy - timedelta(days=edad_min * 365)
-                miembros = miembros.filter(
-                    fecha_nacimiento__isnull=False,
-                    fecha_nacimiento__lte=fecha_max_nacimiento
-                )
-            if edad_max is not None:
-                # Para tener como máximo edad_max años, debe haber nacido después de esta fecha
-                fecha_min_nacimiento = hoy - timedelta(days=(edad_max + 1) * 365)
-                miembros = miembros.filter(
-                    fecha_nacimiento__gte=fecha_min_nacimiento
-                )
-        else:
-            # Método original (para reportes PDF que necesitan todos los registros)
-            miembros_filtrados = []
-            for m in miembros:
-                if not m.fecha_nacimiento:
-                    continue
-                edad = calcular_edad(m.fecha_nacimiento, hoy)
-                if edad is None:
-                    continue
-                if edad_min is not None and edad < edad_min:
-                    continue
-                if edad_max is not None and edad > edad_max:
-                    continue
-                miembros_filtrados.append(m)
-            miembros = miembros_filtrados
-
-    # Orden base (solo si sigue siendo queryset)
-    if hasattr(miembros, 'order_by'):
-        miembros = miembros.order_by("nombres", "apellidos")
+    if usar_rango_edad:
+        miembros = miembros.age_between(edad_min, edad_max, hoy)
+
+    miembros = miembros.order_by("nombres", "apellidos")
 
     # Choices para los selects
     filtros_context = {
@@ -417,8 +383,9 @@ class MiembroUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView)
 
             miembro_editado.save()
 
-            # Sincronizar familiares
-            self._sincronizar_familiares(request, miembro_editado)
+            # Sincronizar familiares (parentescos inferidos: una pasada al final)
+            with sincronizacion_diferida():
+                self._sincronizar_familiares(request, miembro_editado)
 
             # Notificación de salida
             salida_despues = not miembro_editado.activo and miembro_editado.fecha_salida is not None
@@ -620,7 +587,7 @@ miembros_app/views/miembros.py
 Vistas CRUD de miembros: lista, crear, editar, detalle.
 """
 from django.core.paginator import Paginator
-from datetime import date, timedelta
+from datetime import date
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
@@ -631,8 +598,10 @@ from django.views.decorators.http import require_GET
 from django.urls import reverse
 from django.db.models import Q, Sum
 
-from miembros_app.models import Miembro, MiembroRelacion, sync_familia_inteligente_por_relacion
+from miembros_app.models import Miembro, MiembroRelacion, fecha_limite_edad, sync_familia_inteligente_por_relacion
 from miembros_app.forms import MiembroForm, MiembroRelacionForm
+from miembros_app import busqueda
+from miembros_app.parentesco import sincronizacion_diferida
 from core.utils_config import get_edad_minima_miembro_oficial
 from notificaciones_app.utils import crear_notificacion
 from finanzas_app.models import MovimientoFinanciero
@@ -658,8 +627,9 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
     Aplica todos los filtros del listado general de miembros.
     Devuelve: (miembros, filtros_context)
     
-    Si para_paginacion=True, el filtro de rango de edad se hace en BD
-    en lugar de en memoria (más eficiente para paginación).
+    Siempre devuelve un queryset (el rango de edad se filtra en BD), así las
+    exportaciones PDF/Excel iteran desde la consulta. para_paginacion se
+    mantiene por compatibilidad con las vistas que lo pasan.
     """
     hoy = date.today()
     
@@ -690,7 +660,7 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
         miembros = miembros.filter(activo=True)
 
     # Exclusión de niños
-    cutoff_ninos = hoy - timedelta(days=CORTE_NINOS * 365)
+    cutoff_ninos = fecha_limite_edad(CORTE_NINOS, hoy)
     categorias_nino = ("infante", "nino")
 
     if not incluir_ninos and categoria_edad_filtro not in categorias_nino:
@@ -700,13 +670,7 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
 
     # Búsqueda general
     if query:
-        miembros = miembros.filter(
-            Q(nombres__icontains=query) |
-            Q(apellidos__icontains=query) |
-            Q(telefono__icontains=query) |
-            Q(email__icontains=query) |
-            Q(cedula__icontains=query)
-        )
+        miembros = busqueda.filtrar(miembros, query)
 
     # Filtros simples
     if estado:
@@ -743,43 +707,12 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
         )
 
     # ═══════════════════════════════════════════════════════════════════════════
-    # FILTRO POR RANGO DE EDAD - Optimizado para BD
+    # FILTRO POR RANGO DE EDAD - En BD para listado y exportaciones
     # ═══════════════════════════════════════════════════════════════════════════
-    if usar_rango_edad and (edad_min is not None or edad_max is not None):
-        if para_paginacion:
-            # Filtrar en BD usando fecha_nacimiento (más eficiente)
-            if edad_min is not None:
-                # Para tener al menos edad_min años, debe haber nacido antes de esta fecha
-                fecha_max_nacimiento = hoy - timedelta(days=edad_min * 365)
-                miembros = miembros.filter(
-                    fecha_nacimiento__isnull=False,
-                    fecha_nacimiento__lte=fecha_max_nacimiento
-                )
-            if edad_max is not None:
-                # Para tener como máximo edad_max años, debe haber nacido después de esta fecha
-                fecha_min_nacimiento = hoy - timedelta(days=(edad_max + 1) * 365)
-                miembros = miembros.filter(
-                    fecha_nacimiento__gte=fecha_min_nacimiento
-                )
-        else:
-            # Método original (para reportes PDF que necesitan todos los registros)
-            miembros_filtrados = []
-            for m in miembros:
-                if not m.fecha_nacimiento:
-                    continue
-                edad = calcular_edad(m.fecha_nacimiento, hoy)
-                if edad is None:
-                    continue
-                if edad_min is not None and edad < edad_min:
-                    continue
-                if edad_max is not None and edad > edad_max:
-                    continue
-                miembros_filtrados.append(m)
-            miembros = miembros_filtrados
-
-    # Orden base (solo si sigue siendo queryset)
-    if hasattr(miembros, 'order_by'):
-        miembros = miembros.order_by("nombres", "apellidos")
+    if usar_rango_edad:
+        miembros = miembros.age_between(edad_min, edad_max, hoy)
+
+    miembros = miembros.order_by("nombres", "apellidos")
 
     # Choices para los selects
     filtros_context = {
@@ -1033,8 +966,9 @@ class MiembroUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView)
 
             miembro_editado.save()
 
-            # Sincronizar familiares
-            self._sincronizar_familiares(request, miembro_editado)
+            # Sincronizar familiares (parentescos inferidos: una pasada al final)
+            with sincronizacion_diferida():
+                self._sincronizar_familiares(request, miembro_editado)
 
             # Notificación de salida
             salida_despues = not miembro_editado.activo and miembro_editado.fecha_salida is not None
@@ -1236,7 +1170,7 @@ miembros_app/views/miembros.py
 Vistas CRUD de miembros: lista, crear, editar, detalle.
 """
 from django.core.paginator import Paginator
-from datetime import date, timedelta
+from datetime import date
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
@@ -1247,8 +1181,10 @@ from django.views.decorators.http import require_GET
 from django.urls import reverse
 from django.db.models import Q, Sum
 
-from miembros_app.models import Miembro, MiembroRelacion, sync_familia_inteligente_por_relacion
+from miembros_app.models import Miembro, MiembroRelacion, fecha_limite_edad, sync_familia_inteligente_por_relacion
 from miembros_app.forms import MiembroForm, MiembroRelacionForm
+from miembros_app import busqueda
+from miembros_app.parentesco import sincronizacion_diferida
 from core.utils_config import get_edad_minima_miembro_oficial
 from notificaciones_app.utils import crear_notificacion
 from finanzas_app.models import MovimientoFinanciero
@@ -1274,8 +1210,9 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
     Aplica todos los filtros del listado general de miembros.
     Devuelve: (miembros, filtros_context)
     
-    Si para_paginacion=True, el filtro de rango de edad se hace en BD
-    en lugar de en memoria (más eficiente para paginación).
+    Siempre devuelve un queryset (el rango de edad se filtra en BD), así las
+    exportaciones PDF/Excel iteran desde la consulta. para_paginacion se
+    mantiene por compatibilidad con las vistas que lo pasan.
     """
     hoy = date.today()
     
@@ -1306,7 +1243,7 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
         miembros = miembros.filter(activo=True)
 
     # Exclusión de niños
-    cutoff_ninos = hoy - timedelta(days=CORTE_NINOS * 365)
+    cutoff_ninos = fecha_limite_edad(CORTE_NINOS, hoy)
     categorias_nino = ("infante", "nino")
 
     if not incluir_ninos and categoria_edad_filtro not in categorias_nino:
@@ -1316,13 +1253,7 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
 
     # Búsqueda general
     if query:
-        miembros = miembros.filter(
-            Q(nombres__icontains=query) |
-            Q(apellidos__icontains=query) |
-            Q(telefono__icontains=query) |
-            Q(email__icontains=query) |
-            Q(cedula__icontains=query)
-        )
+        miembros = busqueda.filtrar(miembros, query)
 
     # Filtros simples
     if estado:
@@ -1359,43 +1290,12 @@ def filtrar_miembros(request, miembros_base, para_paginacion=False):
         )
 
     # ═══════════════════════════════════════════════════════════════════════════
-    # FILTRO POR RANGO DE EDAD - Optimizado para BD
+    # FILTRO POR RANGO DE EDAD - En BD para listado y exportaciones
     # ═══════════════════════════════════════════════════════════════════════════
-    if usar_rango_edad and (edad_min is not None or edad_max is not None):
-        if para_paginacion:
-            # Filtrar en BD usando fecha_nacimiento (más eficiente)
-            if edad_min is not None:
-                # Para tener al menos edad_min años, debe haber nacido antes de esta fecha
-                fecha_max_nacimiento = hoy - timedelta(days=edad_min * 365)
-                miembros = miembros.filter(
-                    fecha_nacimiento__isnull=False,
-                    fecha_nacimiento__lte=fecha_max_nacimiento
-                )
-            if edad_max is not None:
-                # Para tener como máximo edad_max años, debe haber nacido después de esta fecha
-                fecha_min_nacimiento = hoy - timedelta(days=(edad_max + 1) * 365)
-                miembros = miembros.filter(
-                    fecha_nacimiento__gte=fecha_min_nacimiento
-                )
-        else:
-            # Método original (para reportes PDF que necesitan todos los registros)
-            miembros_filtrados = []
-            for m in miembros:
-                if not m.fecha_nacimiento:
-                    continue
-                edad = calcular_edad(m.fecha_nacimiento, hoy)
-                if edad is None:
-                    continue
-                if edad_min is not None and edad < edad_min:
-                    continue
-                if edad_max is not None and edad > edad_max:
-                    continue
-                miembros_filtrados.append(m)
-            miembros = miembros_filtrados
-
-    # Orden base (solo si sigue siendo queryset)
-    if hasattr(miembros, 'order_by'):
-        miembros = miembros.order_by("nombres", "apellidos")
+    if usar_rango_edad:
+        miembros = miembros.age_between(edad_min, edad_max, hoy)
+
+    miembros = miembros.order_by("nombres", "apellidos")
 
     # Choices para los selects
     filtros_context = {
@@ -1649,8 +1549,9 @@ class MiembroUpdateView(LoginRequiredMixin, PermissionRequiredMixin, UpdateView)
 
             miembro_editado.save()
 
-            # Sincronizar familiares
-            self._sincronizar_familiares(request, miembro_editado)
+            # Sincronizar familiares (parentescos inferidos: una pasada al final)
+            with sincronizacion_diferida():
+                self._sincronizar_familiares(request, miembro_editado)
 
             # Notificación de salida
             salida_despues = not miembro_editado.activo and miembro_editado.fecha_salida is not None
@@ -65,12 +65,8 @@ def reporte_listado_miembros(request):
     miembros, filtros_context = filtrar_miembros(request, miembros_base)
     
     # Contar activos e inactivos
-    if isinstance(miembros, list):
-        activos_count = sum(1 for m in miembros if m.activo)
-        inactivos_count = sum(1 for m in miembros if not m.activo)
-    else:
-        activos_count = miembros.filter(activo=True).count()
-        inactivos_count = miembros.filter(activo=False).count()
+    activos_count = miembros.filter(activo=True).count()
+    inactivos_count = miembros.filter(activo=False).count()
     
     # Obtener labels para mostrar en metadatos del reporte
     estado = request.GET.get("estado", "").strip()
@@ -587,7 +583,8 @@ def exportar_miembros_excel(request):
     ]
     ws.append(headers)
 
-    for m in miembros:
+    # iterator(): las filas llegan por lotes, sin cachear todo el queryset
+    for m in miembros.iterator(chunk_size=1000):
         try:
             edad = m.edad
         except Exception:
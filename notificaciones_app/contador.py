@@ -0,0 +1,75 @@
+# notificaciones_app/contador.py
+# Contador de notificaciones no leídas por (tenant, usuario).
+#
+# La campana se pintaba con un COUNT(*) sobre Notification en cada página.
+# Ahora el total vive en NotificationCounter (se actualiza con F() al crear
+# y al marcar leídas) y la campana lee esa fila: una consulta por clave
+# única. No se cachea en memoria: con varios workers el cache local de cada
+# proceso dejaba la campana desfasada. Si la fila no existe todavía se
+# calcula una vez a partir de Notification, así que no hace falta migrar datos.
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Notification, NotificationCounter
+
+
+def recalcular(tenant_id, usuario_id):
+    """Recalcula el contador desde Notification y lo guarda. Devuelve el total."""
+    total = Notification.objects.filter(tenant_id=tenant_id, usuario_id=usuario_id, leida=False).count()
+    try:
+        with transaction.atomic():
+            NotificationCounter.objects.update_or_create(
+                tenant_id=tenant_id,
+                usuario_id=usuario_id,
+                defaults={"no_leidas": total},
+            )
+    except IntegrityError:
+        # Otro request creó la fila a la vez: basta con actualizarla
+        NotificationCounter.objects.filter(tenant_id=tenant_id, usuario_id=usuario_id).update(no_leidas=total)
+    return total
+
+
+def sumar(tenant_id, usuario_id, n=1, crear=True):
+    """
+    Suma (o resta, con n negativo) de forma atómica en la BD.
+    Con crear=False no se crea la fila si no existe (borrados en cascada).
+    """
+    actualizadas = NotificationCounter.objects.filter(
+        tenant_id=tenant_id, usuario_id=usuario_id
+    ).update(no_leidas=Greatest(F("no_leidas") + n, 0))
+
+    if not actualizadas and crear:
+        # Primera vez para este usuario: la fila nace con el total real
+        recalcular(tenant_id, usuario_id)
+
+
+def total_no_leidas(tenant_id, usuario_id):
+    """Total de no leídas (fila del contador -> COUNT de respaldo)."""
+    total = (
+        NotificationCounter.objects.filter(tenant_id=tenant_id, usuario_id=usuario_id)
+        .values_list("no_leidas", flat=True)
+        .first()
+    )
+    if total is None:
+        total = recalcular(tenant_id, usuario_id)
+    return total
+
+
+def marcar_leidas(tenant_id, usuario_id, ids=None):
+    """
+    Marca como leídas las no leídas del usuario (todas, o solo `ids`)
+    y descuenta del contador. Devuelve cuántas se marcaron.
+    """
+    qs = Notification.objects.filter(tenant_id=tenant_id, usuario_id=usuario_id, leida=False)
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+
+    with transaction.atomic():
+        marcadas = qs.update(leida=True)
+        # Restar lo marcado (no poner 0): una notificación creada por otro
+        # request entre el UPDATE y aquí conserva su +1
+        if marcadas:
+            sumar(tenant_id, usuario_id, -marcadas)
+    return marcadas
@@ -1,6 +1,10 @@
 # notificaciones_app/context_processors.py
 
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from core.request_cache import request_memo
+from .contador import total_no_leidas
 from .models import Notification
 
 
@@ -8,14 +12,18 @@ def notificaciones_context(request):
     """
     Añade al contexto global:
     - NOTIF_NO_LEIDAS: últimas notificaciones no leídas (máx. 5)
-    - NOTIF_TOTAL_NO_LEIDAS: total de no leídas
+    - NOTIF_TOTAL_NO_LEIDAS: total de no leídas (contador cacheado)
     - VAPID_PUBLIC_KEY: clave pública para push notifications
+
+    Las dos primeras son perezosas: solo consultan si la plantilla las usa.
+    La campana de base.html ya no usa NOTIF_NO_LEIDAS: pide la lista a
+    notificaciones_app:ultimas_no_leidas al abrir el menú.
     """
     # VAPID siempre disponible (para la página de perfil)
     vapid_key = getattr(settings, 'VAPID_PUBLIC_KEY', '')
-    
+
     tenant = getattr(request, 'tenant', None)
-    
+
     if not request.user.is_authenticated or not tenant:
         return {
             "VAPID_PUBLIC_KEY": vapid_key,
@@ -28,7 +36,9 @@ def notificaciones_context(request):
     ).order_by("-fecha_creacion")
 
     return {
-        "NOTIF_NO_LEIDAS": qs[:5],
-        "NOTIF_TOTAL_NO_LEIDAS": qs.count(),
+        "NOTIF_NO_LEIDAS": SimpleLazyObject(lambda: request_memo("ctx:notif_ultimas", lambda: list(qs[:5]))),
+        "NOTIF_TOTAL_NO_LEIDAS": SimpleLazyObject(
+            lambda: request_memo("ctx:notif_total", lambda: total_no_leidas(tenant.pk, request.user.pk))
+        ),
         "VAPID_PUBLIC_KEY": vapid_key,
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones_app', '0003_alter_pushsubscription_options_and_more'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notificacio_tenant__66118b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['tenant', 'usuario', 'leida', '-fecha_creacion'], name='notif_tenant_usuario_leida'),
+        ),
+    ]
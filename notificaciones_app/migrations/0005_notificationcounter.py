@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 13:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notificaciones_app', '0004_remove_notification_notificacio_tenant__66118b_idx_and_more'),
+        ('tenants', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('no_leidas', models.PositiveIntegerField(default=0, verbose_name='No leídas')),
+                ('actualizado_en', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_notificaciones', to='tenants.tenant', verbose_name='Tenant')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_notificaciones', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Contador de notificaciones',
+                'verbose_name_plural': 'Contadores de notificaciones',
+                'constraints': [models.UniqueConstraint(fields=('tenant', 'usuario'), name='unique_contador_notif_por_tenant_usuario')],
+            },
+        ),
+    ]
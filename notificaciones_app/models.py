@@ -70,13 +70,56 @@ class Notification(models.Model):
         verbose_name_plural = "Notificaciones"
         ordering = ["-fecha_creacion"]
         indexes = [
-            models.Index(fields=["tenant", "usuario", "leida"]),
+            # Campana: no leídas del usuario, las más recientes primero
+            models.Index(
+                fields=["tenant", "usuario", "leida", "-fecha_creacion"],
+                name="notif_tenant_usuario_leida",
+            ),
         ]
 
     def __str__(self):
         return f"{self.titulo} → {self.usuario}"
 
 
+class NotificationCounter(models.Model):
+    """
+    Contador desnormalizado de notificaciones no leídas por (tenant, usuario).
+    Lo mantiene notificaciones_app.contador; la campana lo lee en vez de
+    hacer COUNT(*) sobre Notification en cada página.
+    """
+
+    tenant = models.ForeignKey(
+        Tenant,
+        on_delete=models.CASCADE,
+        related_name="contadores_notificaciones",
+        verbose_name="Tenant",
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="contadores_notificaciones",
+        verbose_name="Usuario",
+    )
+    no_leidas = models.PositiveIntegerField(
+        default=0,
+        verbose_name="No leídas",
+    )
+    actualizado_en = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Contador de notificaciones"
+        verbose_name_plural = "Contadores de notificaciones"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "usuario"],
+                name="unique_contador_notif_por_tenant_usuario",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario} · {self.no_leidas} no leídas (tenant={self.tenant_id})"
+
+
 class PushSubscription(models.Model):
     """
     Suscripción push para notificaciones web (VAPID).
@@ -4,6 +4,7 @@ from dataclasses import dataclass
 from typing import Callable, Dict, Any, List, Optional
 
 from tenants.models import Tenant
+from tenants.threadlocal import tenant_context
 
 
 @dataclass
@@ -45,7 +46,9 @@ def ejecutar_motor(tenant: Optional[Tenant] = None) -> List[MotorResultado]:
 
     for nombre, fn in _TASKS:
         try:
-            detalle = fn(tenant) or {}
+            # El tenant también queda como tenant actual (managers TenantManager)
+            with tenant_context(tenant):
+                detalle = fn(tenant) or {}
             resultados.append(MotorResultado(nombre=nombre, ok=True, detalle=detalle))
         except Exception as e:
             resultados.append(MotorResultado(nombre=nombre, ok=False, detalle={"error": str(e)}))
@@ -3,10 +3,11 @@
 import json
 import logging
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from pywebpush import webpush, WebPushException
 
+from . import contador
 from .models import Notification, PushSubscription
 
 logger = logging.getLogger(__name__)
@@ -93,6 +94,28 @@ def enviar_push_a_usuario(usuario, tenant, titulo, mensaje, url="/", badge_count
     return {"enviados": enviados, "errores": errores}
 
 
+# Debe registrarse ANTES del push: el badge del push lee el contador
+@receiver(post_save, sender=Notification)
+def actualizar_contador_no_leidas(sender, instance, created, **kwargs):
+    """
+    Mantiene NotificationCounter al día para cualquier creación
+    (crear_notificacion, agenda, admin...).
+    """
+    if created:
+        if not instance.leida:
+            contador.sumar(instance.tenant_id, instance.usuario_id, 1)
+    else:
+        # Edición suelta (admin): puede haber cambiado `leida`
+        contador.recalcular(instance.tenant_id, instance.usuario_id)
+
+
+@receiver(post_delete, sender=Notification)
+def descontar_notificacion_eliminada(sender, instance, **kwargs):
+    if not instance.leida:
+        # Sin crear fila: puede venir del borrado en cascada del usuario/tenant
+        contador.sumar(instance.tenant_id, instance.usuario_id, -1, crear=False)
+
+
 @receiver(post_save, sender=Notification)
 def enviar_push_al_crear_notificacion(sender, instance, created, **kwargs):
     """
@@ -109,12 +132,8 @@ def enviar_push_al_crear_notificacion(sender, instance, created, **kwargs):
         logger.warning(f"[Push] Notificación {instance.id} sin tenant, no se envía push")
         return
     
-    # Contar notificaciones no leídas para el badge (dentro del tenant)
-    no_leidas = Notification.objects.filter(
-        tenant=tenant,
-        usuario=instance.usuario,
-        leida=False
-    ).count()
+    # Notificaciones no leídas para el badge (contador desnormalizado)
+    no_leidas = contador.total_no_leidas(tenant.pk, instance.usuario_id)
     
     # Enviar push
     resultado = enviar_push_a_usuario(
@@ -6,6 +6,7 @@ app_name = "notificaciones_app"
 
 urlpatterns = [
     path("marcar-leidas/", views.marcar_todas_leidas, name="marcar_todas_leidas"),
+    path("ultimas/", views.ultimas_no_leidas, name="ultimas_no_leidas"),
         path("push/status/", views_push.push_status, name="push_status"),
     path("push/subscribe/", views_push.push_subscribe, name="push_subscribe"),
     path("push/unsubscribe/", views_push.push_unsubscribe, name="push_unsubscribe"),
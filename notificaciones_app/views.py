@@ -2,6 +2,9 @@
 
 from django.http import JsonResponse, HttpResponseForbidden
 from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+
+from . import contador
 from .models import Notification
 
 
@@ -20,10 +23,28 @@ def marcar_todas_leidas(request):
     if not tenant:
         return HttpResponseForbidden("Tenant no disponible.")
     
-    Notification.objects.filter(
+    # Marca y deja el contador en 0 en la misma transacción
+    contador.marcar_leidas(tenant.pk, request.user.pk)
+    
+    return JsonResponse({"status": "ok"})
+
+
+@login_required
+def ultimas_no_leidas(request):
+    """
+    Fragmento HTML con las últimas 5 no leídas.
+    Lo pide la campana solo cuando se abre el menú.
+    """
+    tenant = _require_tenant(request)
+    if not tenant:
+        return HttpResponseForbidden("Tenant no disponible.")
+
+    notificaciones = Notification.objects.filter(
         tenant=tenant,
         usuario=request.user,
         leida=False
-    ).update(leida=True)
-    
-    return JsonResponse({"status": "ok"})
\ No newline at end of file
+    ).order_by("-fecha_creacion")[:5]
+
+    return render(request, "notificaciones_app/_campana_lista.html", {
+        "notificaciones": notificaciones,
+    })
\ No newline at end of file
@@ -6,8 +6,8 @@ from django.http import JsonResponse
 from django.views.decorators.http import require_POST, require_GET
 from django.views.decorators.csrf import csrf_protect
 from django.db import transaction
-from django.db.models import Q
 
+from miembros_app import busqueda
 from miembros_app.models import (
     Miembro,
     MiembroRelacion,
@@ -380,11 +380,9 @@ def ajax_buscar_miembros_portal(request):
     
     excluir_ids.extend(list(relaciones_existentes))
 
-    # Búsqueda por nombre, apellido o código
-    qs = Miembro.objects.exclude(id__in=excluir_ids).filter(
-        Q(nombres__icontains=q) |
-        Q(apellidos__icontains=q) |
-        Q(codigo_miembro__icontains=q)
+    # Solo nombre, apellido o código (sin acentos): nunca datos de contacto
+    qs = busqueda.filtrar(
+        Miembro.objects.exclude(id__in=excluir_ids), q, solo_nombre=True
     ).order_by("nombres", "apellidos")[:15]
 
     results = []
@@ -0,0 +1,181 @@
+# tenants/cache.py
+# Cache en proceso para resolver host -> tenant sin ir a la BD en cada request.
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+logger = logging.getLogger("soid.tenants")
+
+
+def tocar_version():
+    """Sube VersionTenants (en la transacción del cambio de Tenant)."""
+    from .models import VersionTenants
+
+    if not VersionTenants.objects.filter(pk=1).update(version=F("version") + 1):
+        try:
+            with transaction.atomic():
+                VersionTenants.objects.create(pk=1, version=1)
+        except IntegrityError:
+            VersionTenants.objects.filter(pk=1).update(version=F("version") + 1)
+
+
+class TenantHostCache:
+    """
+    Cache host -> Tenant con TTL, en memoria del proceso.
+
+    - Los hosts conocidos se guardan `ttl` segundos.
+    - Los hosts desconocidos (bots, dominios mal apuntados) se guardan como
+      negativos durante `negative_ttl` segundos para que no lleguen a la BD.
+    - Se invalida explícitamente desde las signals de Tenant (ver signals.py),
+      pero eso solo limpia el proceso que hizo el cambio. Los demás workers
+      (y los cambios hechos desde shell/comandos) se enteran por
+      VersionTenants: como mucho cada `version_check` segundos se lee la
+      versión (una consulta por PK) y, si cambió, se vacía todo el cache.
+      Ventana máxima en la que otro worker sirve un tenant viejo (desactivado
+      o con otro dominio): `version_check` segundos.
+    - Lleva contadores de aciertos/fallos (`stats()`). Son por proceso, así
+      que cada worker los escribe en el logger "soid.tenants" cada
+      `stats_interval` segundos (0 = nunca), con su pid.
+    """
+
+    def __init__(self, ttl=300, negative_ttl=30, max_entries=1024, version_check=5, stats_interval=300):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.version_check = version_check
+        self._entries = OrderedDict()  # host -> (expira_en, tenant | None)
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_leida_en = 0.0
+        self.stats_interval = stats_interval
+        self._stats_escritas_en = time.monotonic()
+        self.reset_stats()
+
+    # ─────────────────────────────────────────────────────────────
+    # Lectura
+    # ─────────────────────────────────────────────────────────────
+    def resolve(self, host):
+        """
+        Devuelve el Tenant activo para `host` (o None si no existe).
+        Solo consulta la BD si el host no está en cache o ya expiró.
+        """
+        ahora = time.monotonic()
+        self._revisar_version(ahora)
+        self._escribir_stats(ahora)
+
+        with self._lock:
+            entrada = self._entries.get(host)
+            if entrada is not None and entrada[0] > ahora:
+                self._entries.move_to_end(host)
+                if entrada[1] is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                return entrada[1]
+            self.misses += 1
+
+        tenant = self._load(host)
+        self._store(host, tenant)
+        return tenant
+
+    def _load(self, host):
+        from .models import Tenant
+        return Tenant.objects.filter(dominio=host, activo=True).first()
+
+    def _store(self, host, tenant):
+        ttl = self.ttl if tenant is not None else self.negative_ttl
+        with self._lock:
+            self._entries[host] = (time.monotonic() + ttl, tenant)
+            self._entries.move_to_end(host)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # ─────────────────────────────────────────────────────────────
+    # Invalidación
+    # ─────────────────────────────────────────────────────────────
+    def _revisar_version(self, ahora):
+        """Vacía el cache si otro proceso cambió algún Tenant."""
+        if ahora - self._version_leida_en < self.version_check:
+            return
+        from .models import VersionTenants
+
+        # Se marca antes de consultar para que los hilos concurrentes no repitan
+        self._version_leida_en = ahora
+        version = VersionTenants.objects.filter(pk=1).values_list("version", flat=True).first() or 0
+        if self._version is not None and version != self._version:
+            self.clear()
+        self._version = version
+
+    def invalidate_tenant(self, tenant):
+        """
+        Elimina cualquier entrada que apunte a este tenant y la entrada
+        (positiva o negativa) de su dominio actual.
+        Cubre cambios de dominio, desactivación y borrado.
+        """
+        dominio = (getattr(tenant, "dominio", "") or "").lower()
+        with self._lock:
+            claves = [
+                host for host, (_, t) in self._entries.items()
+                if host == dominio or (t is not None and t.pk == tenant.pk)
+            ]
+            for host in claves:
+                del self._entries[host]
+            self.invalidations += len(claves)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    # ─────────────────────────────────────────────────────────────
+    # Métricas
+    # ─────────────────────────────────────────────────────────────
+    def reset_stats(self):
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _escribir_stats(self, ahora):
+        if not self.stats_interval or ahora - self._stats_escritas_en < self.stats_interval:
+            return
+        self._stats_escritas_en = ahora
+        s = self.stats()
+        logger.info(
+            "tenant_cache pid=%s hits=%s negative_hits=%s misses=%s evictions=%s "
+            "invalidations=%s entries=%s hit_ratio=%s",
+            os.getpid(), s["hits"], s["negative_hits"], s["misses"], s["evictions"],
+            s["invalidations"], s["entries"], s["hit_ratio"],
+        )
+
+    def stats(self):
+        """Contadores del proceso actual (cada worker tiene los suyos)."""
+        with self._lock:
+            total = self.hits + self.negative_hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "hit_ratio": round((self.hits + self.negative_hits) / total, 4) if total else 0.0,
+            }
+
+
+tenant_cache = TenantHostCache(
+    ttl=getattr(settings, "TENANT_CACHE_TTL", 300),
+    negative_ttl=getattr(settings, "TENANT_CACHE_NEGATIVE_TTL", 30),
+    max_entries=getattr(settings, "TENANT_CACHE_MAX_ENTRIES", 1024),
+    version_check=getattr(settings, "TENANT_CACHE_VERSION_CHECK", 5),
+    stats_interval=getattr(settings, "TENANT_CACHE_STATS_INTERVAL", 300),
+)
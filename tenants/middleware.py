@@ -1,36 +1,60 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.http import HttpResponse
-from .models import Tenant
-from .threadlocal import set_current_tenant
+from .cache import tenant_cache
+from .threadlocal import reset_current_tenant, set_current_tenant
 
 class TenantMiddleware:
+    """
+    Resuelve el tenant por host y lo fija en el contexto del request.
+    Funciona en WSGI y ASGI: el tenant vive en un ContextVar y se restaura
+    siempre al terminar (también si la vista lanza una excepción).
+    """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
-    def __call__(self, request):
-        # ✅ Permitimos SIEMPRE el admin de tenants sin tenant (para no quedarte encerrado)
-        if request.path.startswith("/admin/tenants/"):
-            set_current_tenant(None)
-            request.tenant = None
-            return self.get_response(request)
-        
-        # Permitir entrar al admin sin tenant
+    def _resolver(self, request):
+        """Devuelve (tenant, respuesta_de_error). tenant None = request sin tenant."""
+        # ✅ Permitimos SIEMPRE el admin (incluido el de tenants) sin tenant
+        #    (para no quedarte encerrado)
         if request.path.startswith("/admin"):
-            request.tenant = None
-            return self.get_response(request)
+            return None, None
 
         host = request.get_host().split(":")[0].lower()
 
-        try:
-            tenant = Tenant.objects.get(dominio=host, activo=True)
-        except Tenant.DoesNotExist:
-            set_current_tenant(None)
-            request.tenant = None
-            return HttpResponse(f"Tenant no encontrado. Host recibido: {host}", status=404)
+        # ✅ Resolución cacheada (incluye hosts desconocidos con TTL corto)
+        tenant = tenant_cache.resolve(host)
+        if tenant is None:
+            return None, HttpResponse(f"Tenant no encontrado. Host recibido: {host}", status=404)
+        return tenant, None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
 
-        set_current_tenant(tenant)
+        tenant, error = self._resolver(request)
         request.tenant = tenant
+        if error is not None:
+            return error
+
+        token = set_current_tenant(tenant)
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_tenant(token)
 
-        response = self.get_response(request)
+    async def __acall__(self, request):
+        tenant, error = await sync_to_async(self._resolver)(request)
+        request.tenant = tenant
+        if error is not None:
+            return error
 
-        set_current_tenant(None)
-        return response
\ No newline at end of file
+        token = set_current_tenant(tenant)
+        try:
+            return await self.get_response(request)
+        finally:
+            reset_current_tenant(token)
@@ -15,6 +15,18 @@ class Tenant(models.Model):
     def __str__(self):
         return f"{self.nombre} ({self.dominio})"
 
+
+class VersionTenants(models.Model):
+    """
+    Contador global (una sola fila) que sube con cada cambio de Tenant.
+    Cada worker lo consulta cada pocos segundos (tenants.cache) para vaciar
+    su cache host -> tenant aunque el cambio se haya hecho en otro proceso.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"v{self.version}"
+
 class TenantAwareModel(models.Model):
     """
     Clase base abstracta para modelos multi-tenant.
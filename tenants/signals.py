@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import tenant_cache, tocar_version
+from .models import Tenant
+
+
+@receiver(post_save, sender=Tenant)
+def tenant_post_save(sender, instance, raw=False, **kwargs):
+    """Un tenant editado/desactivado no debe seguir resolviéndose desde cache."""
+    tenant_cache.invalidate_tenant(instance)
+    if not raw:
+        # Los demás workers lo ven al leer la versión
+        tocar_version()
+
+
+@receiver(post_delete, sender=Tenant)
+def tenant_post_delete(sender, instance, **kwargs):
+    tenant_cache.invalidate_tenant(instance)
+    tocar_version()
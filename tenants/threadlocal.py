@@ -1,9 +1,42 @@
-import threading
+# tenants/threadlocal.py
+# Tenant actual del contexto de ejecución.
+#
+# El nombre del módulo es histórico: antes era un threading.local, ahora es
+# un ContextVar. Así funciona igual en WSGI (hilos), en ASGI (cada request es
+# su propia tarea) y a través de sync_to_async / async_to_sync, sin que el
+# tenant de un request se filtre a otro.
+
+import contextvars
+from contextlib import contextmanager
+
+_current_tenant = contextvars.ContextVar("soid_current_tenant", default=None)
 
-_local = threading.local()
 
 def set_current_tenant(tenant):
-    _local.tenant = tenant
+    """Fija el tenant actual. Devuelve un token para reset_current_tenant()."""
+    return _current_tenant.set(tenant)
+
+
+def reset_current_tenant(token):
+    """Restaura el tenant que había antes del set_current_tenant() del token."""
+    _current_tenant.reset(token)
+
 
 def get_current_tenant():
-    return getattr(_local, "tenant", None)
\ No newline at end of file
+    return _current_tenant.get()
+
+
+@contextmanager
+def tenant_context(tenant):
+    """
+    Ejecuta un bloque con `tenant` como tenant actual y restaura el anterior
+    al salir (aunque haya excepción). Para cron, comandos y tareas:
+
+        with tenant_context(tenant):
+            Miembro.objects.filter(activo=True)
+    """
+    token = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
@@ -60,25 +60,16 @@ def calcular_total_miembros_habilitados():
     """
     edad_minima = get_edad_minima_miembro_oficial()
 
-    # Tomamos solo los miembros activos en el sistema,
-    # con estado_miembro activo/pasivo y con fecha de nacimiento.
-    miembros = Miembro.objects.filter(
-        activo=True,
-        estado_miembro__in=["activo", "pasivo"],
-    ).exclude(fecha_nacimiento__isnull=True)
-
-    hoy = date.today()
-    total = 0
-
-    for m in miembros:
-        fn = m.fecha_nacimiento
-        edad = hoy.year - fn.year - (
-            (hoy.month, hoy.day) < (fn.month, fn.day)
+    # Miembros activos en el sistema, con estado_miembro activo/pasivo y la
+    # edad mínima cumplida (sin fecha de nacimiento no cuentan): un COUNT.
+    return (
+        Miembro.objects.filter(
+            activo=True,
+            estado_miembro__in=["activo", "pasivo"],
         )
-        if edad >= edad_minima:
-            total += 1
-
-    return total
+        .age_between(edad_minima)
+        .count()
+    )
 
 
 